@@ -0,0 +1,153 @@
+from array import array
+from bisect import bisect_left, bisect_right
+from io import BytesIO
+from struct import Struct
+
+from cache import load_cached
+from dolreader import DolFile
+from instructions.dispatcher import parse_instruction
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+WORD = Struct(">I")
+
+# Primary opcodes of bc, b and the opcode 19 group with bclr/bcctr
+BRANCH_OPCODES = (16, 18, 19)
+
+# Extended opcode of bcctr, which the interpreter doesn't decode
+BCCTR_XO = 528
+
+
+def _branch_words(address, data):
+    # (address, word) of every word in data with a branch primary opcode
+    count = len(data) // 4
+
+    if numpy is not None:
+        words = numpy.frombuffer(data, ">u4", count)
+        primary = words >> 26
+        indices = numpy.flatnonzero(numpy.isin(primary, BRANCH_OPCODES))
+        return zip((address + indices*4).tolist(), words[indices].tolist())
+
+    return ((address + i*4, word) for i, (word, ) in enumerate(WORD.iter_unpack(data[:count*4]))
+            if word >> 26 in BRANCH_OPCODES)
+
+
+class ProgramIndex(object):
+    # Whole program index of a dol: function entry points (bl targets and the
+    # entry point), basic block starts and the call graph as call sites and
+    # their targets. Everything is stored in sorted array('I')s.
+    def __init__(self, functions=(), blocks=(), calls=()):
+        self.functions = array("I", sorted(set(functions)))
+        self.blocks = array("I", sorted(set(blocks)))
+
+        calls = sorted(calls)
+        self.call_sites = array("I", (site for site, target in calls))
+        self.call_targets = array("I", (target for site, target in calls))
+
+        # Call sites sorted by target, for looking up callers
+        by_target = sorted(calls, key=lambda call: (call[1], call[0]))
+        self._targets_sorted = array("I", (target for site, target in by_target))
+        self._sites_by_target = array("I", (site for site, target in by_target))
+
+    @classmethod
+    def build(cls, dol):
+        text = [(address, address+size) for offset, address, size in dol.text_sections if size > 0]
+
+        def in_text(address):
+            for start, end in text:
+                if start <= address < end:
+                    return True
+            return False
+
+        functions = set()
+        blocks = set(start for start, end in text)
+        calls = []
+
+        if in_text(dol.entrypoint):
+            functions.add(dol.entrypoint)
+
+        for offset, address, size in dol.text_sections:
+            with dol.view(offset, size) as view:
+                data = bytes(view)
+
+            for pc, word in _branch_words(address, data):
+                try:
+                    instruction = parse_instruction(word, pc)
+                except RuntimeError:
+                    # bcctr still ends a block, it has no static target
+                    if word >> 26 == 19 and (word >> 1) & 0x3FF == BCCTR_XO and in_text(pc + 4):
+                        blocks.add(pc + 4)
+                    continue
+
+                if not instruction.ends_block:
+                    continue
+
+                if in_text(pc + 4):
+                    blocks.add(pc + 4)
+
+                # Branches to the link or count register have no static target
+                target = getattr(instruction, "target", None)
+                if target is None or not in_text(target):
+                    continue
+
+                blocks.add(target)
+                if instruction.LK:
+                    functions.add(target)
+                    calls.append((pc, target))
+
+        blocks.update(functions)
+
+        return cls(functions, blocks, calls)
+
+    @classmethod
+    def load(cls, path, use_cache=True):
+        # Like SymbolMap.load, the index is cached next to the dol as .index
+        return load_cached(cls, path, ".index", lambda data: cls.build(DolFile(BytesIO(data))), use_cache)
+
+    @staticmethod
+    def _containing(starts, address):
+        i = bisect_right(starts, address) - 1
+        if i < 0:
+            return None
+        return starts[i]
+
+    def function_at(self, address):
+        # Start of the function containing address, functions are assumed to
+        # end where the next one starts
+        return self._containing(self.functions, address)
+
+    def block_at(self, address):
+        return self._containing(self.blocks, address)
+
+    def is_function(self, address):
+        i = bisect_left(self.functions, address)
+        return i < len(self.functions) and self.functions[i] == address
+
+    def calls_from(self, function):
+        # (call site, target) of the calls made by the function at function
+        i = bisect_right(self.functions, function)
+        end = self.functions[i] if i < len(self.functions) else 0x100000000
+
+        first = bisect_left(self.call_sites, function)
+        last = bisect_left(self.call_sites, end)
+
+        return list(zip(self.call_sites[first:last], self.call_targets[first:last]))
+
+    def callers(self, target):
+        # Call sites calling target
+        first = bisect_left(self._targets_sorted, target)
+        last = bisect_right(self._targets_sorted, target)
+
+        return list(self._sites_by_target[first:last])
+
+    def call_graph(self):
+        # Function -> set of called functions
+        graph = {}
+        for site, target in zip(self.call_sites, self.call_targets):
+            graph.setdefault(self.function_at(site), set()).add(target)
+
+        return graph
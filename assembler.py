@@ -0,0 +1,229 @@
+# Minimal assembler for the handful of instruction forms used by the tests and
+# the benchmark kernels, and helpers loading the assembled words into a machine
+
+from machine import GCMachine
+
+
+CODE_ADDRESS = 0x80003000
+DATA_ADDRESS = 0x80100000
+STACK_ADDRESS = 0x80200000
+
+
+def d_form(opcode, rt, ra, imm):
+    return (opcode << 26) | (rt << 21) | (ra << 16) | (imm & 0xFFFF)
+
+
+def x_form(rs, ra, rb, xo, rc=0, opcode=31):
+    return (opcode << 26) | (rs << 21) | (ra << 16) | (rb << 11) | (xo << 1) | rc
+
+
+def m_form(opcode, rs, ra, sh, mb, me, rc=0):
+    return (opcode << 26) | (rs << 21) | (ra << 16) | (sh << 11) | (mb << 6) | (me << 1) | rc
+
+
+def li(rt, value):
+    return d_form(14, rt, 0, value)
+
+
+def lis(rt, value):
+    return d_form(15, rt, 0, value)
+
+
+def addi(rt, ra, value):
+    return d_form(14, rt, ra, value)
+
+
+def add(rt, ra, rb):
+    return x_form(rt, ra, rb, 266)
+
+
+def subf(rt, ra, rb):
+    return x_form(rt, ra, rb, 40)
+
+
+def or_(ra, rs, rb):
+    return x_form(rs, ra, rb, 444)
+
+
+def mr(ra, rs):
+    return or_(ra, rs, rs)
+
+
+def xor(ra, rs, rb):
+    return x_form(rs, ra, rb, 316)
+
+
+def slw(ra, rs, rb):
+    return x_form(rs, ra, rb, 24)
+
+
+def srw(ra, rs, rb):
+    return x_form(rs, ra, rb, 536)
+
+
+def srawi(ra, rs, sh):
+    return x_form(rs, ra, sh, 824)
+
+
+def rlwinm(ra, rs, sh, mb, me, rc=0):
+    return m_form(21, rs, ra, sh, mb, me, rc)
+
+
+def rlwimi(ra, rs, sh, mb, me):
+    return m_form(20, rs, ra, sh, mb, me)
+
+
+def rlwnm(ra, rs, rb, mb, me):
+    return m_form(23, rs, ra, rb, mb, me)
+
+
+def cmpw(ra, rb, crf=0):
+    return x_form(crf << 2, ra, rb, 0)
+
+
+def cmpwi(ra, value, crf=0):
+    return d_form(11, crf << 2, ra, value)
+
+
+def cmplw(ra, rb, crf=0):
+    return x_form(crf << 2, ra, rb, 32)
+
+
+def lwz(rt, offset, ra):
+    return d_form(32, rt, ra, offset)
+
+
+def stw(rs, offset, ra):
+    return d_form(36, rs, ra, offset)
+
+
+def lmw(rt, offset, ra):
+    return d_form(46, rt, ra, offset)
+
+
+def stmw(rs, offset, ra):
+    return d_form(47, rs, ra, offset)
+
+
+def mtctr(rs):
+    return x_form(rs, 9, 0, 467)
+
+
+def mflr(rt):
+    return x_form(rt, 8, 0, 339)
+
+
+def mtlr(rs):
+    return x_form(rs, 8, 0, 467)
+
+
+def nop():
+    return d_form(24, 0, 0, 0)
+
+
+BLR = 0x4E800020
+
+
+def bc(bo, bi):
+    # Conditional branch encoders take the offset from the branch to the target
+    return lambda offset: (16 << 26) | (bo << 21) | (bi << 16) | (offset & 0xFFFC)
+
+
+def b(offset):
+    return (18 << 26) | (offset & 0x03FFFFFC)
+
+
+def bl(offset):
+    return b(offset) | 1
+
+
+bdnz = bc(16, 0)
+bdz = bc(18, 0)
+beq = bc(12, 2)
+bne = bc(4, 2)
+blt = bc(12, 0)
+bge = bc(4, 0)
+
+
+class Assembler(object):
+    def __init__(self):
+        self.words = []
+        self.labels = {}
+        self.fixups = []
+
+    def __call__(self, *words):
+        self.words.extend(words)
+
+    def label(self, name):
+        self.labels[name] = len(self.words) * 4
+
+    def branch(self, make, name):
+        # make gets the offset from the branch to the label
+        self.fixups.append((len(self.words), make, name))
+        self.words.append(0)
+
+    def assemble(self):
+        words = list(self.words)
+        for index, make, name in self.fixups:
+            words[index] = make(self.labels[name] - index*4)
+
+        return words
+
+
+def load_code(words, address=CODE_ADDRESS, engine="interpreter"):
+    # New machine with the words written at address and pc pointing to them
+    machine = GCMachine()
+    if words:
+        machine.write_words(address, words)
+    machine.set_engine(engine)
+    machine.context.pc = address
+
+    return machine
+
+
+def run_code(words, **registers):
+    # Executes the words one after another with the given registers (r3=...)
+    # set, returns the machine
+    machine = load_code(words)
+    for name, value in registers.items():
+        machine.context.gpr[int(name[1:])] = value & 0xFFFFFFFF
+
+    for word in words:
+        machine.execute_next()
+
+    return machine
+
+
+def build_dol(text, data=(), entrypoint=None, bss=(0, 0)):
+    # Contents of a dol file with up to 7 text and 11 data sections given as
+    # (address, words) and (address, bytes), the entry point defaults to the
+    # start of the first text section
+    from dolreader import DOL_BSS, DOL_SECTIONS
+
+    text = [(address, b"".join(word.to_bytes(4, "big") for word in words))
+            for address, words in text]
+    data = [(address, bytes(contents)) for address, contents in data]
+    slots = text + [None] * (7 - len(text)) + data + [None] * (11 - len(data))
+
+    offsets, addresses, sizes = [], [], []
+    offset = 0x100
+    for slot in slots:
+        if slot is None:
+            offsets.append(0)
+            addresses.append(0)
+            sizes.append(0)
+        else:
+            address, contents = slot
+            offsets.append(offset)
+            addresses.append(address)
+            sizes.append(len(contents))
+            offset += len(contents)
+
+    header = bytearray(0x100)
+    DOL_SECTIONS.pack_into(header, 0, *(offsets + addresses + sizes))
+    DOL_BSS.pack_into(header, 0xD8, *bss)
+    if entrypoint is None:
+        entrypoint = text[0][0]
+    header[0xE0:0xE4] = entrypoint.to_bytes(4, "big")
+
+    return bytes(header) + b"".join(contents for address, contents in text + data)
@@ -0,0 +1,141 @@
+import sys
+import time
+from struct import Struct
+
+from dolreader import DolFile
+from instructions.dispatcher import *
+
+
+WORD = Struct(">I")
+
+
+# Dispatch through the dictionary chain the flat table replaced, kept as the
+# reference to compare against
+
+def get_bits(val, start, end):
+    size = end-start + 1
+    return (val >> (31-end)) & (2**size -1)
+
+
+def dispatch_chained(val):
+    opcode = get_bits(val, 0, 5)
+
+    if opcode in instructions:
+        return instructions[opcode]
+    elif opcode == 19:
+        opcode2 = get_bits(val, 21, 30)
+        if opcode2 in instructions_xl:
+            return instructions_xl[opcode2]
+        else:
+            raise RuntimeError("Unknown opcode2 xl {0}".format(opcode2))
+    elif opcode == 31:
+        opcode2 = get_bits(val, 21, 30)
+        if opcode2 in instructions_x:
+            return instructions_x[opcode2]
+        else:
+            opcode2 = get_bits(val, 22, 30)
+            if opcode2 in instructions_xo:
+                return instructions_xo[opcode2]
+            else:
+                raise RuntimeError("Unknown opcode2 {0}".format(opcode2))
+    else:
+        raise RuntimeError("Unknown opcode {0}".format(opcode))
+
+
+def dispatch_table(val):
+    entry = decode_table[val >> 26]
+
+    if entry.__class__ is list:
+        entry = entry[(val >> 1) & 0x3FF]
+        if entry is None:
+            raise RuntimeError("Unknown opcode {0} with extended opcode {1}".format(
+                val >> 26, (val >> 1) & 0x3FF))
+    elif entry is None:
+        raise RuntimeError("Unknown opcode {0}".format(val >> 26))
+
+    return entry
+
+
+def read_text_words(dol):
+    words = []
+    for offset, address, size in dol.text_sections:
+        with dol.view(offset, size - size % 4) as data:
+            words.extend(word for word, in WORD.iter_unpack(data))
+
+    return words
+
+
+def decodable(words):
+    # Words that decode to an instruction, with their instruction class
+    result = []
+    for val in words:
+        try:
+            instruction = dispatch_table(val)
+            instruction(val)
+        except RuntimeError:
+            continue
+        result.append((instruction, val))
+
+    return result
+
+
+def time_dispatch(words, dispatch):
+    start = time.perf_counter()
+    for val in words:
+        dispatch(val)
+
+    return time.perf_counter() - start
+
+
+def time_construct(classes):
+    start = time.perf_counter()
+    for instruction, val in classes:
+        instruction(val)
+
+    return time.perf_counter() - start
+
+
+def time_decode(words, decoder):
+    start = time.perf_counter()
+    for val in words:
+        decoder(val)
+
+    return time.perf_counter() - start
+
+
+def best_of(repeat, function, *args):
+    return min(function(*args) for i in range(repeat))
+
+
+def run(words, repeat=3):
+    # Times dispatch (finding the instruction class) through the dictionary
+    # chain and the flat table on the decodable words, and construction
+    # (field extraction in the instruction constructors) and full decoding
+    # with the current parsers
+    classes = decodable(words)
+    words = [val for instruction, val in classes]
+
+    dispatch = (best_of(repeat, time_dispatch, words, dispatch_chained),
+                best_of(repeat, time_dispatch, words, dispatch_table))
+    construct = best_of(repeat, time_construct, classes)
+    decode = best_of(repeat, time_decode, words, parse_instruction)
+
+    return len(words), dispatch, construct, decode
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print("Usage: python -m benchmarks.decode <dol file>")
+        sys.exit(1)
+
+    with open(sys.argv[1], "rb") as f:
+        dol = DolFile(f)
+
+    words = read_text_words(dol)
+    decoded, (chained, table), construct, decode = run(words)
+    print("{0} words in text sections, {1} decodable".format(len(words), decoded))
+
+    print("dispatch: chained {0:.3f}s, table {1:.3f}s, speedup {2:.2f}x".format(
+        chained, table, chained / table))
+    print("construct: {0:.3f}s".format(construct))
+    print("decode: {0:.3f}s".format(decode))
@@ -0,0 +1,174 @@
+import argparse
+import json
+import platform
+import sys
+import time
+
+from assembler import CODE_ADDRESS, load_code
+from benchmarks.kernels import KERNELS
+from instructions.dispatcher import parse_instruction
+from tracing import Tracer
+
+
+ENGINES = ("interpreter", "blocks")
+
+# Relative slowdown against the baseline reported as a regression
+THRESHOLD = 0.05
+
+
+class CountingTracer(Tracer):
+    def __init__(self):
+        self.instructions = 0
+        self.memory_accesses = 0
+
+    def pre_execute(self, machine, address, word, instruction):
+        self.instructions += 1
+
+    def memory_access(self, machine, address, size, value, write):
+        self.memory_accesses += 1
+
+
+def count_kernel(words, iterations):
+    # Instruction and memory access counts of a run. Kernels execute the
+    # same instructions every iteration, so two short traced runs are enough
+    # to extrapolate to any iteration count.
+    counts = []
+    for n in (1, 2):
+        machine = load_code(words)
+        tracer = CountingTracer()
+        machine.set_tracer(tracer)
+        machine.call_function(CODE_ADDRESS, n)
+        counts.append((tracer.instructions, tracer.memory_accesses))
+
+    (instructions1, accesses1), (instructions2, accesses2) = counts
+    instructions = instructions1 + (instructions2 - instructions1) * (iterations - 1)
+    accesses = accesses1 + (accesses2 - accesses1) * (iterations - 1)
+
+    return instructions, accesses
+
+
+def time_kernel(words, engine, iterations, repeat):
+    best = None
+    result = None
+
+    for i in range(repeat):
+        machine = load_code(words, engine=engine)
+        start = time.perf_counter()
+        machine.call_function(CODE_ADDRESS, iterations)
+        elapsed = time.perf_counter() - start
+
+        if best is None or elapsed < best:
+            best = elapsed
+        result = machine.context.gpr[3]
+
+    return best, result
+
+
+def time_decode(words, count=100000):
+    words = (words * (count // len(words) + 1))[:count]
+    start = time.perf_counter()
+    for i, word in enumerate(words):
+        parse_instruction(word, CODE_ADDRESS + i*4)
+
+    return count / (time.perf_counter() - start)
+
+
+def run(kernels=None, engines=ENGINES, iterations=20000, repeat=3):
+    results = {
+        "python": platform.python_version(),
+        "iterations": iterations,
+        "kernels": {}
+    }
+
+    for name in (kernels or sorted(KERNELS)):
+        words = KERNELS[name]()
+        instructions, accesses = count_kernel(words, iterations)
+
+        kernel = {
+            "instructions": instructions,
+            "memory_accesses": accesses,
+            "decode_rate": time_decode(words),
+            "engines": {}
+        }
+        outputs = set()
+
+        for engine in engines:
+            seconds, output = time_kernel(words, engine, iterations, repeat)
+            outputs.add(output)
+            kernel["engines"][engine] = {
+                "seconds": seconds,
+                "mips": instructions / seconds / 1e6,
+                "memory_rate": accesses / seconds
+            }
+
+        if len(outputs) > 1:
+            raise RuntimeError("Engines disagree on the result of kernel {0}".format(name))
+
+        results["kernels"][name] = kernel
+
+    return results
+
+
+def compare(results, baseline, threshold=THRESHOLD):
+    # Returns (kernel, engine, speed relative to the baseline) for every run
+    # present in both, speeds below 1 - threshold are regressions
+    comparison = []
+
+    for name, kernel in results["kernels"].items():
+        if name not in baseline["kernels"]:
+            continue
+
+        for engine, run in kernel["engines"].items():
+            base = baseline["kernels"][name]["engines"].get(engine)
+            if base is not None:
+                comparison.append((name, engine, run["mips"] / base["mips"]))
+
+    return comparison
+
+
+def print_results(results):
+    print("{0:<12} {1:<12} {2:>10} {3:>14} {4:>14}".format(
+        "kernel", "engine", "MIPS", "accesses/s", "decodes/s"))
+
+    for name, kernel in sorted(results["kernels"].items()):
+        for engine, run in kernel["engines"].items():
+            print("{0:<12} {1:<12} {2:>10.3f} {3:>14.0f} {4:>14.0f}".format(
+                name, engine, run["mips"], run["memory_rate"], kernel["decode_rate"]))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Interpreter benchmarks on synthetic kernels")
+    parser.add_argument("kernels", nargs="*", help="Kernels to run, default all of {0}".format(
+        ", ".join(sorted(KERNELS))))
+    parser.add_argument("--engine", action="append", choices=ENGINES, help="Engines to run, default all")
+    parser.add_argument("--iterations", type=int, default=20000)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--json", help="Write the results to this file")
+    parser.add_argument("--baseline", help="Compare against results written with --json")
+    parser.add_argument("--threshold", type=float, default=THRESHOLD)
+    args = parser.parse_args()
+
+    for name in args.kernels:
+        if name not in KERNELS:
+            parser.error("Unknown kernel: {0}".format(name))
+
+    results = run(args.kernels, args.engine or ENGINES, args.iterations, args.repeat)
+    print_results(results)
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=4, sort_keys=True)
+
+    if args.baseline:
+        with open(args.baseline, "r") as f:
+            baseline = json.load(f)
+
+        regressions = 0
+        print()
+        for name, engine, speed in compare(results, baseline, args.threshold):
+            regressed = speed < 1 - args.threshold
+            regressions += regressed
+            print("{0:<12} {1:<12} {2:>7.2f}x{3}".format(name, engine, speed, "  REGRESSION" if regressed else ""))
+
+        if regressions:
+            sys.exit(1)
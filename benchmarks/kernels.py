@@ -0,0 +1,89 @@
+# Synthetic benchmark kernels. Every kernel is a function taking the number of
+# loop iterations in r3, looping with the count register so each iteration
+# executes the same number of instructions.
+
+from assembler import *
+
+
+def arithmetic():
+    asm = Assembler()
+    asm(mtctr(3), li(4, 0), li(5, 1))
+    asm.label("loop")
+    asm(add(4, 4, 5), addi(5, 5, 3), subf(6, 5, 4), xor(4, 4, 6), addi(4, 4, 7), or_(6, 6, 5))
+    asm.branch(bdnz, "loop")
+    asm(mr(3, 4), BLR)
+
+    return asm.assemble()
+
+
+def memory():
+    asm = Assembler()
+    asm(mtctr(3), lis(4, DATA_ADDRESS >> 16))
+    asm.label("loop")
+    asm(lwz(5, 0, 4), addi(5, 5, 1), stw(5, 0, 4), lwz(6, 4, 4), add(6, 6, 5), stw(6, 8, 4), lwz(7, 8, 4),
+        stw(7, 4, 4))
+    asm.branch(bdnz, "loop")
+    asm(lwz(3, 0, 4), BLR)
+
+    return asm.assemble()
+
+
+def rotate():
+    asm = Assembler()
+    asm(mtctr(3), lis(4, 0x1234), li(7, 5), li(8, 3))
+    asm.label("loop")
+    asm(rlwinm(5, 4, 3, 0, 28), rlwimi(5, 4, 16, 8, 15), rlwnm(6, 5, 7, 16, 31), slw(9, 5, 8), srw(10, 6, 8),
+        srawi(11, 9, 2), xor(4, 4, 11), rlwinm(7, 4, 0, 27, 31), addi(4, 4, 1))
+    asm.branch(bdnz, "loop")
+    asm(mr(3, 4), BLR)
+
+    return asm.assemble()
+
+
+def branchy():
+    # Both sides of every condition execute the same number of instructions
+    asm = Assembler()
+    asm(mtctr(3), li(4, 0), li(6, 0), li(7, 0), li(9, 100))
+    asm.label("loop")
+    asm(addi(4, 4, 1), rlwinm(5, 4, 0, 31, 31, rc=1))
+    asm.branch(beq, "even")
+    asm(addi(6, 6, 1))
+    asm.branch(b, "compare")
+    asm.label("even")
+    asm(addi(7, 7, 1), nop())
+    asm.label("compare")
+    asm(cmpw(6, 7))
+    asm.branch(blt, "less")
+    asm(addi(6, 6, -1))
+    asm.branch(b, "unsigned")
+    asm.label("less")
+    asm(addi(6, 6, 1), nop())
+    asm.label("unsigned")
+    asm(cmplw(4, 9, 1))
+    asm.branch(bc(4, 4), "next")
+    asm.label("next")
+    asm.branch(bdnz, "loop")
+    asm(add(3, 6, 7), BLR)
+
+    return asm.assemble()
+
+
+def multiple():
+    # lmw/stmw as used by function prologues and epilogues
+    asm = Assembler()
+    asm(mtctr(3), lis(1, STACK_ADDRESS >> 16), li(20, 1))
+    asm.label("loop")
+    asm(stmw(20, -0x40, 1), addi(20, 20, 1), addi(31, 31, 2), lmw(24, -0x28, 1), add(20, 20, 24))
+    asm.branch(bdnz, "loop")
+    asm(add(3, 20, 31), BLR)
+
+    return asm.assemble()
+
+
+KERNELS = {
+    "arithmetic": arithmetic,
+    "memory": memory,
+    "rotate": rotate,
+    "branchy": branchy,
+    "multiple": multiple
+}
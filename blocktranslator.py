@@ -0,0 +1,579 @@
+from instructions.dispatcher import *
+
+
+# Longest run of instructions compiled into a single block
+MAX_BLOCK_LENGTH = 64
+
+
+# Emitters translate a single instruction into Python source working on local
+# variables: r0-r31 for the registers, cr for the condition register value and
+# ctr for the count register. They get the instruction and the _BlockWriter,
+# ask it for the locals they read and write and emit statements through it.
+# They return None, before emitting anything, for forms they don't handle,
+# those instructions are executed through their execute method instead.
+
+def _record(block, reg):
+    # CR0 update of record forms, the SO bit is kept
+    cr = block.write_cr()
+    block.emit("{0} = ({0} & 0x1FFFFFFF) | (0x20000000 if {1} == 0 else 0x80000000 if {1} & 0x80000000 "
+               "else 0x40000000)".format(cr, reg))
+
+
+def _emit_addi(ins, block):
+    if ins.RA == 0:
+        block.emit("{0} = 0x{1:x}".format(block.write(ins.RT), ins.SI))
+    else:
+        source = block.read(ins.RA)
+        block.emit("{0} = ({1} + 0x{2:x}) & 0xFFFFFFFF".format(block.write(ins.RT), source, ins.SI))
+    return True
+
+
+def _emit_addis(ins, block):
+    if ins.RA == 0:
+        block.emit("{0} = 0x{1:x}".format(block.write(ins.RT), ins.value))
+    else:
+        source = block.read(ins.RA)
+        block.emit("{0} = ({1} + 0x{2:x}) & 0xFFFFFFFF".format(block.write(ins.RT), source, ins.value))
+    return True
+
+
+def _emit_logical_immediate(operator, shift, record=False):
+    def emit(ins, block):
+        if ins.RS == ins.RA and ins.UI == 0 and not record:
+            # nop
+            return True
+        source = block.read(ins.RS)
+        dest = block.write(ins.RA)
+        block.emit("{0} = {1} {2} 0x{3:x}".format(dest, source, operator, ins.UI << shift))
+        if record:
+            _record(block, dest)
+        return True
+    return emit
+
+
+# Binary operations of the X and XO forms, "{0}" and "{1}" are the first and
+# second source register
+def _emit_binary(expression, *fields):
+    def emit(ins, block):
+        if getattr(ins, "OE", 0):
+            return None
+        sources = [block.read(getattr(ins, field)) for field in fields[1:]]
+        dest = block.write(getattr(ins, fields[0]))
+        block.emit("{0} = ".format(dest) + expression.format(*sources))
+        if ins.RC:
+            _record(block, dest)
+        return True
+    return emit
+
+
+def _emit_rlwinm(ins, block):
+    source = block.read(ins.RS)
+    dest = block.write(ins.RA)
+    if ins.SH == 0:
+        block.emit("{0} = {1} & 0x{2:x}".format(dest, source, ins.mask))
+    else:
+        block.emit("{0} = (({1} << {2}) | ({1} >> {3})) & 0x{4:x}".format(dest, source, ins.SH, 32 - ins.SH, ins.mask))
+    if ins.RC:
+        _record(block, dest)
+    return True
+
+
+def _emit_rlwnm(ins, block):
+    source = block.read(ins.RS)
+    shift = block.read(ins.RB)
+    dest = block.write(ins.RA)
+    block.emit("{0} = {1} << ({2} & 0x1F)".format(dest, source, shift))
+    block.emit("{0} = ({0} | ({0} >> 32)) & 0x{1:x}".format(dest, ins.mask))
+    if ins.RC:
+        _record(block, dest)
+    return True
+
+
+def _emit_rlwimi(ins, block):
+    source = block.read(ins.RS)
+    dest = block.read(ins.RA)
+    block.write(ins.RA)
+    block.emit("{0} = ((({1} << {2}) | ({1} >> {3})) & 0x{4:x}) | ({0} & 0x{5:x})".format(
+        dest, source, ins.SH, 32 - ins.SH, ins.mask, ins.inverted_mask))
+    if ins.RC:
+        _record(block, dest)
+    return True
+
+
+def _emit_srawi(ins, block):
+    source = block.read(ins.RS)
+    dest = block.write(ins.RA)
+    block.emit("value = {0}".format(source))
+    block.emit("{0} = (((value ^ 0x80000000) - 0x80000000) >> {1}) & 0xFFFFFFFF".format(dest, ins.SH))
+    block.emit("context.xer.CA = 1 if value & 0x80000000 and value & 0x{0:x} else 0".format(ins.shifted_out_mask))
+    if ins.RC:
+        _record(block, dest)
+    return True
+
+
+def _emit_addic(record):
+    def emit(ins, block):
+        source = block.read(ins.RA)
+        dest = block.write(ins.RT)
+        block.emit("value = {0} + 0x{1:x}".format(source, ins.SI))
+        block.emit("{0} = value & 0xFFFFFFFF".format(dest))
+        block.emit("context.xer.CA = value >> 32")
+        if record:
+            _record(block, dest)
+        return True
+    return emit
+
+
+def _emit_subfic(ins, block):
+    source = block.read(ins.RA)
+    dest = block.write(ins.RT)
+    block.emit("value = ({0} ^ 0xFFFFFFFF) + 0x{1:x}".format(source, ins.SI))
+    block.emit("{0} = value & 0xFFFFFFFF".format(dest))
+    block.emit("context.xer.CA = (value >> 32) & 1")
+    return True
+
+
+def _compare(block, BF, a, b):
+    shift = (7 - BF) * 4
+    cr = block.write_cr()
+    block.emit("{0} = ({0} & 0x{1:x}) | (0x{2:x} if {3} < {4} else 0x{5:x} if {3} == {4} else 0x{6:x})".format(
+        cr, ~(0xE << shift) & 0xFFFFFFFF, 0x8 << shift, a, b, 0x2 << shift, 0x4 << shift))
+
+
+# Signed comparisons compare values with the sign bit flipped, which orders
+# them like the signed values
+def _emit_cmp(ins, block):
+    _compare(block, ins.BF, "({0} ^ 0x80000000)".format(block.read(ins.RA)),
+             "({0} ^ 0x80000000)".format(block.read(ins.RB)))
+    return True
+
+
+def _emit_cmpi(ins, block):
+    _compare(block, ins.BF, "({0} ^ 0x80000000)".format(block.read(ins.RA)), "0x{0:x}".format(ins.SI + 0x80000000))
+    return True
+
+
+def _emit_cmpl(ins, block):
+    _compare(block, ins.BF, block.read(ins.RA), block.read(ins.RB))
+    return True
+
+
+def _emit_cmpli(ins, block):
+    _compare(block, ins.BF, block.read(ins.RA), "0x{0:x}".format(ins.UI))
+    return True
+
+
+def _effective_address(ins, block):
+    if hasattr(ins, "D"):
+        if ins.RA == 0:
+            return "0x{0:x}".format(ins.D)
+        return "({0} + 0x{1:x}) & 0xFFFFFFFF".format(block.read(ins.RA), ins.D)
+    else:
+        if ins.RA == 0:
+            return block.read(ins.RB)
+        return "({0} + {1}) & 0xFFFFFFFF".format(block.read(ins.RA), block.read(ins.RB))
+
+
+def _emit_load(function, update=False, algebraic=False):
+    def emit(ins, block):
+        ea = _effective_address(ins, block)
+        read = block.function(function)
+        block.access()
+        value = "{0}({1})".format(read, "ea" if update else ea)
+        if algebraic:
+            value = "(({0} ^ 0x8000) - 0x8000) & 0xFFFFFFFF".format(value)
+
+        if update:
+            block.emit("ea = {0}".format(ea))
+            block.emit("{0} = {1}".format(block.write(ins.RT), value))
+            block.emit("{0} = ea".format(block.write(ins.RA)))
+        else:
+            block.emit("{0} = {1}".format(block.write(ins.RT), value))
+        return True
+    return emit
+
+
+def _emit_store(function, update=False):
+    def emit(ins, block):
+        ea = _effective_address(ins, block)
+        source = block.read(ins.RS)
+        write = block.function(function)
+        block.access(store=True)
+
+        if update:
+            block.emit("ea = {0}".format(ea))
+            block.emit("{0}(ea, {1})".format(write, source))
+            block.emit("{0} = ea".format(block.write(ins.RA)))
+        else:
+            block.emit("{0}({1}, {2})".format(write, ea, source))
+        return True
+    return emit
+
+
+def _emit_lmw(ins, block):
+    ea = _effective_address(ins, block)
+    read_words = block.function("read_words")
+    block.access()
+    dests = "".join(block.write(reg) + ", " for reg in range(ins.RT, 32))
+    block.emit("{0}= {1}({2}, {3})".format(dests, read_words, ea, 32 - ins.RT))
+    return True
+
+
+def _emit_stmw(ins, block):
+    ea = _effective_address(ins, block)
+    sources = ", ".join(block.read(reg) for reg in range(ins.RT, 32))
+    write_words = block.function("write_words")
+    block.access(store=True)
+    block.emit("{0}({1}, [{2}])".format(write_words, ea, sources))
+    return True
+
+
+def _emit_mtspr(ins, block):
+    if ins.SPR == 8:
+        block.emit("context.lr = {0}".format(block.read(ins.RS)))
+    elif ins.SPR == 9:
+        source = block.read(ins.RS)
+        block.emit("{0} = {1}".format(block.write_ctr(), source))
+    else:
+        return None
+    return True
+
+
+def _emit_mfspr(ins, block):
+    if ins.SPR == 8:
+        block.emit("{0} = context.lr".format(block.write(ins.RT)))
+    elif ins.SPR == 9:
+        source = block.read_ctr()
+        block.emit("{0} = {1}".format(block.write(ins.RT), source))
+    else:
+        return None
+    return True
+
+
+emitters = {
+    AddImmediate: _emit_addi,
+    AddImmediateShifted: _emit_addis,
+    ORImmediate: _emit_logical_immediate("|", 0),
+    ORImmediateShifted: _emit_logical_immediate("|", 16),
+    XORImmediate: _emit_logical_immediate("^", 0),
+    XORImmediateShifted: _emit_logical_immediate("^", 16),
+    ANDImmediate: _emit_logical_immediate("&", 0, record=True),
+    ANDImmediateShifted: _emit_logical_immediate("&", 16, record=True),
+    OR: _emit_binary("{0} | {1}", "RA", "RS", "RB"),
+    AND: _emit_binary("{0} & {1}", "RA", "RS", "RB"),
+    XOR: _emit_binary("{0} ^ {1}", "RA", "RS", "RB"),
+    NAND: _emit_binary("({0} & {1}) ^ 0xFFFFFFFF", "RA", "RS", "RB"),
+    NOR: _emit_binary("({0} | {1}) ^ 0xFFFFFFFF", "RA", "RS", "RB"),
+    Equivalent: _emit_binary("({0} ^ {1}) ^ 0xFFFFFFFF", "RA", "RS", "RB"),
+    ANDWithComplement: _emit_binary("{0} & ({1} ^ 0xFFFFFFFF)", "RA", "RS", "RB"),
+    ORWithComplement: _emit_binary("{0} | ({1} ^ 0xFFFFFFFF)", "RA", "RS", "RB"),
+    ShiftLeftWord: _emit_binary("({0} << ({1} & 0x3F)) & 0xFFFFFFFF", "RA", "RS", "RB"),
+    ShiftRightWord: _emit_binary("{0} >> ({1} & 0x3F)", "RA", "RS", "RB"),
+    ExtendSignByte: _emit_binary("((({0} & 0xFF) ^ 0x80) - 0x80) & 0xFFFFFFFF", "RA", "RS"),
+    ExtendSignHalfword: _emit_binary("((({0} & 0xFFFF) ^ 0x8000) - 0x8000) & 0xFFFFFFFF", "RA", "RS"),
+    CountLeadingZerosWord: _emit_binary("32 - {0}.bit_length()", "RA", "RS"),
+    Add: _emit_binary("({0} + {1}) & 0xFFFFFFFF", "RT", "RA", "RB"),
+    SubtractFrom: _emit_binary("({1} - {0}) & 0xFFFFFFFF", "RT", "RA", "RB"),
+    RotateLeftWordImmediateThenANDWithMask: _emit_rlwinm,
+    RotateLeftWordThenANDWithMask: _emit_rlwnm,
+    RotateLeftWordImmediateThenMaskInsert: _emit_rlwimi,
+    ShiftRightWordAlgebraicImmediate: _emit_srawi,
+    AddImmediateCarrying: _emit_addic(False),
+    AddImmediateCarryingRecord: _emit_addic(True),
+    SubtractFromImmediateCarrying: _emit_subfic,
+    Compare: _emit_cmp,
+    CompareImmediate: _emit_cmpi,
+    CompareLogical: _emit_cmpl,
+    CompareLogicalImmediate: _emit_cmpli,
+    LoadWordZero: _emit_load("read_word"),
+    LoadWordZeroUpdate: _emit_load("read_word", update=True),
+    LoadWordIndexed: _emit_load("read_word"),
+    LoadWordUpdateIndexed: _emit_load("read_word", update=True),
+    LoadByteZero: _emit_load("read_byte"),
+    LoadByteZeroUpdate: _emit_load("read_byte", update=True),
+    LoadByteZeroIndexed: _emit_load("read_byte"),
+    LoadByteZeroUpdateIndexed: _emit_load("read_byte", update=True),
+    LoadHalfwordZero: _emit_load("read_halfword"),
+    LoadHalfwordZeroUpdate: _emit_load("read_halfword", update=True),
+    LoadHalfwordZeroIndexed: _emit_load("read_halfword"),
+    LoadHalfwordZeroUpdateIndexed: _emit_load("read_halfword", update=True),
+    LoadHalfwordAlgebraic: _emit_load("read_halfword", algebraic=True),
+    LoadHalfwordAlgebraicUpdate: _emit_load("read_halfword", update=True, algebraic=True),
+    LoadHalfwordAlgebraicIndexed: _emit_load("read_halfword", algebraic=True),
+    LoadHalfwordAlgebraicUpdateIndexed: _emit_load("read_halfword", update=True, algebraic=True),
+    StoreWord: _emit_store("write_word"),
+    StoreWordUpdate: _emit_store("write_word", update=True),
+    StoreWordIndexed: _emit_store("write_word"),
+    StoreWordUpdateIndexed: _emit_store("write_word", update=True),
+    StoreByte: _emit_store("write_byte"),
+    StoreByteUpdate: _emit_store("write_byte", update=True),
+    StoreByteIndexed: _emit_store("write_byte"),
+    StoreByteUpdateIndexed: _emit_store("write_byte", update=True),
+    StoreHalfword: _emit_store("write_halfword"),
+    StoreHalfwordUpdate: _emit_store("write_halfword", update=True),
+    StoreHalfwordIndexed: _emit_store("write_halfword"),
+    StoreHalfwordUpdateIndexed: _emit_store("write_halfword", update=True),
+    LoadMultipleWord: _emit_lmw,
+    StoreMultipleWord: _emit_stmw,
+    MoveToSPR: _emit_mtspr,
+    MoveFromSPR: _emit_mfspr
+}
+
+
+# Branch emitters return (condition, target) for the branch ending a block,
+# condition is None for unconditional branches. Links are written by the
+# translator once the target is known.
+
+def _condition(ins, block):
+    conditions = []
+    if ins.cr_mask:
+        cr = block.read_cr()
+        if ins.cr_expected:
+            conditions.append("{0} & 0x{1:x}".format(cr, ins.cr_mask))
+        else:
+            conditions.append("not {0} & 0x{1:x}".format(cr, ins.cr_mask))
+
+    if ins.decrement:
+        ctr = block.read_ctr()
+        block.write_ctr()
+        block.emit("{0} = ({0} - 1) & 0xFFFFFFFF".format(ctr))
+        conditions.append("{0} {1} 0".format(ctr, "==" if ins.ctr_zero else "!="))
+
+    if not conditions:
+        return None
+    return " and ".join("({0})".format(condition) for condition in conditions)
+
+
+def _emit_b(ins, block):
+    return None, "0x{0:x}".format(ins.target)
+
+
+def _emit_bc(ins, block):
+    return _condition(ins, block), "0x{0:x}".format(ins.target)
+
+
+def _emit_bclr(ins, block):
+    condition = _condition(ins, block)
+    if ins.LK:
+        # The link overwrites lr, read the target first
+        block.emit("target = context.lr")
+        return condition, "target"
+    return condition, "context.lr"
+
+
+branch_emitters = {
+    Branch: _emit_b,
+    BranchConditional: _emit_bc,
+    BranchConditionalToLR: _emit_bclr
+}
+
+
+def find_block(machine, address, max_length=MAX_BLOCK_LENGTH):
+    block = []
+
+    while len(block) < max_length:
+        try:
+            instruction = machine.decode(address)
+        except RuntimeError:
+            if not block:
+                raise
+            # Let the interpreter report the invalid instruction once
+            # execution actually reaches it
+            break
+
+        block.append((address, instruction))
+        address += 4
+
+        if instruction.ends_block:
+            break
+
+    return block
+
+
+# Placeholders in the block body, replaced by writing back the locals to the
+# context and by reloading them once the whole block is known
+FLUSH = object()
+RELOAD = object()
+
+
+class _BlockWriter(object):
+    # Registers used by the block are loaded into locals when it is entered and
+    # written back in a finally clause, so they also reach the context when an
+    # instruction raises. The locals always hold the current register values.
+    def __init__(self):
+        self.lines = []
+        self.used = set()
+        self.written = set()
+        self.functions = set()
+        # Address of the next instruction and whether the current
+        # instruction stores to memory
+        self.next_pc = 0
+        self.stored = False
+
+    def emit(self, line):
+        self.lines.append(line)
+
+    def read(self, reg):
+        self.used.add(reg)
+        return "r{0}".format(reg)
+
+    def write(self, reg):
+        self.used.add(reg)
+        self.written.add(reg)
+        return "r{0}".format(reg)
+
+    def read_cr(self):
+        self.used.add("cr")
+        return "cr"
+
+    def write_cr(self):
+        self.written.add("cr")
+        return self.read_cr()
+
+    def read_ctr(self):
+        self.used.add("ctr")
+        return "ctr"
+
+    def write_ctr(self):
+        self.written.add("ctr")
+        return self.read_ctr()
+
+    def function(self, name):
+        self.functions.add(name)
+        return name
+
+    def access(self, store=False):
+        # Memory accesses can raise on unmapped addresses, which is reported
+        # at the address of the next instruction like the interpreter does
+        self.emit("context.pc = 0x{0:x}".format(self.next_pc))
+        self.stored = store
+
+    def loads(self):
+        lines = []
+        for name in sorted(self.used, key=str):
+            if name == "cr":
+                lines.append("cr = context.cr.value")
+            elif name == "ctr":
+                lines.append("ctr = context.ctr")
+            else:
+                lines.append("r{0} = gpr[{0}]".format(name))
+        return lines
+
+    def stores(self):
+        lines = []
+        for name in sorted(self.written, key=str):
+            if name == "cr":
+                lines.append("context.cr.value = cr")
+            elif name == "ctr":
+                lines.append("context.ctr = ctr")
+            else:
+                lines.append("gpr[{0}] = r{0}".format(name))
+        return lines
+
+    def check_generation(self):
+        # Leave the block if the code it was built from was modified, pc
+        # is already up to date at this point
+        self.emit("if machine._generation != generation:")
+        self.emit("    return")
+
+    def body(self, indent):
+        lines = []
+        for line in self.lines:
+            if line is FLUSH:
+                expanded = self.stores()
+            elif line is RELOAD:
+                expanded = self.loads()
+            else:
+                expanded = [line]
+            lines.extend(indent + x for x in expanded)
+        return lines
+
+
+def translate_block(machine, address, max_length=MAX_BLOCK_LENGTH):
+    block = find_block(machine, address, max_length)
+    writer = _BlockWriter()
+    namespace = {}
+    # Set when the block ends in a branch back to its start, the block then
+    # loops in Python as long as the branch is taken
+    loop = False
+    modifies_code = False
+
+    for i, (pc, instruction) in enumerate(block):
+        last = i == len(block) - 1
+        writer.next_pc = pc + 4
+        writer.stored = False
+
+        branch = branch_emitters.get(instruction.__class__)
+        emitter = emitters.get(instruction.__class__)
+
+        if branch is not None:
+            condition, target = branch(instruction, writer)
+            if instruction.LK:
+                writer.emit("context.lr = 0x{0:x}".format(pc+4))
+            loop = target == "0x{0:x}".format(address)
+
+            if loop:
+                if condition is not None:
+                    writer.emit("if {0}:".format(condition))
+                    indent = "    "
+                else:
+                    indent = ""
+                # Code changes only need to be checked for before looping
+                # again if the block can modify code at all
+                if modifies_code:
+                    writer.emit(indent + "if machine._generation == generation:")
+                    writer.emit(indent + "    continue")
+                    writer.emit(indent + "context.pc = 0x{0:x}".format(address))
+                    writer.emit(indent + "return")
+                else:
+                    writer.emit(indent + "continue")
+                if condition is not None:
+                    writer.emit("context.pc = 0x{0:x}".format(pc+4))
+                writer.emit("return")
+            elif condition is None:
+                writer.emit("context.pc = {0}".format(target))
+            else:
+                writer.emit("context.pc = {0} if {1} else 0x{2:x}".format(target, condition, pc+4))
+        elif emitter is not None and emitter(instruction, writer):
+            if writer.stored:
+                modifies_code = True
+                if not last:
+                    writer.check_generation()
+        else:
+            # Fall back to the interpreter, which sees registers through the
+            # context so locals have to be written back and reloaded
+            modifies_code = True
+            namespace["i{0}".format(i)] = instruction
+            writer.emit(FLUSH)
+            writer.emit("context.pc = 0x{0:x}".format(pc+4))
+            writer.emit("i{0}.execute(machine)".format(i))
+            writer.emit(RELOAD)
+            if not last:
+                writer.check_generation()
+
+    if not block[-1][1].ends_block:
+        writer.emit("context.pc = 0x{0:x}".format(block[-1][0]+4))
+
+    name = "block_{0:x}".format(address)
+    header = ["def {0}(machine):".format(name),
+              "    context = machine.context",
+              "    gpr = context.gpr"]
+    if modifies_code:
+        header.append("    generation = machine._generation")
+    header += ["    {0} = machine.{0}".format(function) for function in sorted(writer.functions)]
+    header += ["    " + line for line in writer.loads()]
+
+    if loop:
+        body = ["    try:", "        while True:"] + writer.body(" " * 12)
+    else:
+        body = ["    try:"] + writer.body(" " * 8)
+    body += ["    finally:"] + ["        " + line for line in writer.stores() or ["pass"]]
+
+    source = "\n".join(header + body)
+
+    exec(compile(source, "<{0}>".format(name), "exec"), namespace)
+    function = namespace[name]
+    function.source = source
+    function.length = len(block)
+
+    return function
@@ -0,0 +1,44 @@
+import hashlib
+import os
+import pickle
+
+
+CACHE_VERSION = 1
+
+
+def load_cached(cls, path, suffix, build, use_cache=True):
+    # Loads an object built from the file at path, build(data) makes a new
+    # one from the file contents. Objects are cached next to the file as the
+    # pickled __dict__ and the cache is only used if it was built from a file
+    # with the same hash. Classes that need to fix up their state after
+    # loading can define __setstate__.
+    with open(path, "rb") as f:
+        data = f.read()
+
+    digest = hashlib.sha1(data).hexdigest()
+    cache_path = path + suffix
+
+    if use_cache and os.path.exists(cache_path):
+        try:
+            with open(cache_path, "rb") as f:
+                version, cached_digest, state = pickle.load(f)
+            if version == CACHE_VERSION and cached_digest == digest:
+                obj = cls.__new__(cls)
+                if hasattr(obj, "__setstate__"):
+                    obj.__setstate__(state)
+                else:
+                    obj.__dict__.update(state)
+                return obj
+        except (OSError, EOFError, ValueError, pickle.UnpicklingError):
+            pass
+
+    obj = build(data)
+
+    if use_cache:
+        try:
+            with open(cache_path, "wb") as f:
+                pickle.dump((CACHE_VERSION, digest, obj.__dict__), f, pickle.HIGHEST_PROTOCOL)
+        except OSError:
+            pass
+
+    return obj
@@ -0,0 +1,109 @@
+import multiprocessing
+import sys
+from struct import Struct
+
+from dolreader import DolFile
+from instructions.common import Instruction
+from instructions.dispatcher import parse_instruction
+
+
+WORD = Struct(">I")
+
+# Words per chunk handed to a worker by disassemble_parallel
+CHUNK_WORDS = 0x4000
+
+
+def disassemble_word(word, address=None):
+    try:
+        return str(parse_instruction(word, address))
+    except RuntimeError:
+        return ".word 0x{0:08x}".format(word)
+
+
+def disassemble_data(address, data):
+    # Yields (address, word, text) for every word in data, which is code
+    # located at address. The text of words without pc relative operands
+    # only depends on the word, it is cached for repeated words.
+    cache = {}
+
+    for i, (word, ) in enumerate(WORD.iter_unpack(data[:len(data) & ~3])):
+        pc = address + i*4
+        text = cache.get(word)
+
+        if text is None:
+            try:
+                instruction = parse_instruction(word, pc)
+            except RuntimeError:
+                text = ".word 0x{0:08x}".format(word)
+                cache[word] = text
+            else:
+                text = str(instruction)
+                if instruction.__class__.set_address is Instruction.set_address:
+                    cache[word] = text
+
+        yield pc, word, text
+
+
+def disassemble(dol, sections=None):
+    # Disassembles the text sections of a DolFile (or the given sections
+    # as (offset, address, size)), yielding (address, word, text)
+    if sections is None:
+        sections = dol.text_sections
+
+    for offset, address, size in sections:
+        with dol.view(offset, size) as view:
+            data = bytes(view)
+
+        for line in disassemble_data(address, data):
+            yield line
+
+
+def _disassemble_chunk(chunk):
+    address, data = chunk
+    return list(disassemble_data(address, data))
+
+
+def _chunks(dol, sections, chunk_words):
+    chunk_size = chunk_words * 4
+
+    for offset, address, size in sections:
+        with dol.view(offset, size) as view:
+            for start in range(0, size, chunk_size):
+                yield address + start, bytes(view[start:start+chunk_size])
+
+
+def disassemble_parallel(dol, sections=None, processes=None, chunk_words=CHUNK_WORDS):
+    # Same as disassemble, with the sections split into chunks that are
+    # disassembled by a process pool. Lines are yielded in address order.
+    if sections is None:
+        sections = dol.text_sections
+
+    with multiprocessing.Pool(processes) as pool:
+        for lines in pool.imap(_disassemble_chunk, _chunks(dol, sections, chunk_words)):
+            for line in lines:
+                yield line
+
+
+def write_disassembly(lines, f):
+    for address, word, text in lines:
+        f.write("{0:08x}: {1:08x}  {2}\n".format(address, word, text))
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print("Usage: python disassembler.py <dol file> [output file] [processes]")
+        sys.exit(1)
+
+    with open(sys.argv[1], "rb") as f:
+        dol = DolFile(f)
+
+    if len(sys.argv) > 3:
+        lines = disassemble_parallel(dol, processes=int(sys.argv[3]))
+    else:
+        lines = disassemble(dol)
+
+    if len(sys.argv) > 2:
+        with open(sys.argv[2], "w") as f:
+            write_disassembly(lines, f)
+    else:
+        write_disassembly(lines, sys.stdout)
@@ -1,5 +1,13 @@
+import mmap
 import struct 
+from bisect import bisect_right
 from io import BytesIO, RawIOBase
+from struct import Struct 
+
+try:
+    import numpy
+except ImportError:
+    numpy = None 
 
 
 def read_ubyte(f):
@@ -20,30 +28,36 @@ class UnmappedAddress(Exception):
 class SectionCountFull(Exception):
     pass
 
+# Header layout: 7 text and 11 data section file offsets, then their 
+# addresses, then their sizes 
+DOL_SECTIONS = Struct(">18I18I18I")
+DOL_BSS = Struct(">II")
+WORD = Struct(">I")
+
+
 class DolFile(object):
-    def __init__(self, f):
-        self._rawdata = BytesIO(f.read())
-        f.seek(0)
-        fileoffset = 0
-        addressoffset = 0x48
-        sizeoffset = 0x90 
+    def __init__(self, f, use_mmap=False):
+        # With use_mmap the file is mapped copy-on-write instead of read into 
+        # memory, changes are never written back to the file. 
+        if use_mmap:
+            self._rawdata = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_COPY)
+        else:
+            self._rawdata = BytesIO(f.read())
+            f.seek(0)
         
         self._text = []
         self._data = []
         
-        nomoretext = False 
-        nomoredata = False
-        
         self._current_end = None 
         
         # Read text and data section addresses and sizes 
+        with self._buffer() as buffer:
+            header = DOL_SECTIONS.unpack_from(buffer, 0)
+            self.bssaddr, self.bsssize = DOL_BSS.unpack_from(buffer, 0xD8)
+            self.entrypoint = struct.unpack_from(">I", buffer, 0xE0)[0]
+        
         for i in range(18):
-            f.seek(fileoffset+i*4)
-            offset = read_uint32(f)
-            f.seek(addressoffset+i*4)
-            address = read_uint32(f)
-            f.seek(sizeoffset+i*4)
-            size = read_uint32(f)
+            offset, address, size = header[i], header[18+i], header[36+i]
             
             if i <= 6:
                 if offset != 0:
@@ -55,35 +69,57 @@ class DolFile(object):
                     self._data.append((offset, address, size))
                     # print("data{0}".format(datanum), hex(offset), hex(address), hex(size))
         
-        f.seek(0xD8)
-        self.bssaddr = read_uint32(f)
-        self.bsssize = read_uint32(f)
-        
         #self.bss = BytesIO(self._rawdata.getbuffer()[self._bssaddr:self._bssaddr+self.bsssize])
         
+        self._build_index()
+        
         self._curraddr = self._text[0][1]
         self.seek(self._curraddr)
     
+    def _buffer(self):
+        if isinstance(self._rawdata, mmap.mmap):
+            return memoryview(self._rawdata)
+        else:
+            return self._rawdata.getbuffer()
+    
+    # Zero-copy view of file data, e.g. a section's (offset, size). The view 
+    # should be released (use it in a with statement) before writing to the 
+    # dol, the file data can't be resized while it is exported. 
+    def view(self, offset, size):
+        with self._buffer() as buffer:
+            return buffer[offset:offset+size]
+    
     @property
     def sections(self):
-        for i in self._text:
-            yield i
-        for i in self._data:
-            yield i 
+        return self._sections 
+    
+    @property
+    def text_sections(self):
+        return tuple(self._text)
+    
+    # Rebuilds the address index, needs to be called whenever sections change 
+    def _build_index(self):
+        self._sections = tuple(self._text + self._data)
         
-        return
+        # Sections sorted by address, bisected over their start addresses 
+        self._index = sorted((section for section in self._sections if section[2] > 0),
+                             key=lambda section: section[1])
+        self._index_starts = [address for offset, address, size in self._index]
+        self._last_section = None 
     
     # Internal function for resolving a gc address 
     def _resolve_address(self, gc_addr):
-        for offset, address, size in self.sections:
-            if address <= gc_addr < address+size:
-                return offset, address, size 
-        """for offset, address, size in self._text:
-            if address <= gc_addr < address+size:
-                return offset, address, size 
-        for offset, address, size in self._data:
+        # Most lookups hit the same section as the previous one 
+        last = self._last_section
+        if last is not None and last[1] <= gc_addr < last[1]+last[2]:
+            return last 
+        
+        i = bisect_right(self._index_starts, gc_addr) - 1
+        if i >= 0:
+            offset, address, size = section = self._index[i]
             if address <= gc_addr < address+size:
-                return offset, address, size """
+                self._last_section = section 
+                return section 
         
         raise UnmappedAddress("Unmapped address: {0}".format(hex(gc_addr)))
     
@@ -126,8 +162,8 @@ class DolFile(object):
         if self._curraddr + size > self._current_end:
             raise RuntimeError("Read goes over current section")
             
-        return self._rawdata.read(size)
         self._curraddr += size  
+        return self._rawdata.read(size)
         
     # Assumption: A write should not go beyond the current section 
     def write(self, data):
@@ -160,7 +196,11 @@ class DolFile(object):
         if last_addr < self.bssaddr+self.bsssize:
             last_addr = self.bssaddr+self.bsssize 
         
+        if isinstance(self._rawdata, mmap.mmap):
+            raise RuntimeError("Memory mapped dol files can't be extended with new sections")
+        
         section.append((last_offset, last_addr, newsize))
+        self._build_index()
         curr = self._rawdata.tell()
         self._rawdata.seek(last_offset)
         self._rawdata.write(b" "*newsize)
@@ -186,9 +226,248 @@ class DolFile(object):
     def tell(self):
         return self._curraddr
     
+    # Validates that size bytes starting at address lie within one section and 
+    # returns their file offset 
+    def _array_offset(self, address, size):
+        offset, gc_start, gc_size = self._resolve_address(address)
+        if address + size > gc_start + gc_size:
+            raise RuntimeError("Array at {0:x} goes over the end of its section".format(address))
+        
+        return offset + (address - gc_start)
+    
+    # Reads count consecutive structs starting at address, returns a list of 
+    # tuples. Does not change the current read position. 
+    def read_array(self, address, struct_format, count):
+        if not isinstance(struct_format, Struct):
+            struct_format = Struct(struct_format)
+        
+        size = struct_format.size * count 
+        offset = self._array_offset(address, size)
+        
+        with self.view(offset, size) as data:
+            return list(struct_format.iter_unpack(data))
+    
+    # Same as read_array but decodes into a numpy array of the given (e.g. 
+    # structured, big endian) dtype 
+    def read_array_numpy(self, address, dtype, count):
+        if numpy is None:
+            raise RuntimeError("read_array_numpy requires numpy")
+        
+        dtype = numpy.dtype(dtype)
+        size = dtype.itemsize * count 
+        offset = self._array_offset(address, size)
+        
+        with self.view(offset, size) as data:
+            return numpy.frombuffer(data, dtype, count).copy()
+    
+    # Searches, vectorized with numpy and plain loops without it. Word 
+    # searches default to the text sections, byte searches to all sections. 
+    # sections are (offset, address, size) like in DolFile.sections. 
+    
+    def _section_arrays(self, sections, dtype):
+        itemsize = numpy.dtype(dtype).itemsize 
+        for offset, address, size in sections:
+            size -= size % itemsize 
+            if size <= 0:
+                continue 
+            with self.view(offset, size) as data:
+                yield address, numpy.frombuffer(data, dtype).astype(numpy.int64)
+    
+    # Fallback for _section_arrays, items are lists of words or bytes 
+    def _section_lists(self, sections, itemsize):
+        for offset, address, size in sections:
+            size -= size % itemsize 
+            if size <= 0:
+                continue 
+            with self.view(offset, size) as data:
+                if itemsize == 4:
+                    yield address, [word for word, in WORD.iter_unpack(data)]
+                else:
+                    yield address, list(data)
+    
+    # Addresses of the b/bl (and with conditional, bc) instructions branching 
+    # to target 
+    def find_branch_xrefs(self, target, conditional=True, sections=None):
+        if sections is None:
+            sections = self._text 
+        if numpy is None:
+            return self._find_branch_xrefs_lists(target, conditional, sections)
+        
+        result = []
+        for address, words in self._section_arrays(sections, ">u4"):
+            primary = words >> 26
+            absolute = (words & 2) != 0
+            pcs = address + numpy.arange(len(words), dtype=numpy.int64) * 4
+            
+            offset = words & 0x03FFFFFC
+            offset -= (offset & 0x02000000) << 1
+            targets = numpy.where(absolute, offset, pcs + offset) & 0xFFFFFFFF
+            matches = (primary == 18) & (targets == target)
+            
+            if conditional:
+                offset = words & 0xFFFC
+                offset -= (offset & 0x8000) << 1
+                targets = numpy.where(absolute, offset, pcs + offset) & 0xFFFFFFFF
+                matches |= (primary == 16) & (targets == target)
+            
+            result.extend(pcs[matches].tolist())
+        
+        return result 
+    
+    def _find_branch_xrefs_lists(self, target, conditional, sections):
+        result = []
+        for address, words in self._section_lists(sections, 4):
+            for i, word in enumerate(words):
+                primary = word >> 26
+                if primary == 18:
+                    offset = word & 0x03FFFFFC
+                    offset -= (offset & 0x02000000) << 1
+                elif primary == 16 and conditional:
+                    offset = word & 0xFFFC
+                    offset -= (offset & 0x8000) << 1
+                else:
+                    continue 
+                
+                pc = address + i*4
+                if not word & 2:
+                    offset += pc 
+                if offset & 0xFFFFFFFF == target:
+                    result.append(pc)
+        
+        return result 
+    
+    # Finds addresses built with lis followed by addi, ori or a load/store 
+    # using the lis register as base within the next window instructions. 
+    # Returns (lis address, user address) pairs for target. 
+    def find_address_references(self, target, window=1, sections=None):
+        if sections is None:
+            sections = self._text 
+        if numpy is None:
+            return self._find_address_references_lists(target, window, sections)
+        
+        result = []
+        for address, words in self._section_arrays(sections, ">u4"):
+            primary = words >> 26
+            lis = (primary == 15) & (((words >> 16) & 0x1F) == 0)
+            lis_reg = (words >> 21) & 0x1F
+            high = (words & 0xFFFF) << 16
+            
+            low = words & 0xFFFF
+            signed_low = low - ((low & 0x8000) << 1)
+            source = (words >> 16) & 0x1F
+            # addi and D-form loads/stores add a signed offset to RA, ori ORs 
+            # an unsigned one into RS 
+            adds = (primary == 14) | ((primary >= 32) & (primary <= 55))
+            ors = primary == 24
+            
+            for distance in range(1, window + 1):
+                count = len(words) - distance 
+                if count <= 0:
+                    break 
+                
+                user_reg = numpy.where(ors, (words >> 21) & 0x1F, source)[distance:]
+                values = numpy.where(ors[distance:], 
+                                     high[:count] | low[distance:], 
+                                     high[:count] + signed_low[distance:]) & 0xFFFFFFFF
+                
+                # RA = 0 in addi and loads/stores means 0, not r0 
+                matches = (lis[:count] & (adds | ors)[distance:] 
+                           & (user_reg == lis_reg[:count]) & (values == target)
+                           & (ors[distance:] | (user_reg != 0)))
+                
+                for i in numpy.flatnonzero(matches).tolist():
+                    result.append((address + i*4, address + (i+distance)*4))
+        
+        result.sort()
+        return result 
+    
+    def _find_address_references_lists(self, target, window, sections):
+        result = []
+        for address, words in self._section_lists(sections, 4):
+            for i, word in enumerate(words):
+                if word >> 26 != 15 or (word >> 16) & 0x1F != 0:
+                    continue 
+                
+                lis_reg = (word >> 21) & 0x1F
+                high = (word & 0xFFFF) << 16
+                
+                for distance, user in enumerate(words[i+1:i+1+window], 1):
+                    primary = user >> 26
+                    low = user & 0xFFFF
+                    if primary == 24:
+                        if (user >> 21) & 0x1F != lis_reg:
+                            continue 
+                        value = high | low 
+                    elif primary == 14 or 32 <= primary <= 55:
+                        if (user >> 16) & 0x1F != lis_reg or lis_reg == 0:
+                            continue 
+                        value = (high + low - ((low & 0x8000) << 1)) & 0xFFFFFFFF
+                    else:
+                        continue 
+                    
+                    if value == target:
+                        result.append((address + i*4, address + (i+distance)*4))
+        
+        result.sort()
+        return result 
+    
+    # Addresses at which the signature matches, the signature being a 
+    # sequence of (value, mask) words. A mask of 0 matches any word. 
+    def find_words(self, signature, sections=None):
+        if sections is None:
+            sections = self._text 
+        
+        return self._find_masked(signature, sections, ">u4", 4)
+    
+    # Addresses at which the bytes match, mask is an optional sequence of 
+    # byte masks of the same length 
+    def find_bytes(self, pattern, mask=None, sections=None):
+        if sections is None:
+            sections = self._sections 
+        if mask is None:
+            mask = [0xFF] * len(pattern)
+        
+        return self._find_masked(list(zip(pattern, mask)), sections, "u1", 1)
+    
+    def _find_masked(self, signature, sections, dtype, itemsize):
+        if numpy is None:
+            return self._find_masked_lists(signature, sections, itemsize)
+        
+        result = []
+        
+        for address, items in self._section_arrays(sections, dtype):
+            count = len(items) - len(signature) + 1
+            if count <= 0:
+                continue 
+            
+            matches = numpy.ones(count, dtype=bool)
+            for i, (value, mask) in enumerate(signature):
+                if mask:
+                    matches &= (items[i:i+count] & mask) == (value & mask)
+            
+            result.extend((address + numpy.flatnonzero(matches) * itemsize).tolist())
+        
+        return result 
+    
+    def _find_masked_lists(self, signature, sections, itemsize):
+        length = len(signature)
+        checks = [(i, value & mask, mask) for i, (value, mask) in enumerate(signature) if mask]
+        result = []
+        
+        for address, items in self._section_lists(sections, itemsize):
+            for start in range(len(items) - length + 1):
+                for i, value, mask in checks:
+                    if items[start+i] & mask != value:
+                        break 
+                else:
+                    result.append(address + start*itemsize)
+        
+        return result 
+    
     def save(self, f):
         self._adjust_header()
-        f.write(self._rawdata.getbuffer())
+        with self._buffer() as buffer:
+            f.write(buffer)
     
     
     def print_info(self):
@@ -207,31 +486,17 @@ class DolFile(object):
                                                                             self.bssaddr+ self.bsssize))
         
 if __name__ == "__main__":
-    symbols = {}
-
-    with open("GM4E01.map", "r") as f:
-        for line in f:
-            line = line.strip()
-            split =  line.split(" ", 4)
-            if len(split) < 5: 
-                continue 
-            _, _, address, _, symbol = split
-            symbols[int(address, 16)] = symbol 
+    from symbolmap import SymbolMap
 
+    symbols = SymbolMap.load("GM4E01.map")
 
     with open("mkddus.dol", "rb") as f:
         dol = DolFile(f)
     
-    dol.seek(0x803532e8)
     out = {}
     #with open("mkddobjects.txt", "w") as f: 
-    for i in range(160):#0x84+100):
-        print(i)
-        objectid = read_ushort(dol)
-        print(hex(objectid))
-        assert dol.read(2) == b"\x00\x00"
-        pointer = read_uint32(dol)
-        assert dol.read(4) == b"\x00\x00\x00\x00"
+    for objectid, padding, pointer, padding2 in dol.read_array(0x803532e8, ">HHII", 160):
+        assert padding == 0 and padding2 == 0
         sym = symbols[pointer]
         start = sym.find("<")
         end = sym.find(">")
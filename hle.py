@@ -0,0 +1,181 @@
+from instructions.common import Instruction
+
+
+# High level emulation: guest functions replaced by Python functions. A hook
+# gets the machine, reads its arguments from r3 and up, and returns the value
+# for r3 (or None to leave r3 alone). Execution then continues at lr.
+
+class HookInstruction(Instruction):
+    # Stands in for the instruction at a hooked address in the decode cache
+    __slots__ = ("function", "name")
+    ends_block = True
+
+    def __init__(self, function, name=None):
+        self.function = function
+        self.name = name
+
+    def execute(self, machine):
+        result = self.function(machine)
+        context = machine.context
+
+        if result is not None:
+            context.gpr[3] = result & 0xFFFFFFFF
+        context.pc = context.lr
+
+    def __str__(self):
+        return "hle {0}".format(self.name or getattr(self.function, "__name__", "?"))
+
+
+def hle_memcpy(machine):
+    dst, src, size = machine.context.gpr[3:6]
+    if size:
+        machine.copy_within(dst, src, size)
+    return dst
+
+
+def hle_memset(machine):
+    dst, value, size = machine.context.gpr[3:6]
+    if size:
+        machine.fill(dst, value, size)
+    return dst
+
+
+def hle_strlen(machine):
+    return len(machine.read_string(machine.context.gpr[3]))
+
+
+def hle_strcpy(machine):
+    dst, src = machine.context.gpr[3:5]
+    machine.write_data(dst, machine.read_string(src) + b"\x00")
+    return dst
+
+
+def hle_strcmp(machine):
+    a = machine.read_string(machine.context.gpr[3]) + b"\x00"
+    b = machine.read_string(machine.context.gpr[4]) + b"\x00"
+
+    for x, y in zip(a, b):
+        if x != y:
+            return x - y
+
+    return 0
+
+
+# Built-in replacements keyed by symbol name. copy_within copies the source
+# out first so memcpy also covers overlapping moves.
+BUILTINS = {
+    "memcpy": hle_memcpy,
+    "memmove": hle_memcpy,
+    "memset": hle_memset,
+    "strlen": hle_strlen,
+    "strcpy": hle_strcpy,
+    "strcmp": hle_strcmp
+}
+
+# Signatures of the stock SDK runtime versions of built-in functions, for
+# finding them in dols without symbols. Branch displacements are masked out.
+SIGNATURES = {
+    "memcpy": (
+        (0x7C041840, 0xFFFFFFFF),  # cmplw r4, r3
+        (0x41800000, 0xFFFF0003),  # blt
+        (0x3884FFFF, 0xFFFFFFFF),  # subi r4, r4, 1
+        (0x38C3FFFF, 0xFFFFFFFF),  # subi r6, r3, 1
+        (0x38A50001, 0xFFFFFFFF),  # addi r5, r5, 1
+        (0x48000000, 0xFC000003),  # b
+        (0x8C040001, 0xFFFFFFFF),  # lbzu r0, 1(r4)
+        (0x9C060001, 0xFFFFFFFF),  # stbu r0, 1(r6)
+        (0x34A5FFFF, 0xFFFFFFFF),  # subic. r5, r5, 1
+        (0x40820000, 0xFFFF0003),  # bne
+        (0x4E800020, 0xFFFFFFFF),  # blr
+        (0x7C842A14, 0xFFFFFFFF),  # add r4, r4, r5
+        (0x7CC32A14, 0xFFFFFFFF),  # add r6, r3, r5
+        (0x38A50001, 0xFFFFFFFF),  # addi r5, r5, 1
+        (0x48000000, 0xFC000003),  # b
+        (0x8C04FFFF, 0xFFFFFFFF),  # lbzu r0, -1(r4)
+        (0x9C06FFFF, 0xFFFFFFFF),  # stbu r0, -1(r6)
+        (0x34A5FFFF, 0xFFFFFFFF),  # subic. r5, r5, 1
+        (0x40820000, 0xFFFF0003),  # bne
+        (0x4E800020, 0xFFFFFFFF)   # blr
+    ),
+    "memset": (
+        (0x9421FFF0, 0xFFFFFFFF),  # stwu r1, -0x10(r1)
+        (0x7C0802A6, 0xFFFFFFFF),  # mflr r0
+        (0x90010014, 0xFFFFFFFF),  # stw r0, 0x14(r1)
+        (0x93E1000C, 0xFFFFFFFF),  # stw r31, 0xc(r1)
+        (0x7C7F1B78, 0xFFFFFFFF),  # mr r31, r3
+        (0x48000001, 0xFC000003),  # bl __fill_mem
+        (0x80010014, 0xFFFFFFFF),  # lwz r0, 0x14(r1)
+        (0x7FE3FB78, 0xFFFFFFFF),  # mr r3, r31
+        (0x83E1000C, 0xFFFFFFFF),  # lwz r31, 0xc(r1)
+        (0x7C0803A6, 0xFFFFFFFF),  # mtlr r0
+        (0x38210010, 0xFFFFFFFF),  # addi r1, r1, 0x10
+        (0x4E800020, 0xFFFFFFFF)   # blr
+    ),
+    "strlen": (
+        (0x3883FFFF, 0xFFFFFFFF),  # subi r4, r3, 1
+        (0x3860FFFF, 0xFFFFFFFF),  # li r3, -1
+        (0x8C040001, 0xFFFFFFFF),  # lbzu r0, 1(r4)
+        (0x38630001, 0xFFFFFFFF),  # addi r3, r3, 1
+        (0x2C000000, 0xFFFFFFFF),  # cmpwi r0, 0
+        (0x40820000, 0xFFFF0003),  # bne
+        (0x4E800020, 0xFFFFFFFF)   # blr
+    )
+}
+
+
+def match_signature(words, signature):
+    # Returns the indices at which a signature matches in a sequence of
+    # instruction words. A signature is a sequence of (value, mask) pairs,
+    # a mask of 0 matches any word.
+    first_value, first_mask = signature[0]
+    length = len(signature)
+    matches = []
+
+    for i in range(len(words) - length + 1):
+        if words[i] & first_mask != first_value:
+            continue
+
+        for j in range(1, length):
+            value, mask = signature[j]
+            if words[i+j] & mask != value:
+                break
+        else:
+            matches.append(i)
+
+    return matches
+
+
+def find_hle_functions(machine, symbols=None, signatures=SIGNATURES, ranges=(), builtins=BUILTINS):
+    # Finds the addresses of functions with a built-in replacement, by name
+    # in a SymbolMap and by matching signatures (name -> (value, mask) pairs)
+    # against the code in ranges of (start address, size). Signatures without
+    # a built-in of the same name are skipped. Returns a dict of address -> name.
+    found = {}
+
+    if symbols is not None:
+        for name in builtins:
+            address = symbols.find(name)
+            if address is not None:
+                found[address] = name
+
+    if signatures:
+        for start, size in ranges:
+            words = machine.read_words(start, size // 4)
+
+            for name, signature in signatures.items():
+                if name not in builtins:
+                    continue
+                for i in match_signature(words, signature):
+                    found.setdefault(start + i*4, name)
+
+    return found
+
+
+def apply_hle(machine, symbols=None, signatures=SIGNATURES, ranges=(), builtins=BUILTINS):
+    # Hooks every built-in function that can be found, returns address -> name
+    found = find_hle_functions(machine, symbols, signatures, ranges, builtins)
+
+    for address, name in found.items():
+        machine.add_hook(address, builtins[name], name)
+
+    return found
@@ -2,74 +2,110 @@ from .common import *
 
 
 class Branch(Instruction):
+    __slots__ = ("opcode", "target_addr", "AA", "LK", "target")
+    ends_block = True
+    
     def __init__(self, val):
         self.opcode, self.target_addr, self.AA, self.LK = parse_iform(val)
         self.target_addr = (sign_extend_24bit(self.target_addr) * 4) & 0xFFFFFFFF
         
-    def execute(self, machine):
-        pc = machine.context.pc 
-        
         if self.AA:
-            # Absolute address 
-            machine.goto(self.target_addr)
+            self.target = self.target_addr 
         else:
-            # Relative address 
-            machine.goto(add_32bit(pc-4, self.target_addr))
+            # Resolved once the address of the instruction is known 
+            self.target = None 
+    
+    def set_address(self, address):
+        if not self.AA:
+            self.target = add_32bit(address, self.target_addr)
+        
+    def execute(self, machine):
+        context = machine.context 
+        pc = context.pc 
+        target = self.target 
+        
+        if target is None:
+            target = add_32bit(pc-4, self.target_addr)
         
         if self.LK:
-            # Update LR register
-            machine.context.lr = pc+4
+            # Update LR register with the address of the next instruction
+            context.lr = pc 
+        
+        context.pc = target 
     
     def __str__(self):
         opcodes = [["b", "bl"], ["ba", "bla"]]
 
-        return "{0} {1}".format(opcodes[self.AA][self.LK], self.target_addr)
+        if self.target is not None:
+            return "{0} 0x{1:x}".format(opcodes[self.AA][self.LK], self.target)
+        else:
+            return "{0} {1}".format(opcodes[self.AA][self.LK], to_python_int(self.target_addr))
+        
+
+# BO field bits, BO0 being the most significant 
+BO0 = 0b10000 # Ignore the condition bit 
+BO1 = 0b01000 # Condition bit value to branch on 
+BO2 = 0b00100 # Don't decrement counter 
+BO3 = 0b00010 # Branch if counter is zero (instead of not zero) 
+BO4 = 0b00001 # Branch prediction hint 
+
+
+class BranchConditionBase(Instruction):
+    # Branch condition shared by the conditional branches, decoded from BO 
+    # and BI once. The CR bit selected by BI is tested with a mask and the 
+    # expected result, a mask of 0 always passes. 
+    __slots__ = ("BO", "BI", "cr_mask", "cr_expected", "decrement", "ctr_zero")
+    
+    def _setup_condition(self):
+        if self.BO & BO0:
+            self.cr_mask = 0
+            self.cr_expected = 0
+        else:
+            self.cr_mask = 1 << (31 - self.BI)
+            self.cr_expected = self.cr_mask if self.BO & BO1 else 0
         
+        self.decrement = not self.BO & BO2 
+        self.ctr_zero = bool(self.BO & BO3)
 
-BO0 = 0b00001
-BO1 = 0b00010
-BO2 = 0b00100 # Decrement counter 
-BO3 = 0b01000
-BO4 = 0b10000
 
-class BranchConditional(Instruction):
+class BranchConditional(BranchConditionBase):
+    __slots__ = ("opcode", "target_addr", "AA", "LK", "target")
+    ends_block = True
+    
     def __init__(self, val):
         self.opcode, self.BO, self.BI, self.target_addr, self.AA, self.LK = parse_bform(val)
         self.target_addr = to_python_int(sign_extend_14bit(self.target_addr))*4
+        self._setup_condition()
+        
+        if self.AA:
+            self.target = self.target_addr & 0xFFFFFFFF
+        else:
+            # Resolved once the address of the instruction is known 
+            self.target = None 
+    
+    def set_address(self, address):
+        if not self.AA:
+            self.target = add_32bit(address, self.target_addr)
     
     def execute(self, machine):
-        pc = machine.context.pc 
-        creg = (self.BI // 4)
-        crbit = self.BI % 4
-        #print(creg, crbit, (machine.context.cr[creg] >> (3-crbit)) & 1)
-        #print(self.BO & BO4, self.BO & BO3, self.BO & BO2, self.BO & BO1, self.BO & BO0)
+        context = machine.context 
+        pc = context.pc 
         
-        decrement_ctr = not self.BO & BO2 
-        branch_on_zero = 0
-        
-        if not self.BO & BO2: # decrement counter
+        taken = context.cr.value & self.cr_mask == self.cr_expected 
+        if self.decrement:
             machine.decrement_ctr()
+            taken = taken and (context.ctr == 0) == self.ctr_zero 
         
-        cr_bit = (machine.context.cr[creg] >> (3-crbit)) & 1
-        
-        ctr_ok = (self.BO & BO2) | ((machine.context.ctr != 0) ^ (self.BO & BO3))
-        cond_ok = (self.BO & BO0) | ((self.BO & BO1) == cr_bit)
-        
-        
-        if cond_ok and ctr_ok:
-            if self.AA:
-                # Absolute address 
-                target = self.target_addr 
-            else:
-                # Relative address 
+        if taken:
+            target = self.target 
+            if target is None:
                 target = add_32bit(pc-4, self.target_addr)
             
-            print("yes we did jump")
-            machine.goto(target)
+            context.pc = target 
         
         if self.LK:
-            # Update LR register
-            machine.context.lr = pc+4
+            # Update LR register with the address of the next instruction
+            context.lr = pc
     
     def __str__(self):
         instruction = "bc"
@@ -78,42 +114,36 @@ class BranchConditional(Instruction):
         if self.AA:
             instruction += "a"
         
-        return "{0} {1}, {2}, {3}".format(instruction, self.BO, self.BI, self.target_addr)
+        if self.target is not None:
+            return "{0} {1}, {2}, 0x{3:x}".format(instruction, self.BO, self.BI, self.target)
+        else:
+            return "{0} {1}, {2}, {3}".format(instruction, self.BO, self.BI, self.target_addr)
         
         
-class BranchConditionalToLR(Instruction):
+class BranchConditionalToLR(BranchConditionBase):
+    __slots__ = ("opcode", "BH", "opcode2", "LK")
+    ends_block = True
+    
     def __init__(self, val):
         self.opcode, self.BO, self.BI, self.BH, self.opcode2, self.LK = parse_bform(val)
         self.BH = self.BH & 0b11
+        self._setup_condition()
     
     def execute(self, machine):
-        pc = machine.context.pc 
-        creg = (self.BI // 4)
-        crbit = self.BI % 4
-        #print(creg, crbit, (machine.context.cr[creg] >> (3-crbit)) & 1)
-        #print(self.BO & BO4, self.BO & BO3, self.BO & BO2, self.BO & BO1, self.BO & BO0)
+        context = machine.context 
+        pc = context.pc 
         
-        decrement_ctr = not self.BO & BO2 
-        branch_on_zero = 0
-        
-        if not self.BO & BO2: # decrement counter
+        taken = context.cr.value & self.cr_mask == self.cr_expected 
+        if self.decrement:
             machine.decrement_ctr()
+            taken = taken and (context.ctr == 0) == self.ctr_zero 
         
-        cr_bit = (machine.context.cr[creg] >> (3-crbit)) & 1
-        
-        ctr_ok = (self.BO & BO2) | ((machine.context.ctr != 0) ^ (self.BO & BO3))
-        cond_ok = (self.BO & BO0) | ((self.BO & BO1) == cr_bit)
-        
-        
-        if cond_ok and ctr_ok:
-            target = machine.context.lr
-            
-
-            machine.goto(target)
+        if taken:
+            context.pc = context.lr 
         
         if self.LK:
-            # Update LR register
-            machine.context.lr = pc+4
+            # Update LR register with the address of the next instruction
+            context.lr = pc
     
     def __str__(self):
         instruction = "bclr"
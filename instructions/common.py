@@ -4,103 +4,105 @@ def validate(assertion):
 
 
 def get_bits(val, start, end):
-    size = end-start + 1
-    return (val >> (31-end)) & (2**size -1)
+    return (val >> (31-end)) & ((1 << (end-start+1)) - 1)
 
 
 def get_bit(val, pos):
     return (val >> (31-pos)) & 1 
 
 
+# The parse functions below extract fields with constant shifts and masks, 
+# bit numbering follows the PowerPC manuals (bit 0 is the most significant bit)
+
 def parse_iform(val):
-    opcode = get_bits(val, 0, 5)
-    li = get_bits(val, 6, 29)
-    aa = get_bit(val, 30)
-    lk = get_bit(val, 30)
+    opcode = val >> 26
+    li = (val >> 2) & 0xFFFFFF
+    aa = (val >> 1) & 1
+    lk = val & 1
     
     return opcode, li, aa, lk 
 
 
 def parse_bform(val):
-    opcode = get_bits(val, 0, 5)
-    bo = get_bits(val, 6, 10)
-    bi = get_bits(val, 11, 15)
-    bd = get_bits(val, 16, 29)
-    aa = get_bit(val, 30)
-    lk = get_bit(val, 31)
+    opcode = val >> 26
+    bo = (val >> 21) & 0x1F
+    bi = (val >> 16) & 0x1F
+    bd = (val >> 2) & 0x3FFF
+    aa = (val >> 1) & 1
+    lk = val & 1
     
     return opcode, bo, bi, bd, aa, lk
     
     
 def parse_dform(val):
-    opcode = get_bits(val, 0, 5)
-    a = get_bits(val, 6, 10)
-    b = get_bits(val, 11, 15)
-    c = get_bits(val, 16, 31)
+    opcode = val >> 26
+    a = (val >> 21) & 0x1F
+    b = (val >> 16) & 0x1F
+    c = val & 0xFFFF
     
     return opcode, a, b, c 
 
 
 def parse_dsform(val):
-    opcode = get_bits(val, 0, 5)
-    a = get_bits(val, 6, 10)
-    b = get_bits(val, 11, 15)
-    c = get_bits(val, 16, 29)
-    xo = get_bits(val, 30, 31)
+    opcode = val >> 26
+    a = (val >> 21) & 0x1F
+    b = (val >> 16) & 0x1F
+    c = (val >> 2) & 0x3FFF
+    xo = val & 0b11
     
     return opcode, a, b, c, xo 
     
 
 def parse_xform(val):
-    opcode = get_bits(val, 0, 5)
-    a = get_bits(val, 6, 10)
-    b = get_bits(val, 11, 15)
-    c = get_bits(val, 16, 20)
-    xo = get_bits(val, 21, 30)
-    rc = get_bit(val, 31)
+    opcode = val >> 26
+    a = (val >> 21) & 0x1F
+    b = (val >> 16) & 0x1F
+    c = (val >> 11) & 0x1F
+    xo = (val >> 1) & 0x3FF
+    rc = val & 1
     
     return opcode, a, b, c, xo, rc 
 
 
 def parse_xoform(val):
-    opcode = get_bits(val, 0, 5)
-    a = get_bits(val, 6, 10)
-    b = get_bits(val, 11, 15)
-    c = get_bits(val, 16, 20)
-    oe = get_bit(val, 21)
-    xo = get_bits(val, 22, 30)
-    rc = get_bit(val, 31)
+    opcode = val >> 26
+    a = (val >> 21) & 0x1F
+    b = (val >> 16) & 0x1F
+    c = (val >> 11) & 0x1F
+    oe = (val >> 10) & 1
+    xo = (val >> 1) & 0x1FF
+    rc = val & 1
     
     return opcode, a, b, c, oe, xo, rc 
     
     
 def parse_xfxform(val):
-    opcode = get_bits(val, 0, 5)
-    rt = get_bits(val, 6, 10)
-    spr = get_bits(val, 11, 20)
-    xo = get_bits(val, 21, 30)
+    opcode = val >> 26
+    rt = (val >> 21) & 0x1F
+    spr = (val >> 11) & 0x3FF
+    xo = (val >> 1) & 0x3FF
     
     return opcode, rt, spr, xo 
     
     
 def parse_xflform(val):
-    opcode = get_bits(val, 0, 5)
-    flm = get_bits(val, 7, 14)
-    frb = get_bits(val, 16, 20)
-    xo = get_bits(val, 21, 30)
-    rc = get_bit(val, 31)
+    opcode = val >> 26
+    flm = (val >> 17) & 0xFF
+    frb = (val >> 11) & 0x1F
+    xo = (val >> 1) & 0x3FF
+    rc = val & 1
     
     return opcode, flm, frb, xo, rc
     
 
 def parse_mform(val):
-    opcode = get_bits(val, 0, 5)
-    rs = get_bits(val, 6, 10)
-    ra = get_bits(val, 11, 15)
-    rb = get_bits(val, 16, 20)
-    mb = get_bits(val, 21, 25)
-    me = get_bits(val, 26, 30)
-    rc = get_bit(val, 31)
+    opcode = val >> 26
+    rs = (val >> 21) & 0x1F
+    ra = (val >> 16) & 0x1F
+    rb = (val >> 11) & 0x1F
+    mb = (val >> 6) & 0x1F
+    me = (val >> 1) & 0x1F
+    rc = val & 1
     
     return opcode, rs, ra, rb, mb, me, rc
     
@@ -125,6 +127,15 @@ def sign_extend_24bit(val):
         return val 
 
 
+def base_mask(ra):
+    # Mask applied to the value of RA in instructions where RA being 0 means 
+    # a base of 0 instead of r0, lets them skip checking RA when executing 
+    if ra == 0:
+        return 0
+    else:
+        return 0xFFFFFFFF
+
+
 def add_32bit(val1, val2):
     return (val1 + val2) & 0xFFFFFFFF
 
@@ -157,4 +168,12 @@ def negate(val):
 
 
 class Instruction(object):
-    pass
\ No newline at end of file
+    __slots__ = ()
+    
+    # Set on instructions that can change the program counter 
+    ends_block = False
+    
+    # Called with the address an instruction was decoded from, instructions 
+    # with pc relative operands override this to precompute them 
+    def set_address(self, address):
+        pass
\ No newline at end of file
@@ -1,19 +1,18 @@
 from .common import *
 
 class CompareImmediate(Instruction):
+    __slots__ = ("opcode", "BF", "RA", "SI")
+
     def __init__(self, val):
         self.opcode, self.BF, self.RA, self.SI = parse_dform(val)
-        self.SI = sign_extend_short(self.SI)
+        # Signed comparison, keep the immediate as a python int
+        self.SI = to_python_int(sign_extend_short(self.SI))
         self.BF = self.BF >> 2
         
     def execute(self, machine):
-        gpr = machine.context.gpr 
-        assert self.BF < 8
-        
-        machine.context.cr.compare(self.BF, to_python_int(gpr[self.RA]), to_python_int(self.SI))
+        machine.context.cr.compare(self.BF, to_python_int(machine.context.gpr[self.RA]), self.SI)
     
     def __str__(self):
-        SI = to_python_int(self.SI)
         if self.BF > 0:
             return "cmpwi cr{0}, r{1}, {2}".format(self.BF, self.RA, self.SI)
         else:
@@ -21,38 +20,35 @@ class CompareImmediate(Instruction):
 
 
 class CompareLogicalImmediate(Instruction):
+    __slots__ = ("opcode", "BF", "RA", "UI")
+
     def __init__(self, val):
-        self.opcode, self.BF, self.RA, self.SI = parse_dform(val)
-        self.SI = sign_extend_short(self.SI)
+        self.opcode, self.BF, self.RA, self.UI = parse_dform(val)
         self.BF = self.BF >> 2
         
     def execute(self, machine):
-        gpr = machine.context.gpr 
-        assert self.BF < 8
-        
-        machine.context.cr.compare(self.BF, gpr[self.RA], self.SI)
+        machine.context.cr.compare(self.BF, machine.context.gpr[self.RA], self.UI)
     
     def __str__(self):
-        SI = to_python_int(self.SI)
         if self.BF > 0:
-            return "cmplwi cr{0}, r{1}, {2}".format(self.BF, self.RA, self.SI)
+            return "cmplwi cr{0}, r{1}, {2}".format(self.BF, self.RA, self.UI)
         else:
-            return "cmplwi r{1}, {2}".format(self.BF, self.RA, self.SI)
+            return "cmplwi r{1}, {2}".format(self.BF, self.RA, self.UI)
 
 
 class Compare(Instruction):
+    __slots__ = ("opcode", "BF", "RA", "RB", "opcode2")
+
     def __init__(self, val):
         self.opcode, self.BF, self.RA, self.RB, self.opcode2, _ = parse_xform(val)
         self.BF = self.BF >> 2
         
     def execute(self, machine):
         gpr = machine.context.gpr 
-        assert self.BF < 8
         
         machine.context.cr.compare(self.BF, to_python_int(gpr[self.RA]), to_python_int(gpr[self.RB]))
     
     def __str__(self):
-        SI = to_python_int(self.SI)
         if self.BF > 0:
             return "cmpw cr{0}, r{1}, r{2}".format(self.BF, self.RA, self.RB)
         else:
@@ -60,19 +56,19 @@ class Compare(Instruction):
             
 
 class CompareLogical(Instruction):
+    __slots__ = ("opcode", "BF", "RA", "RB", "opcode2")
+
     def __init__(self, val):
         self.opcode, self.BF, self.RA, self.RB, self.opcode2, _ = parse_xform(val)
         self.BF = self.BF >> 2
         
     def execute(self, machine):
         gpr = machine.context.gpr 
-        assert self.BF < 8
         
         machine.context.cr.compare(self.BF, gpr[self.RA], gpr[self.RB])
     
     def __str__(self):
-        SI = to_python_int(self.SI)
         if self.BF > 0:
-            return "cmpw cr{0}, r{1}, r{2}".format(self.BF, self.RA, self.RB)
+            return "cmplw cr{0}, r{1}, r{2}".format(self.BF, self.RA, self.RB)
         else:
-            return "cmpw r{1}, r{2}".format(self.BF, self.RA, self.RB)
\ No newline at end of file
+            return "cmplw r{1}, r{2}".format(self.BF, self.RA, self.RB)
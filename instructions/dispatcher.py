@@ -15,6 +15,9 @@ instructions = {
 15: AddImmediateShifted,
 16: BranchConditional,
 18: Branch,
+20: RotateLeftWordImmediateThenMaskInsert,
+21: RotateLeftWordImmediateThenANDWithMask,
+23: RotateLeftWordThenANDWithMask,
 24: ORImmediate,
 25: ORImmediateShifted,
 26: XORImmediate,
@@ -34,26 +37,47 @@ instructions = {
 42: LoadHalfwordAlgebraic,
 43: LoadHalfwordAlgebraicUpdate,
 44: StoreHalfword,
-45: StoreHalfwordUpdate
+45: StoreHalfwordUpdate,
+46: LoadMultipleWord,
+47: StoreMultipleWord
 }
 
 instructions_x = {
     0: Compare,
     19: MoveFromCR,
+    23: LoadWordIndexed,
+    24: ShiftLeftWord,
     26: CountLeadingZerosWord,
     28: AND,
+    32: CompareLogical,
+    55: LoadWordUpdateIndexed,
     60: ANDWithComplement,
+    87: LoadByteZeroIndexed,
+    119: LoadByteZeroUpdateIndexed,
     124: NOR,
     
     144: MoveToCRFields,
+    151: StoreWordIndexed,
+    183: StoreWordUpdateIndexed,
+    215: StoreByteIndexed,
+    247: StoreByteUpdateIndexed,
+    279: LoadHalfwordZeroIndexed,
     284: Equivalent,
+    311: LoadHalfwordZeroUpdateIndexed,
     316: XOR,
     
     339: MoveFromSPR,
+    343: LoadHalfwordAlgebraicIndexed,
+    375: LoadHalfwordAlgebraicUpdateIndexed,
+    407: StoreHalfwordIndexed,
     412: ORWithComplement,
+    439: StoreHalfwordUpdateIndexed,
     444: OR,
     467: MoveToSPR,
     476: NAND,
+    536: ShiftRightWord,
+    792: ShiftRightWordAlgebraic,
+    824: ShiftRightWordAlgebraicImmediate,
     922: ExtendSignHalfword,
     954: ExtendSignByte,
     
@@ -68,46 +92,51 @@ instructions_xl = {
     16: BranchConditionalToLR
 }
 
-def parse_instruction(val):
-    opcode = get_bits(val, 0, 5)
+# Flat decode tables built from the dictionaries above. decode_table is indexed 
+# by the primary opcode, opcodes 19 and 31 point to a second table indexed by 
+# the 10 bit extended opcode (bits 21-30). XO form opcodes only use 9 bits, 
+# the OE bit (bit 21) is part of the index so they occupy two slots. 
    
-    if opcode in instructions:
-        # Do Main Instructions
-        instruction = instructions[opcode](val)
-    elif opcode == 19:
-        opcode2 = get_bits(val, 21, 30)
-        if opcode2 in instructions_xl:
-            instruction = instructions_xl[opcode2](val)
-        else:
-            raise RuntimeError("Unknown opcode2 xl {0}".format(opcode2))
+def _build_extended_table(*forms):
+    table = [None] * 1024
         
-    elif opcode == 31:
-        opcode2 = get_bits(val, 21, 30)
+    for form, oe_bit in forms:
+        for opcode2, instruction in form.items():
+            table[opcode2] = instruction
+            if oe_bit:
+                table[opcode2 | 0x200] = instruction 
         
-        if opcode2 in instructions_x:
-            # Do X Form Instructions 
-            instruction = instructions_x[opcode2](val)
-        else:
-            opcode2 = get_bits(val, 22, 30)
+    return table 
             
-            if opcode2 in instructions_xo:
-                # do XO Form Instructions
-                instruction = instructions_xo[opcode2](val)
-            else:
-                raise RuntimeError("Unknown opcode2 {0} or {1}".format( get_bits(val, 21, 30), get_bits(val, 22, 30)))
-    else:
-        raise RuntimeError("Unknown opcode {0}".format(opcode))
 
-    return instruction
-
-"""
-def parse_x_family(val):
-    opcode = get_bits(val, 0, 5)
-    assert opcode == 31 
+def _build_decode_table():
+    table = [None] * 64
     
-    opcode2 = get_bits(22, 30)
+    for opcode, instruction in instructions.items():
+        table[opcode] = instruction 
     
-    if opcode2 in instructions_xo:"""
-        
+    table[19] = _build_extended_table((instructions_xl, False))
+    table[31] = _build_extended_table((instructions_xo, True), (instructions_x, False))
+    
+    return table 
+
+
+decode_table = _build_decode_table()
+
+
+def parse_instruction(val, address=None):
+    entry = decode_table[val >> 26]
     
+    if entry.__class__ is list:
+        entry = entry[(val >> 1) & 0x3FF]
+        if entry is None:
+            raise RuntimeError("Unknown opcode {0} with extended opcode {1}".format(
+                val >> 26, (val >> 1) & 0x3FF))
+    elif entry is None:
+        raise RuntimeError("Unknown opcode {0}".format(val >> 26))
     
+    instruction = entry(val)
+    if address is not None:
+        instruction.set_address(address)
+
+    return instruction
@@ -2,17 +2,16 @@ from .common import *
 
 
 class AddImmediate(Instruction):
+    __slots__ = ("opcode", "RT", "RA", "SI", "RA_mask")
+
     def __init__(self, val):
         self.opcode, self.RT, self.RA, self.SI = parse_dform(val)
         self.SI = sign_extend_short(self.SI)
+        self.RA_mask = base_mask(self.RA)
     
     def execute(self, machine):
         gpr = machine.context.gpr 
-        
-        if self.RA == 0:
-            gpr[self.RT] = self.SI 
-        else:
-            gpr[self.RT] = add_32bit(gpr[self.RA], self.SI)
+        gpr[self.RT] = ((gpr[self.RA] & self.RA_mask) + self.SI) & 0xFFFFFFFF
     
     def __str__(self):
         SI = to_python_int(self.SI)
@@ -26,24 +25,24 @@ class AddImmediate(Instruction):
 
 
 class AddImmediateShifted(Instruction):
+    __slots__ = ("opcode", "RT", "RA", "SI", "value", "RA_mask")
+
     def __init__(self, val):
         self.opcode, self.RT, self.RA, self.SI = parse_dform(val)
         self.SI = sign_extend_short(self.SI)
+        # Immediate shifted into the upper halfword
+        self.value = (self.SI << 16) & 0xFFFFFFFF
+        self.RA_mask = base_mask(self.RA)
     
     def execute(self, machine):
         gpr = machine.context.gpr 
-        SI = (self.SI << 16) & 0xFFFFFFFF
-        
-        if self.RA == 0:
-            gpr[self.RT] = SI 
-        else:
-            gpr[self.RT] = add_32bit(gpr[self.RA], SI)
+        gpr[self.RT] = ((gpr[self.RA] & self.RA_mask) + self.value) & 0xFFFFFFFF
     
     def __str__(self):
         SI = to_python_int(self.SI)
         
         if self.RA == 0:
-            return "lis r{0}, {1}".format(self.RT, self.SI)
+            return "lis r{0}, 0x{1:x}".format(self.RT, self.SI & 0xFFFF)
         elif SI < 0:
             return "subis r{0}, r{1}, {2}".format(self.RT, self.RA, -SI)
         else:
@@ -51,19 +50,21 @@ class AddImmediateShifted(Instruction):
 
 
 class Add(Instruction):
+    __slots__ = ("opcode", "RT", "RA", "RB", "OE", "opcode2", "RC")
+
     def __init__(self, val):
         self.opcode, self.RT, self.RA, self.RB, self.OE, self.opcode2, self.RC = parse_xoform(val)
     
     def execute(self, machine):
         gpr = machine.context.gpr 
         
-        gpr[self.RT], ovhappened = add_32bit_overflow(gpr[self.RA], gpr[self.RB])
+        gpr[self.RT] = (gpr[self.RA] + gpr[self.RB]) & 0xFFFFFFFF
         
         if self.OE:
             raise RuntimeError("Overflow not supported yet")
         
         if self.RC == 1:
-            machine.context.cr.compare(0, to_python_int(gpr[self.RT]), 0)
+            machine.context.cr.compare_cr0(gpr[self.RT])
         
     def __str__(self):
         instruction = "add"
@@ -76,19 +77,21 @@ class Add(Instruction):
 
 
 class SubtractFrom(Instruction):
+    __slots__ = ("opcode", "RT", "RA", "RB", "OE", "opcode2", "RC")
+
     def __init__(self, val):
         self.opcode, self.RT, self.RA, self.RB, self.OE, self.opcode2, self.RC = parse_xoform(val)
     
     def execute(self, machine):
         gpr = machine.context.gpr 
         
-        gpr[self.RT], ovhappened = add_32bit_overflow(negate(gpr[self.RA]), gpr[self.RB])
+        gpr[self.RT] = (gpr[self.RB] - gpr[self.RA]) & 0xFFFFFFFF
         
         if self.OE:
             raise RuntimeError("Overflow not supported yet")
         
         if self.RC == 1:
-            machine.context.cr.compare(0, to_python_int(gpr[self.RT]), 0)
+            machine.context.cr.compare_cr0(gpr[self.RT])
         
     def __str__(self):
         instruction = "sub"
@@ -100,28 +103,29 @@ class SubtractFrom(Instruction):
         return "{0} r{1}, r{3}, r{2}".format(instruction, self.RT, self.RA, self.RB)
 
 class SubtractFromImmediateCarrying(Instruction):
+    __slots__ = ("opcode", "RT", "RA", "SI")
+
     def __init__(self, val):
         self.opcode, self.RT, self.RA, self.SI = parse_dform(val)
-        self.SI = sign_extend_short(self.SI)
-    
+        # ~RA + SI + 1, the + 1 is folded into the immediate
+        self.SI = sign_extend_short(self.SI) + 1
+
     def execute(self, machine):
-        gpr = machine.context.gpr 
-        
-        gpr[self.RT], ov = add_32bit_overflow(negate(gpr[self.RA]), self.SI)
-        
-        if ov:
-            machine.xer.CA = 1
-        else:
-            machine.xer.CA = 0
-        
-        
+        gpr = machine.context.gpr
+
+        result = (gpr[self.RA] ^ 0xFFFFFFFF) + self.SI
+        gpr[self.RT] = result & 0xFFFFFFFF
+        machine.context.xer.CA = (result >> 32) & 1
+
     def __str__(self):
-        SI = to_python_int(self.SI)
-        
+        SI = to_python_int(self.SI - 1)
+
         return "subfic r{0}, r{1}, {2}".format(self.RT, self.RA, SI)
-        
-        
+
+
 class AddImmediateCarrying(Instruction):
+    __slots__ = ("opcode", "RT", "RA", "SI")
+
     def __init__(self, val):
         self.opcode, self.RT, self.RA, self.SI = parse_dform(val)
         self.SI = sign_extend_short(self.SI)
@@ -129,11 +133,9 @@ class AddImmediateCarrying(Instruction):
     def execute(self, machine):
         gpr = machine.context.gpr 
         
-        gpr[self.RT], ov = add_32bit_overflow(gpr[self.RA], self.SI)
-        if ov:
-            machine.context.xer.CA = 1
-        else:
-            machine.context.xer.CA = 0
+        result = gpr[self.RA] + self.SI
+        gpr[self.RT] = result & 0xFFFFFFFF
+        machine.context.xer.CA = result >> 32
     
     def __str__(self):
         SI = to_python_int(self.SI)
@@ -142,6 +144,8 @@ class AddImmediateCarrying(Instruction):
         
 
 class AddImmediateCarryingRecord(Instruction):
+    __slots__ = ("opcode", "RT", "RA", "SI")
+
     def __init__(self, val):
         self.opcode, self.RT, self.RA, self.SI = parse_dform(val)
         self.SI = sign_extend_short(self.SI)
@@ -149,13 +153,11 @@ class AddImmediateCarryingRecord(Instruction):
     def execute(self, machine):
         gpr = machine.context.gpr 
         
-        gpr[self.RT], ov = add_32bit_overflow(gpr[self.RA], self.SI)
-        if ov:
-            machine.context.xer.CA = 1
-        else:
-            machine.context.xer.CA = 0
+        result = gpr[self.RA] + self.SI
+        gpr[self.RT] = result & 0xFFFFFFFF
+        machine.context.xer.CA = result >> 32
         
-        machine.context.cr.compare(0, to_python_int(gpr[self.RT]), 0)
+        machine.context.cr.compare_cr0(gpr[self.RT])
     
     def __str__(self):
         SI = to_python_int(self.SI)
@@ -2,157 +2,173 @@ from .common import *
 # Base classes 
 
 class LoadValueZero(Instruction):
+    # With RA being 0 the base address is 0 instead of r0, RA_mask is set 
+    # up at decode time to clear the base in that case 
+    __slots__ = ("opcode", "RT", "RA", "D", "RA_mask")
+
     def __init__(self, val):
         self.opcode, self.RT, self.RA, self.D = parse_dform(val)
         self.D = sign_extend_short(self.D)
+        self.RA_mask = base_mask(self.RA)
         
     def _get_ea(self, machine):
-        gpr = machine.context.gpr
-        
-        if self.RA == 0:
-            b = 0 
-        else:
-            b = gpr[self.RA] 
-        
-        EA = add_32bit(b, self.D)
-        
-        return EA 
+        return ((machine.context.gpr[self.RA] & self.RA_mask) + self.D) & 0xFFFFFFFF
 
 
 class LoadValueZeroIndexed(Instruction):
+    __slots__ = ("opcode", "RT", "RA", "RB", "subopcode", "RA_mask")
+
     def __init__(self, val):
         self.opcode, self.RT, self.RA, self.RB, self.subopcode, _ = parse_xform(val)
+        self.RA_mask = base_mask(self.RA)
         
     def _get_ea(self, machine):
         gpr = machine.context.gpr
         
-        if self.RA == 0:
-            b = 0 
-        else:
-            b = gpr[self.RA] 
-        
-        EA = add_32bit(b + gpr[self.RB])
-        
-        return EA 
+        return ((gpr[self.RA] & self.RA_mask) + gpr[self.RB]) & 0xFFFFFFFF
 
 
 class StoreValue(LoadValueZero):
+    __slots__ = ("RS", )
+
     def __init__(self, val):
         self.opcode, self.RS, self.RA, self.D = parse_dform(val)
         self.D = sign_extend_short(self.D)
+        self.RA_mask = base_mask(self.RA)
         
 # Store Value Indexed 
-class StoreValueIndexed(Instruction):
+class StoreValueIndexed(LoadValueZeroIndexed):
+    __slots__ = ("RS", )
+
     def __init__(self, val):
         self.opcode, self.RS, self.RA, self.RB, self.subopcode, _ = parse_xform(val)
+        self.RA_mask = base_mask(self.RA)
 
 
 class StoreValueUpdate(StoreValue):
+    __slots__ = ()
+
     def __init__(self, val):
         super().__init__(val)
         validate(self.RA != 0)
         
         
-class StoreValueUpdateIndexed(LoadValueZeroIndexed):
+class StoreValueUpdateIndexed(StoreValueIndexed):
+    __slots__ = ()
+
     def __init__(self, val):
         super().__init__(val)   
+        validate(self.RA != 0)
 
 # Actual implementation
 
 class LoadByteZero(LoadValueZero):
+    __slots__ = ()
+
     def execute(self, machine):
         EA = self._get_ea(machine)
-        machine.context.gpr[self.rt] = machine.read_byte(EA)
+        machine.context.gpr[self.RT] = machine.read_byte(EA)
     
     def __str__(self):
-        return "lbz r{0}, {1}(r{2})".format(self.RT, self.D, self.RA)
+        return "lbz r{0}, {1}(r{2})".format(self.RT, to_python_int(self.D), self.RA)
 
 
 class LoadHalfwordZero(LoadValueZero):
+    __slots__ = ()
+
     def execute(self, machine):
         EA = self._get_ea(machine)
         machine.context.gpr[self.RT] = machine.read_halfword(EA)
-        self.context.gpr[self.RA] = EA 
     
     def __str__(self):
-        return "lhz r{0}, {1}(r{2})".format(self.RT, self.D, self.RA)
+        return "lhz r{0}, {1}(r{2})".format(self.RT, to_python_int(self.D), self.RA)
+
+class LoadHalfwordAlgebraic(LoadValueZero):
+    __slots__ = ()
 
-class LoadHalfwordAlgebraic(LoadByteZero):
     def execute(self, machine):
-        gpr = machine.context.gpr
-        EA = add_32bit(gpr[self.RA] + self.D)
-        
-        gpr[self.rt] = sign_extend_short(machine.read_halfword(EA))
+        EA = self._get_ea(machine)
+        machine.context.gpr[self.RT] = sign_extend_short(machine.read_halfword(EA))
     
     def __str__(self):
-        return "lha r{0}, {1}(r{2})".format(self.RT, self.D, self.RA)
+        return "lha r{0}, {1}(r{2})".format(self.RT, to_python_int(self.D), self.RA)
 
 
 class LoadWordZero(LoadValueZero):
+    __slots__ = ()
+
     def execute(self, machine):
         EA = self._get_ea(machine)
         machine.context.gpr[self.RT] = machine.read_word(EA) 
     
     def __str__(self):
-        return "lwz r{0}, {1}(r{2})".format(self.RT, self.D, self.RA)
+        return "lwz r{0}, {1}(r{2})".format(self.RT, to_python_int(self.D), self.RA)
 
 
-class LoadByteZeroUpdate(LoadValueZero):
-    def execute(self, machine):
-        gpr = machine.context.gpr
-        EA = add_32bit(gpr[self.RA], self.D)
+class LoadValueZeroUpdate(LoadValueZero):
+    __slots__ = ()
         
-        machine.context.gpr[self.RT] = machine.read_byte(EA)
-        machine.context.gpr[self.RA] = EA 
-    
-    def __str__(self):
-        return "lbzu r{0}, {1}(r{2})".format(self.RT, self.D, self.RA)
-
-
-class LoadHalfwordZeroUpdate(LoadValueZero):
     def __init__(self, val):
         super().__init__(val)
         validate(self.RA != 0 and self.RA != self.RT)
         
+
+class LoadByteZeroUpdate(LoadValueZeroUpdate):
+    __slots__ = ()
+
     def execute(self, machine):
         gpr = machine.context.gpr
-        EA = add_32bit(gpr[self.RA] + self.D)
+        EA = (gpr[self.RA] + self.D) & 0xFFFFFFFF
         
-        machine.context.gpr[self.RT] = machine.read_halfword(EA)
-        self.context.gpr[self.RA] = EA 
+        gpr[self.RT] = machine.read_byte(EA)
+        gpr[self.RA] = EA
     
     def __str__(self):
-        return "lhzu r{0}, {1}(r{2})".format(self.RT, self.D, self.RA)
+        return "lbzu r{0}, {1}(r{2})".format(self.RT, to_python_int(self.D), self.RA)
 
 
+class LoadHalfwordZeroUpdate(LoadValueZeroUpdate):
+    __slots__ = ()
 
-class LoadHalfwordAlgebraicUpdate(LoadByteZero):
-    def __init__(self, val):
-        super().__init__(val)
-        validate(self.RA != 0 and self.RA != self.RT) 
+    def execute(self, machine):
+        gpr = machine.context.gpr
+        EA = (gpr[self.RA] + self.D) & 0xFFFFFFFF
+
+        gpr[self.RT] = machine.read_halfword(EA)
+        gpr[self.RA] = EA
+
+    def __str__(self):
+        return "lhzu r{0}, {1}(r{2})".format(self.RT, to_python_int(self.D), self.RA)
+
+
+
+class LoadHalfwordAlgebraicUpdate(LoadValueZeroUpdate):
+    __slots__ = ()
         
     def execute(self, machine):
         gpr = machine.context.gpr
-        EA = add_32bit(gpr[self.RA] + self.D)
+        EA = (gpr[self.RA] + self.D) & 0xFFFFFFFF
         
-        gpr[self.rt] = sign_extend_short(machine.read_halfword(EA))
-        self.context.gpr[self.RA] = EA
+        gpr[self.RT] = sign_extend_short(machine.read_halfword(EA))
+        gpr[self.RA] = EA
         
     def __str__(self):
-        return "lhau r{0}, {1}(r{2})".format(self.RT, self.D, self.RA)
+        return "lhau r{0}, {1}(r{2})".format(self.RT, to_python_int(self.D), self.RA)
 
 
 
-class LoadWordZeroUpdate(LoadValueZero):
+class LoadWordZeroUpdate(LoadValueZeroUpdate):
+    __slots__ = ()
+
     def execute(self, machine):
         gpr = machine.context.gpr
-        EA = add_32bit(gpr[self.RA] + self.D)
+        EA = (gpr[self.RA] + self.D) & 0xFFFFFFFF
         
         gpr[self.RT] = machine.read_word(EA)
         gpr[self.RA] = EA 
     
     def __str__(self):
-        return "lwzu r{0}, {1}(r{2})".format(self.RT, self.D, self.RA)
+        return "lwzu r{0}, {1}(r{2})".format(self.RT, to_python_int(self.D), self.RA)
 
 
 ####################
@@ -160,6 +176,8 @@ class LoadWordZeroUpdate(LoadValueZero):
 
 # Byte Indexed
 class LoadByteZeroIndexed(LoadValueZeroIndexed):
+    __slots__ = ()
+
     def execute(self, machine):
         EA = self._get_ea(machine)
         machine.context.gpr[self.RT] = machine.read_byte(EA)
@@ -170,6 +188,8 @@ class LoadByteZeroIndexed(LoadValueZeroIndexed):
 
 # Halfword Indexed
 class LoadHalfwordZeroIndexed(LoadValueZeroIndexed):
+    __slots__ = ()
+
     def execute(self, machine):
         EA = self._get_ea(machine)
         machine.context.gpr[self.RT] = machine.read_halfword(EA)
@@ -179,9 +199,11 @@ class LoadHalfwordZeroIndexed(LoadValueZeroIndexed):
 
 
 class LoadHalfwordAlgebraicIndexed(LoadValueZeroIndexed):
+    __slots__ = ()
+
     def execute(self, machine):
         EA = self._get_ea(machine)
-        machine.context.gpr[self.RT] = sign_extend_short(machine.readhalfword(EA))
+        machine.context.gpr[self.RT] = sign_extend_short(machine.read_halfword(EA))
 
     def __str__(self):
         return "lhax r{0}, r{1}, r{2}".format(self.RT, self.RA, self.RB)
@@ -189,23 +211,31 @@ class LoadHalfwordAlgebraicIndexed(LoadValueZeroIndexed):
     
 # Word Indexed
 class LoadWordIndexed(LoadValueZeroIndexed):
+    __slots__ = ()
+
     def execute(self, machine):
-        gpr = machine.context.gpr
-        
-        EA = add_32bit(gpr[self.RA], gpr[self.RB])
-        gpr[self.RT] = machine.read_word(EA)
-        gpr[self.RA] = EA 
+        EA = self._get_ea(machine)
+        machine.context.gpr[self.RT] = machine.read_word(EA)
         
     def __str__(self):
         return "lwzx r{0}, r{1}, r{2}".format(self.RT, self.RA, self.RB)
 
 
+class LoadValueZeroUpdateIndexed(LoadValueZeroIndexed):
+    __slots__ = ()
+
+    def __init__(self, val):
+        super().__init__(val)
+        validate(self.RA != 0 and self.RA != self.RT)
+
+
+class LoadByteZeroUpdateIndexed(LoadValueZeroUpdateIndexed):
+    __slots__ = ()
 
-class LoadByteZeroUpdateIndexed(LoadValueZeroIndexed):
     def execute(self, machine):
         gpr = machine.context.gpr
         
-        EA = add_32bit(gpr[self.RA] + gpr[self.RB])
+        EA = (gpr[self.RA] + gpr[self.RB]) & 0xFFFFFFFF
         gpr[self.RT] = machine.read_byte(EA)
         gpr[self.RA] = EA 
         
@@ -213,11 +243,13 @@ class LoadByteZeroUpdateIndexed(LoadValueZeroIndexed):
         return "lbzux r{0}, r{1}, r{2}".format(self.RT, self.RA, self.RB)
 
     
-class LoadHalfwordZeroUpdateIndexed(LoadValueZeroIndexed):
+class LoadHalfwordZeroUpdateIndexed(LoadValueZeroUpdateIndexed):
+    __slots__ = ()
+
     def execute(self, machine):
         gpr = machine.context.gpr
         
-        EA = add_32bit(gpr[self.RA] + gpr[self.RB])
+        EA = (gpr[self.RA] + gpr[self.RB]) & 0xFFFFFFFF
         gpr[self.RT] = machine.read_halfword(EA)
         gpr[self.RA] = EA 
         
@@ -225,11 +257,13 @@ class LoadHalfwordZeroUpdateIndexed(LoadValueZeroIndexed):
         return "lhzux r{0}, r{1}, r{2}".format(self.RT, self.RA, self.RB)
 
     
-class LoadHalfwordAlgebraicUpdateIndexed(LoadValueZeroIndexed):
+class LoadHalfwordAlgebraicUpdateIndexed(LoadValueZeroUpdateIndexed):
+    __slots__ = ()
+
     def execute(self, machine):
         gpr = machine.context.gpr
         
-        EA = add_32bit(gpr[self.RA] + gpr[self.RB])
+        EA = (gpr[self.RA] + gpr[self.RB]) & 0xFFFFFFFF
         gpr[self.RT] = sign_extend_short(machine.read_halfword(EA))
         gpr[self.RA] = EA 
         
@@ -237,11 +271,13 @@ class LoadHalfwordAlgebraicUpdateIndexed(LoadValueZeroIndexed):
         return "lhaux r{0}, r{1}, r{2}".format(self.RT, self.RA, self.RB)
 
 
-class LoadWordUpdateIndexed(LoadValueZeroIndexed):
+class LoadWordUpdateIndexed(LoadValueZeroUpdateIndexed):
+    __slots__ = ()
+
     def execute(self, machine):
         gpr = machine.context.gpr
         
-        EA = add_32bit(gpr[self.RA], gpr[self.RB])
+        EA = (gpr[self.RA] + gpr[self.RB]) & 0xFFFFFFFF
         gpr[self.RT] = machine.read_word(EA)
         gpr[self.RA] = EA 
         
@@ -252,121 +288,123 @@ class LoadWordUpdateIndexed(LoadValueZeroIndexed):
 # Store Value Direct 
 
 class StoreByte(StoreValue):
+    __slots__ = ()
+
     def execute(self, machine):
         EA = self._get_ea(machine)
-        machine.write_byte(EA, machine.gpr[self.RS])
+        machine.write_byte(EA, machine.context.gpr[self.RS])
     
     def __str__(self):
-        return "stb r{0}, {1}(r{2})".format(self.RS, self.D, self.RA)
+        return "stb r{0}, {1}(r{2})".format(self.RS, to_python_int(self.D), self.RA)
 
 
 class StoreHalfword(StoreValue):
+    __slots__ = ()
+
     def execute(self, machine):
         EA = self._get_ea(machine)
-        machine.write_halfword(EA, machine.gpr[self.RS])
+        machine.write_halfword(EA, machine.context.gpr[self.RS])
     
     def __str__(self):
-        return "sth r{0}, {1}(r{2})".format(self.RS, self.D, self.RA)
+        return "sth r{0}, {1}(r{2})".format(self.RS, to_python_int(self.D), self.RA)
 
 
 class StoreWord(StoreValue):
+    __slots__ = ()
+
     def execute(self, machine):
         EA = self._get_ea(machine)
         machine.write_word(EA, machine.context.gpr[self.RS])
         
     def __str__(self):
-        return "stw r{0}, {1}(r{2})".format(self.RS, self.D, self.RA)
+        return "stw r{0}, {1}(r{2})".format(self.RS, to_python_int(self.D), self.RA)
 
 
 # Store Value + Update variants
 class StoreByteUpdate(StoreValueUpdate):
+    __slots__ = ()
+
     def execute(self, machine):
         gpr = machine.context.gpr
         
-        EA = add_32bit(gpr[self.RA], self.D)
+        EA = (gpr[self.RA] + self.D) & 0xFFFFFFFF
         machine.write_byte(EA, gpr[self.RS])
         gpr[self.RA] = EA
     
     def __str__(self):
-        return "stbu r{0}, {1}(r{2})".format(self.RS, self.D, self.RA)
+        return "stbu r{0}, {1}(r{2})".format(self.RS, to_python_int(self.D), self.RA)
 
 
 class StoreHalfwordUpdate(StoreValueUpdate):
+    __slots__ = ()
+
     def execute(self, machine):
         gpr = machine.context.gpr
         
-        EA = add_32bit(gpr[self.RA], self.D)
+        EA = (gpr[self.RA] + self.D) & 0xFFFFFFFF
         machine.write_halfword(EA, gpr[self.RS])
         gpr[self.RA] = EA
     
     def __str__(self):
-        return "sthu r{0}, {1}(r{2})".format(self.RS, self.D, self.RA)
+        return "sthu r{0}, {1}(r{2})".format(self.RS, to_python_int(self.D), self.RA)
 
 
 class StoreWordUpdate(StoreValueUpdate):
+    __slots__ = ()
+
     def execute(self, machine):
         gpr = machine.context.gpr
         
-        EA = add_32bit(gpr[self.RA], self.D)
+        EA = (gpr[self.RA] + self.D) & 0xFFFFFFFF
         machine.write_word(EA, gpr[self.RS])
         gpr[self.RA] = EA
         
     def __str__(self):
-        return "stwu r{0}, {1}(r{2})".format(self.RS, self.D, self.RA)
+        return "stwu r{0}, {1}(r{2})".format(self.RS, to_python_int(self.D), self.RA)
         
         
 
 
 class StoreByteIndexed(StoreValueIndexed):
+    __slots__ = ()
+
     def execute(self, machine):
-        gpr = machine.context.gpr
-        if self.RA == 0:
-            b = 0
-        else:
-            b = gpr[self.RA] 
-            
-        EA = add_32bit(b, gpr[self.RB])
-        machine.write_byte(EA, gpr[self.RS])
+        EA = self._get_ea(machine)
+        machine.write_byte(EA, machine.context.gpr[self.RS])
     
     def __str__(self):
         return "stbx r{0}, r{1}, r{2}".format(self.RS, self.RA, self.RB)
         
         
 class StoreHalfwordIndexed(StoreValueIndexed):
+    __slots__ = ()
+
     def execute(self, machine):
-        gpr = machine.context.gpr
-        if self.RA == 0:
-            b = 0
-        else:
-            b = gpr[self.RA] 
-            
-        EA = add_32bit(b, gpr[self.RB])
-        machine.write_halfword(EA, gpr[self.RS])
+        EA = self._get_ea(machine)
+        machine.write_halfword(EA, machine.context.gpr[self.RS])
     
     def __str__(self):
         return "sthx r{0}, r{1}, r{2}".format(self.RS, self.RA, self.RB)
         
         
 class StoreWordIndexed(StoreValueIndexed):
+    __slots__ = ()
+
     def execute(self, machine):
-        gpr = machine.context.gpr
-        if self.RA == 0:
-            b = 0
-        else:
-            b = gpr[self.RA] 
-            
-        EA = add_32bit(b, gpr[self.RB])
-        machine.write_word(EA, gpr[self.RS])
+        EA = self._get_ea(machine)
+        machine.write_word(EA, machine.context.gpr[self.RS])
     
     def __str__(self):
         return "stwx r{0}, r{1}, r{2}".format(self.RS, self.RA, self.RB)
         
 # Store value zero indexed with update
-class StoreByteUpdateIndexed(StoreValueIndexed):
+class StoreByteUpdateIndexed(StoreValueUpdateIndexed):
+    __slots__ = ()
+
     def execute(self, machine):
         gpr = machine.context.gpr
         
-        EA = add_32bit(gpr[self.RA], gpr[self.RB])
+        EA = (gpr[self.RA] + gpr[self.RB]) & 0xFFFFFFFF
         machine.write_byte(EA, gpr[self.RS])
         gpr[self.RA] = EA 
     
@@ -374,11 +412,13 @@ class StoreByteUpdateIndexed(StoreValueIndexed):
         return "stbux r{0}, r{1}, r{2}".format(self.RS, self.RA, self.RB)
 
 
-class StoreHalfwordUpdateIndexed(StoreValueIndexed):
+class StoreHalfwordUpdateIndexed(StoreValueUpdateIndexed):
+    __slots__ = ()
+
     def execute(self, machine):
         gpr = machine.context.gpr
         
-        EA = add_32bit(gpr[self.RA], gpr[self.RB])
+        EA = (gpr[self.RA] + gpr[self.RB]) & 0xFFFFFFFF
         machine.write_halfword(EA, gpr[self.RS])
         gpr[self.RA] = EA 
     
@@ -386,11 +426,13 @@ class StoreHalfwordUpdateIndexed(StoreValueIndexed):
         return "sthux r{0}, r{1}, r{2}".format(self.RS, self.RA, self.RB)
 
 
-class StoreWordUpdateIndexed(StoreValueIndexed):
+class StoreWordUpdateIndexed(StoreValueUpdateIndexed):
+    __slots__ = ()
+
     def execute(self, machine):
         gpr = machine.context.gpr
         
-        EA = add_32bit(gpr[self.RA], gpr[self.RB])
+        EA = (gpr[self.RA] + gpr[self.RB]) & 0xFFFFFFFF
         machine.write_word(EA, gpr[self.RS])
         gpr[self.RA] = EA 
     
@@ -400,39 +442,29 @@ class StoreWordUpdateIndexed(StoreValueIndexed):
 
 
 class LoadMultipleWord(LoadValueZero):
+    __slots__ = ()
+
     def __init__(self, val):
         super().__init__(val)
         validate(self.RA < self.RT)
         
     def execute(self, machine):
         EA = self._get_ea(machine)
-        gpr = machine.context.gpr 
-        
-        r = self.RT 
-        
-        while r <= 31:
-            gpr[r] = machine.read_word(EA)
-            r += 1 
-            EA += 4 
+        machine.context.gpr[self.RT:] = machine.read_words(EA, 32 - self.RT)
     
     def __str__(self):
-        return "lmw r{0}, {1}({2})".format(self.RT, self.D, self.RA)
+        return "lmw r{0}, {1}(r{2})".format(self.RT, to_python_int(self.D), self.RA)
         
         
 class StoreMultipleWord(LoadValueZero):
+    __slots__ = ()
+
     def execute(self, machine):
         EA = self._get_ea(machine)
-        gpr = machine.context.gpr 
-        
-        r = self.RT 
-        
-        while r <= 31:
-            machine.write_word(EA, gpr[r])
-            r += 1 
-            EA += 4 
+        machine.write_words(EA, machine.context.gpr[self.RT:])
     
     def __str__(self):
-        return "stmw r{0}, {1}({2})".format(self.RT, self.D, self.RA)
+        return "stmw r{0}, {1}(r{2})".format(self.RT, to_python_int(self.D), self.RA)
 
 if __name__ == "__main__":
     lbz = LoadByteZero(0x80a400d8)
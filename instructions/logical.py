@@ -2,42 +2,53 @@ from .common import *
 
 
 class ORImmediate(Instruction):
+    __slots__ = ("opcode", "RS", "RA", "UI")
+
     def __init__(self, val):
         self.opcode, self.RS, self.RA, self.UI = parse_dform(val)
         
     def execute(self, machine):
         gpr = machine.context.gpr 
-        gpr[self.RA] = (gpr[self.RS] | self.UI ) & 0xFFFFFFFF
+        gpr[self.RA] = gpr[self.RS] | self.UI
         
     def __str__(self):
-        if self.RS == self.RA == self.UI:
+        if self.RS == self.RA == self.UI == 0:
             return "nop"
         else:
-            return "ori r{0}, r{1}, {2}".format(dot, self.RA, self.RS, self.UI)
+            return "ori r{0}, r{1}, 0x{2:x}".format(self.RA, self.RS, self.UI)
 
 
 class ORImmediateShifted(Instruction):
+    __slots__ = ("opcode", "RS", "RA", "UI", "value")
+
     def __init__(self, val):
         self.opcode, self.RS, self.RA, self.UI = parse_dform(val)
+        self.value = self.UI << 16
         
     def execute(self, machine):
         gpr = machine.context.gpr 
-        gpr[self.RA] = (gpr[self.RS] | (self.UI << 16) ) & 0xFFFFFFFF
+        gpr[self.RA] = gpr[self.RS] | self.value
         
     def __str__(self):
-        return "oris r{0}, r{1}, {2}".format(dot, self.RA, self.RS, self.UI)
+        return "oris r{0}, r{1}, 0x{2:x}".format(self.RA, self.RS, self.UI)
             
 
-class OR(Instruction):
+class LogicalOperation(Instruction):
+    __slots__ = ("opcode", "RS", "RA", "RB", "opcode2", "RC")
+
     def __init__(self, val):
         self.opcode, self.RS, self.RA, self.RB, self.opcode2, self.RC = parse_xform(val)
         
+
+class OR(LogicalOperation):
+    __slots__ = ()
+
     def execute(self, machine):
         gpr = machine.context.gpr 
-        gpr[self.RA] = (gpr[self.RS] | gpr[self.RB]) & 0xFFFFFFFF
+        gpr[self.RA] = gpr[self.RS] | gpr[self.RB]
         
         if self.RC:
-            machine.context.cr.compare(0, to_python_int(gpr[self.RA]), 0)
+            machine.context.cr.compare_cr0(gpr[self.RA])
         
     def __str__(self):
         if self.RC:
@@ -51,16 +62,15 @@ class OR(Instruction):
             return "or{0} r{1}, r{2}, r{3}".format(dot, self.RA, self.RS, self.RB)
             
             
-class AND(Instruction):
-    def __init__(self, val):
-        self.opcode, self.RS, self.RA, self.RB, self.opcode2, self.RC = parse_xform(val)
+class AND(LogicalOperation):
+    __slots__ = ()
         
     def execute(self, machine):
         gpr = machine.context.gpr 
-        gpr[self.RA] = (gpr[self.RS] & gpr[self.RB]) & 0xFFFFFFFF
+        gpr[self.RA] = gpr[self.RS] & gpr[self.RB]
         
         if self.RC:
-            machine.context.cr.compare(0, to_python_int(gpr[self.RA]), 0)
+            machine.context.cr.compare_cr0(gpr[self.RA])
         
     def __str__(self):
         if self.RC:
@@ -71,65 +81,79 @@ class AND(Instruction):
         return "and{0} r{1}, r{2}, r{3}".format(dot, self.RA, self.RS, self.RB)
         
         
+# andi. and andis. only exist as record forms
 class ANDImmediate(Instruction):
+    __slots__ = ("opcode", "RS", "RA", "UI")
+
     def __init__(self, val):
         self.opcode, self.RS, self.RA, self.UI = parse_dform(val)
         
     def execute(self, machine):
         gpr = machine.context.gpr 
-        gpr[self.RA] = (gpr[self.RS] & self.UI ) & 0xFFFFFFFF
+        gpr[self.RA] = gpr[self.RS] & self.UI
+
+        machine.context.cr.compare_cr0(gpr[self.RA])
         
     def __str__(self):
-        return "andi r{0}, r{1}, {2}".format(dot, self.RA, self.RS, self.UI)
+        return "andi. r{0}, r{1}, 0x{2:x}".format(self.RA, self.RS, self.UI)
 
 
 class ANDImmediateShifted(Instruction):
+    __slots__ = ("opcode", "RS", "RA", "UI", "value")
+
     def __init__(self, val):
         self.opcode, self.RS, self.RA, self.UI = parse_dform(val)
-        
+        self.value = self.UI << 16
+
     def execute(self, machine):
-        gpr = machine.context.gpr 
-        gpr[self.RA] = (gpr[self.RS] & (self.UI << 16) ) & 0xFFFFFFFF
-        
+        gpr = machine.context.gpr
+        gpr[self.RA] = gpr[self.RS] & self.value
+
+        machine.context.cr.compare_cr0(gpr[self.RA])
+
     def __str__(self):
-        return "andis r{0}, r{1}, {2}".format(dot, self.RA, self.RS, self.UI)
-        
+        return "andis. r{0}, r{1}, 0x{2:x}".format(self.RA, self.RS, self.UI)
+
 
 
 class XORImmediate(Instruction):
+    __slots__ = ("opcode", "RS", "RA", "UI")
+
     def __init__(self, val):
         self.opcode, self.RS, self.RA, self.UI = parse_dform(val)
         
     def execute(self, machine):
         gpr = machine.context.gpr 
-        gpr[self.RA] = (gpr[self.RS] ^ self.UI ) & 0xFFFFFFFF
+        gpr[self.RA] = gpr[self.RS] ^ self.UI
         
     def __str__(self):
-        return "xori r{0}, r{1}, {2}".format(dot, self.RA, self.RS, self.UI)
-
+        return "xori r{0}, r{1}, 0x{2:x}".format(self.RA, self.RS, self.UI)
+        
 
 class XORImmediateShifted(Instruction):
+    __slots__ = ("opcode", "RS", "RA", "UI", "value")
+
     def __init__(self, val):
         self.opcode, self.RS, self.RA, self.UI = parse_dform(val)
+        self.value = self.UI << 16
         
     def execute(self, machine):
         gpr = machine.context.gpr 
-        gpr[self.RA] = (gpr[self.RS] ^ (self.UI << 16) ) & 0xFFFFFFFF
+        gpr[self.RA] = gpr[self.RS] ^ self.value
         
     def __str__(self):
-        return "xoris r{0}, r{1}, {2}".format(dot, self.RA, self.RS, self.UI)
+        return "xoris r{0}, r{1}, 0x{2:x}".format(self.RA, self.RS, self.UI)
 
 
-class XOR(Instruction):
-    def __init__(self, val):
-        self.opcode, self.RS, self.RA, self.RB, self.opcode2, self.RC = parse_xform(val)
+class XOR(LogicalOperation):
+    __slots__ = ()
         
     def execute(self, machine):
         gpr = machine.context.gpr 
-        gpr[self.RA] = (gpr[self.RS] ^ gpr[self.RB]) & 0xFFFFFFFF
+        gpr[self.RA] = gpr[self.RS] ^ gpr[self.RB]
         
         if self.RC:
-            machine.context.cr.compare(0, to_python_int(gpr[self.RA]), 0)
+            machine.context.cr.compare_cr0(gpr[self.RA])
         
     def __str__(self):
         if self.RC:
@@ -140,16 +164,15 @@ class XOR(Instruction):
         return "xor{0} r{1}, r{2}, r{3}".format(dot, self.RA, self.RS, self.RB)
         
 
-class NAND(Instruction):
-    def __init__(self, val):
-        self.opcode, self.RS, self.RA, self.RB, self.opcode2, self.RC = parse_xform(val)
+class NAND(LogicalOperation):
+    __slots__ = ()
         
     def execute(self, machine):
         gpr = machine.context.gpr 
-        gpr[self.RA] = negate((gpr[self.RS] & gpr[self.RB]) & 0xFFFFFFFF)
+        gpr[self.RA] = (gpr[self.RS] & gpr[self.RB]) ^ 0xFFFFFFFF
         
         if self.RC:
-            machine.context.cr.compare(0, to_python_int(gpr[self.RA]), 0)
+            machine.context.cr.compare_cr0(gpr[self.RA])
         
     def __str__(self):
         if self.RC:
@@ -160,16 +183,15 @@ class NAND(Instruction):
         return "nand{0} r{1}, r{2}, r{3}".format(dot, self.RA, self.RS, self.RB)
         
 
-class NOR(Instruction):
-    def __init__(self, val):
-        self.opcode, self.RS, self.RA, self.RB, self.opcode2, self.RC = parse_xform(val)
+class NOR(LogicalOperation):
+    __slots__ = ()
         
     def execute(self, machine):
         gpr = machine.context.gpr 
-        gpr[self.RA] = negate((gpr[self.RS] | gpr[self.RB]) & 0xFFFFFFFF)
+        gpr[self.RA] = (gpr[self.RS] | gpr[self.RB]) ^ 0xFFFFFFFF
         
         if self.RC:
-            machine.context.cr.compare(0, to_python_int(gpr[self.RA]), 0)
+            machine.context.cr.compare_cr0(gpr[self.RA])
         
     def __str__(self):
         if self.RC:
@@ -177,19 +199,21 @@ class NOR(Instruction):
         else:
             dot = ""
         
-        return "nor{0} r{1}, r{2}, r{3}".format(dot, self.RA, self.RS, self.RB)
+        if self.RS == self.RB:
+            return "not{0} r{1}, r{2}".format(dot, self.RA, self.RS)
+        else:
+            return "nor{0} r{1}, r{2}, r{3}".format(dot, self.RA, self.RS, self.RB)
         
 
-class Equivalent(Instruction):
-    def __init__(self, val):
-        self.opcode, self.RS, self.RA, self.RB, self.opcode2, self.RC = parse_xform(val)
+class Equivalent(LogicalOperation):
+    __slots__ = ()
         
     def execute(self, machine):
         gpr = machine.context.gpr 
-        gpr[self.RA] = negate((gpr[self.RS] ^ gpr[self.RB]) & 0xFFFFFFFF)
+        gpr[self.RA] = (gpr[self.RS] ^ gpr[self.RB]) ^ 0xFFFFFFFF
         
         if self.RC:
-            machine.context.cr.compare(0, to_python_int(gpr[self.RA]), 0)
+            machine.context.cr.compare_cr0(gpr[self.RA])
         
     def __str__(self):
         if self.RC:
@@ -200,16 +224,15 @@ class Equivalent(Instruction):
         return "eqv{0} r{1}, r{2}, r{3}".format(dot, self.RA, self.RS, self.RB)
         
         
-class ANDWithComplement(Instruction):
-    def __init__(self, val):
-        self.opcode, self.RS, self.RA, self.RB, self.opcode2, self.RC = parse_xform(val)
+class ANDWithComplement(LogicalOperation):
+    __slots__ = ()
         
     def execute(self, machine):
         gpr = machine.context.gpr 
-        gpr[self.RA] = (gpr[self.RS] & negate(gpr[self.RB])) & 0xFFFFFFFF
+        gpr[self.RA] = gpr[self.RS] & (gpr[self.RB] ^ 0xFFFFFFFF)
         
         if self.RC:
-            machine.context.cr.compare(0, to_python_int(gpr[self.RA]), 0)
+            machine.context.cr.compare_cr0(gpr[self.RA])
         
     def __str__(self):
         if self.RC:
@@ -220,16 +243,15 @@ class ANDWithComplement(Instruction):
         return "andc{0} r{1}, r{2}, r{3}".format(dot, self.RA, self.RS, self.RB)
         
         
-class ORWithComplement(Instruction):
-    def __init__(self, val):
-        self.opcode, self.RS, self.RA, self.RB, self.opcode2, self.RC = parse_xform(val)
+class ORWithComplement(LogicalOperation):
+    __slots__ = ()
         
     def execute(self, machine):
         gpr = machine.context.gpr 
-        gpr[self.RA] = (gpr[self.RS] | negate(gpr[self.RB])) & 0xFFFFFFFF
+        gpr[self.RA] = gpr[self.RS] | (gpr[self.RB] ^ 0xFFFFFFFF)
         
         if self.RC:
-            machine.context.cr.compare(0, to_python_int(gpr[self.RA]), 0)
+            machine.context.cr.compare_cr0(gpr[self.RA])
         
     def __str__(self):
         if self.RC:
@@ -240,19 +262,20 @@ class ORWithComplement(Instruction):
         return "orc{0} r{1}, r{2}, r{3}".format(dot, self.RA, self.RS, self.RB)
         
 
-class ExtendSignByte(Instruction):
-    def __init__(self, val):
-        self.opcode, self.RS, self.RA, self.RB, self.opcode2, self.RC = parse_xform(val)
+class ExtendSignByte(LogicalOperation):
+    __slots__ = ()
         
     def execute(self, machine):
         gpr = machine.context.gpr
-        sign = (gpr[self.RS] >> 7) & 1
+        value = gpr[self.RS] & 0xFF
         
+        if value & 0x80:
+            value |= 0xFFFFFF00
         
-        gpr[self.RA] = (0xFFFFFF00*sign | gpr[self.RB] & 0xFF) & 0xFFFFFFFF
+        gpr[self.RA] = value
         
         if self.RC:
-            machine.context.cr.compare(0, to_python_int(gpr[self.RA]), 0)
+            machine.context.cr.compare_cr0(gpr[self.RA])
         
     def __str__(self):
         if self.RC:
@@ -260,22 +283,18 @@ class ExtendSignByte(Instruction):
         else:
             dot = ""
         
-        return "extsb{0} r{1}, r{2}".format(dot, self.RA, self.RS, self.RB)
+        return "extsb{0} r{1}, r{2}".format(dot, self.RA, self.RS)
 
 
-class ExtendSignHalfword(Instruction):
-    def __init__(self, val):
-        self.opcode, self.RS, self.RA, self.RB, self.opcode2, self.RC = parse_xform(val)
+class ExtendSignHalfword(LogicalOperation):
+    __slots__ = ()
         
     def execute(self, machine):
         gpr = machine.context.gpr
-        sign = (gpr[self.RS] >> 15) & 1
-        
-        
-        gpr[self.RA] = (0xFFFF0000*sign | gpr[self.RB] & 0xFFFF) & 0xFFFFFFFF
+        gpr[self.RA] = sign_extend_short(gpr[self.RS] & 0xFFFF)
         
         if self.RC:
-            machine.context.cr.compare(0, to_python_int(gpr[self.RA]), 0)
+            machine.context.cr.compare_cr0(gpr[self.RA])
         
     def __str__(self):
         if self.RC:
@@ -283,26 +302,18 @@ class ExtendSignHalfword(Instruction):
         else:
             dot = ""
         
-        return "extsh{0} r{1}, r{2}".format(dot, self.RA, self.RS, self.RB)
+        return "extsh{0} r{1}, r{2}".format(dot, self.RA, self.RS)
         
         
-class CountLeadingZerosWord(Instruction):
-    def __init__(self, val):
-        self.opcode, self.RS, self.RA, self.RB, self.opcode2, self.RC = parse_xform(val)
+class CountLeadingZerosWord(LogicalOperation):
+    __slots__ = ()
         
     def execute(self, machine):
         gpr = machine.context.gpr
-        count = 0
-        for i in range(31, -1, -1):
-            if not gpr[self.RB] & (1 << i):
-                count += 1
-            else:
-                break 
-                
-        gpr[self.RA] = count
+        gpr[self.RA] = 32 - gpr[self.RS].bit_length()
         
         if self.RC:
-            machine.context.cr.compare(0, to_python_int(gpr[self.RA]), 0)
+            machine.context.cr.compare_cr0(gpr[self.RA])
         
     def __str__(self):
         if self.RC:
@@ -310,33 +321,35 @@ class CountLeadingZerosWord(Instruction):
         else:
             dot = ""
         
-        return "cntlzw{0} r{1}, r{2}".format(dot, self.RA, self.RS, self.RB)
+        return "cntlzw{0} r{1}, r{2}".format(dot, self.RA, self.RS)
         
         
 def create_mask(mb, me):
-    result = 0
-    for i in range(mb, me+1):
-        result = result | (1 << (31-i))
+    # Bits mb through me set, wrapping around if mb > me
+    start = 0xFFFFFFFF >> mb
+    end = (0xFFFFFFFF << (31 - me)) & 0xFFFFFFFF
     
-    return result 
+    if mb <= me:
+        return start & end
+    else:
+        return start | end
 
 
 class RotateLeftWordImmediateThenANDWithMask(Instruction):
+    __slots__ = ("opcode", "RS", "RA", "SH", "MB", "ME", "RC", "mask")
+
     def __init__(self, val):
         self.opcode, self.RS, self.RA, self.SH, self.MB, self.ME, self.RC = parse_mform(val)
-        
+        self.mask = create_mask(self.MB, self.ME)
         
     def execute(self, machine):
         gpr = machine.context.gpr
         
-        mask = create_mask(MB, ME)        
         result = gpr[self.RS] << self.SH 
-        shifted_out = result >> 32
-        result = result | shifted_out
-        gpr[self.RA] = result & mask
+        gpr[self.RA] = (result | (result >> 32)) & self.mask
         
         if self.RC:
-            machine.context.cr.compare(0, to_python_int(gpr[self.RA]), 0)
+            machine.context.cr.compare_cr0(gpr[self.RA])
         
     def __str__(self):
         if self.RC:
@@ -349,21 +362,20 @@ class RotateLeftWordImmediateThenANDWithMask(Instruction):
             
             
 class RotateLeftWordThenANDWithMask(Instruction):
+    __slots__ = ("opcode", "RS", "RA", "RB", "MB", "ME", "RC", "mask")
+
     def __init__(self, val):
         self.opcode, self.RS, self.RA, self.RB, self.MB, self.ME, self.RC = parse_mform(val)
-        
+        self.mask = create_mask(self.MB, self.ME)
         
     def execute(self, machine):
         gpr = machine.context.gpr
         
-        mask = create_mask(MB, ME)        
-        result = gpr[self.RS] << gpr[self.RB]
-        shifted_out = result >> 32
-        result = result | shifted_out
-        gpr[self.RA] = result & mask
+        result = gpr[self.RS] << (gpr[self.RB] & 0x1F)
+        gpr[self.RA] = (result | (result >> 32)) & self.mask
         
         if self.RC:
-            machine.context.cr.compare(0, to_python_int(gpr[self.RA]), 0)
+            machine.context.cr.compare_cr0(gpr[self.RA])
         
     def __str__(self):
         if self.RC:
@@ -376,21 +388,22 @@ class RotateLeftWordThenANDWithMask(Instruction):
             
             
 class RotateLeftWordImmediateThenMaskInsert(Instruction):
+    __slots__ = ("opcode", "RS", "RA", "SH", "MB", "ME", "RC", "mask", "inverted_mask")
+
     def __init__(self, val):
         self.opcode, self.RS, self.RA, self.SH, self.MB, self.ME, self.RC = parse_mform(val)
-        
+        self.mask = create_mask(self.MB, self.ME)
+        self.inverted_mask = self.mask ^ 0xFFFFFFFF
         
     def execute(self, machine):
         gpr = machine.context.gpr
         
-        mask = create_mask(MB, ME)        
         result = gpr[self.RS] << self.SH 
-        shifted_out = result >> 32
-        result = result | shifted_out
-        gpr[self.RA] = (result & mask) | (gpr[self.RA] & negate(mask))
+        result = result | (result >> 32)
+        gpr[self.RA] = (result & self.mask) | (gpr[self.RA] & self.inverted_mask)
         
         if self.RC:
-            machine.context.cr.compare(0, to_python_int(gpr[self.RA]), 0)
+            machine.context.cr.compare_cr0(gpr[self.RA])
         
     def __str__(self):
         if self.RC:
@@ -402,16 +415,16 @@ class RotateLeftWordImmediateThenMaskInsert(Instruction):
             dot, self.RA, self.RS, self.SH, self.MB, self.ME)
             
 
-class ShiftRightWord(Instruction):
-    def __init__(self, val):
-        self.opcode, self.RS, self.RA, self.RB, self.opcode2, self.RC = parse_xform(val)
+class ShiftRightWord(LogicalOperation):
+    __slots__ = ()
         
     def execute(self, machine):
         gpr = machine.context.gpr 
-        gpr[self.RA] = (gpr[self.RS] >> gpr[self.RB]) & 0xFFFFFFFF
+        # Shift amounts of 32 to 63 clear the register
+        gpr[self.RA] = (gpr[self.RS] >> (gpr[self.RB] & 0x3F)) & 0xFFFFFFFF
         
         if self.RC:
-            machine.context.cr.compare(0, to_python_int(gpr[self.RA]), 0)
+            machine.context.cr.compare_cr0(gpr[self.RA])
         
     def __str__(self):
         if self.RC:
@@ -422,16 +435,15 @@ class ShiftRightWord(Instruction):
         return "srw{0} r{1}, r{2}, r{3}".format(dot, self.RA, self.RS, self.RB)
         
         
-class ShiftLeftWord(Instruction):
-    def __init__(self, val):
-        self.opcode, self.RS, self.RA, self.RB, self.opcode2, self.RC = parse_xform(val)
+class ShiftLeftWord(LogicalOperation):
+    __slots__ = ()
         
     def execute(self, machine):
         gpr = machine.context.gpr 
-        gpr[self.RA] = (gpr[self.RS] << gpr[self.RB]) & 0xFFFFFFFF
+        gpr[self.RA] = (gpr[self.RS] << (gpr[self.RB] & 0x3F)) & 0xFFFFFFFF
         
         if self.RC:
-            machine.context.cr.compare(0, to_python_int(gpr[self.RA]), 0)
+            machine.context.cr.compare_cr0(gpr[self.RA])
         
     def __str__(self):
         if self.RC:
@@ -443,25 +455,26 @@ class ShiftLeftWord(Instruction):
         
 
 class ShiftRightWordAlgebraicImmediate(Instruction):
+    __slots__ = ("opcode", "RS", "RA", "SH", "opcode2", "RC", "shifted_out_mask")
+
     def __init__(self, val):
         self.opcode, self.RS, self.RA, self.SH, self.opcode2, self.RC = parse_xform(val)
+        # Bits lost by the shift, a negative value with any of them set sets CA
+        self.shifted_out_mask = (1 << self.SH) - 1
         
     def execute(self, machine):
         gpr = machine.context.gpr 
-        sign = (gpr[self.RS] >> 31) & 1
-        mask = create_mask(0, self.SH)
-        shifted_out = gpr[self.RS] & create_mask(31 - self.SH, 31)
+        value = gpr[self.RS]
         
-        gpr[self.RA] = (gpr[self.RS] >> self.SH) & 0xFFFFFFFF
-        gpr[self.RA] = gpr[self.RA] | (sign * mask)
+        gpr[self.RA] = (to_python_int(value) >> self.SH) & 0xFFFFFFFF
         
-        if sign and shifted_out:
+        if value & 0x80000000 and value & self.shifted_out_mask:
             machine.context.xer.CA = 1
         else:
             machine.context.xer.CA = 0
         
         if self.RC:
-            machine.context.cr.compare(0, to_python_int(gpr[self.RA]), 0)
+            machine.context.cr.compare_cr0(gpr[self.RA])
         
     def __str__(self):
         if self.RC:
@@ -472,26 +485,25 @@ class ShiftRightWordAlgebraicImmediate(Instruction):
         return "srawi{0} r{1}, r{2}, {3}".format(dot, self.RA, self.RS, self.SH)
         
         
-class ShiftRightWordAlgebraic(Instruction):
-    def __init__(self, val):
-        self.opcode, self.RS, self.RA, self.RB, self.opcode2, self.RC = parse_xform(val)
+class ShiftRightWordAlgebraic(LogicalOperation):
+    __slots__ = ()
         
     def execute(self, machine):
         gpr = machine.context.gpr 
-        sign = (gpr[self.RS] >> 31) & 1
-        mask = create_mask(0, gpr[self.RB])
-        shifted_out = gpr[self.RS] & create_mask(31 - gpr[self.RB], 31)
+        value = gpr[self.RS]
+        shift = gpr[self.RB] & 0x3F
+        if shift > 31:
+            shift = 32
         
-        gpr[self.RA] = (gpr[self.RS] >> gpr[self.RB]) & 0xFFFFFFFF
-        gpr[self.RA] = gpr[self.RA] | (sign * mask)
+        gpr[self.RA] = (to_python_int(value) >> shift) & 0xFFFFFFFF
         
-        if sign and shifted_out:
+        if value & 0x80000000 and value & ((1 << shift) - 1):
             machine.context.xer.CA = 1
         else:
             machine.context.xer.CA = 0
         
         if self.RC:
-            machine.context.cr.compare(0, to_python_int(gpr[self.RA]), 0)
+            machine.context.cr.compare_cr0(gpr[self.RA])
         
     def __str__(self):
         if self.RC:
@@ -1,9 +1,10 @@
 from .common import *
 
 class MoveToSPR(Instruction):
+    __slots__ = ("opcode", "RS", "SPR", "opcode2")
+    
     def __init__(self, val):
         self.opcode, self.RS, self.SPR, self.opcode2 = parse_dform(val)
-        print(self.SPR)
         #half = self.SPR & 0b11111
         #self.SPR = self.SPR >> 5 | (half << 5)
         
@@ -31,6 +32,8 @@ class MoveToSPR(Instruction):
 
 
 class MoveFromSPR(Instruction):
+    __slots__ = ("opcode", "RT", "SPR", "opcode2")
+    
     def __init__(self, val):
         self.opcode, self.RT, self.SPR, self.opcode2 = parse_dform(val)
         #half = spr & 0b11111
@@ -60,6 +63,8 @@ class MoveFromSPR(Instruction):
             
             
 class MoveFromCR(Instruction):
+    __slots__ = ("opcode", "RT", "SPR", "opcode2")
+    
     def __init__(self, val):
         self.opcode, self.RT, self.SPR, self.opcode2 = parse_dform(val)
         
@@ -72,8 +77,11 @@ class MoveFromCR(Instruction):
         
 
 class MoveToCRFields(Instruction):
+    __slots__ = ("opcode", "RS", "FXM", "opcode2")
+    
     def __init__(self, val):
-        self.opcode, self.RS, self.FXM, self.opcode2 = parse_dform(val)
+        self.opcode, self.RS, _, self.opcode2 = parse_dform(val)
+        self.FXM = (val >> 12) & 0xFF
         
     def execute(self, machine):
         gpr = machine.context.gpr 
@@ -83,4 +91,4 @@ class MoveToCRFields(Instruction):
         if self.FXM == 0xFF:
             return "mtcr r{0}".format(self.RS)
         else:
-            return "mtcrf r{0}".format(self.RS)
\ No newline at end of file
+            return "mtcrf 0x{0:x}, r{1}".format(self.FXM, self.RS)
\ No newline at end of file
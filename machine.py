@@ -1,9 +1,53 @@
+import mmap
 import os 
-from io import BytesIO
-from struct import pack, unpack 
-from instructions.dispatcher import parse_instruction
-from instructions.common import to_python_int
+import struct 
+import zlib 
+from collections import namedtuple
+from contextlib import contextmanager
+from struct import Struct 
+from instructions.dispatcher import parse_instruction, decode_table
+from instructions.common import Instruction, to_python_int
 from dolreader import DolFile
+from blocktranslator import translate_block
+from hle import HookInstruction
+
+try:
+    import numpy
+except ImportError:
+    numpy = None 
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None 
+
+
+HALFWORD = Struct(">H")
+WORD = Struct(">I")
+
+# Granularity of the address lookup table used to find memory sections 
+SEGMENT_SHIFT = 20
+
+# Granularity of write tracking for snapshots 
+PAGE_SHIFT = 12
+PAGE_SIZE = 1 << PAGE_SHIFT
+
+# Entries of the index written with incremental memory dumps: section start 
+# and page number of each page in the dump, in the order of the page data 
+DUMP_INDEX = Struct(">II")
+
+# Memory access methods wrapped by tracers and the access size they report, 
+# the others report the length of the data, words are reported as bytes 
+TRACED_SIZES = {
+    "read_byte": 1, "read_halfword": 2, "read_word": 4, "read_data": None, "read_words": None,
+    "read_string": None,
+    "write_byte": 1, "write_halfword": 2, "write_word": 4, "write_data": None, "write_words": None,
+    "fill": None, "copy_within": None
+}
+
+# Result of a function call made by Machine.call_function_batch, memory holds 
+# the contents of the requested memory regions after the call 
+CallResult = namedtuple("CallResult", ("r3", "f1", "memory"))
 
 
 class PPCContext(object):
@@ -15,6 +59,18 @@ class PPCContext(object):
         self.pc = 0 
         self.lr = 0
         self.ctr = 0
+    
+    def copy(self):
+        context = PPCContext()
+        context.gpr = list(self.gpr)
+        context.fpr = list(self.fpr)
+        context.cr.value = self.cr.value 
+        context.xer.from_value(self.xer.to_value())
+        context.pc = self.pc 
+        context.lr = self.lr 
+        context.ctr = self.ctr 
+        
+        return context 
         
     def __str__(self):
         out = ""
@@ -33,60 +89,81 @@ GT = 0b0100 # result is positive and not zero, or bigger than
 EQ = 0b0010 # result is zero, or equal to 
 SO = 0b0001 # summary overflow or floating-point unordered (frA or frB or both are NaN)
 
+# Bits of each CR field in the 32 bit register value, CR0 is the top nibble 
+CR_FIELD_SHIFTS = tuple((7-i)*4 for i in range(8))
+CR_FIELD_MASKS = tuple(0xF << shift for shift in CR_FIELD_SHIFTS)
+
+# Register bits selected by each mtcrf field mask, the most significant bit of 
+# the field mask selects CR0 
+CR_FXM_MASKS = tuple(
+    sum(0xF << (j*4) for j in range(8) if fxm & (1 << j)) for fxm in range(256)
+)
+
+
 class ConditionalRegister(object):
+    # The 8 fields are kept packed in a single int like the real register 
+    __slots__ = ("value", )
+    
     def __init__(self):
-        self.cr = [0 for x in range(8)]
+        self.value = 0
     
     def __getitem__(self, index):
-        return self.cr[index]
+        return (self.value >> CR_FIELD_SHIFTS[index]) & 0xF
     
     def __setitem__(self, index, value):
-        assert value in (LT, GT, EQ, SO, 0)
+        shift = CR_FIELD_SHIFTS[index]
         if value == SO:
             # SO bit is independent of comparison bits
-            self.cr[index] = value | SO 
+            self.value = (self.value & ~CR_FIELD_MASKS[index]) | (SO << shift)
         else:
             # SO bit can only be cleared by MTSPR/MCRXR
-            self.cr[index] = value | (self.cr[index] & SO)
+            self.value = (self.value & ~((LT | GT | EQ) << shift)) | (value << shift)
         
     def from_value(self, val, mask=0xFF):
-        for i in range(8):
-            bitfield = (val >> (7-i)*4) & 0b1111 
-            if mask & (1 << i):
-                self.cr[i] = bitfield 
+        mask = CR_FXM_MASKS[mask]
+        self.value = (self.value & ~mask) | (val & mask)
     
     def to_value(self):
-        val = 0
-        for i in range(8):
-            val = val | (self.cr[i] << (7-i)*4)
-        
-        return val
+        return self.value 
     
     def clear(self, index):
-        self.cr[index] = 0
+        self.value &= ~CR_FIELD_MASKS[index]
     
     def is_equal(self, index):
-        return self.cr[index] == EQ 
+        return self[index] == EQ 
     
     def is_lesser(self, index):
-        return self.cr[index] == LT 
+        return self[index] == LT 
     
     def is_bigger(self, index):
-        return self.cr[index] == GT
+        return self[index] == GT
     
     def compare(self, index, val, ref):
         if val == ref:
-            self[index] = EQ 
+            result = EQ 
         elif val < ref:
-            self[index] = LT 
+            result = LT 
         else:
-            self[index] = GT 
+            result = GT 
+        
+        shift = CR_FIELD_SHIFTS[index]
+        self.value = (self.value & ~((LT | GT | EQ) << shift)) | (result << shift)
+    
+    def compare_cr0(self, val):
+        # Record form result of an instruction, val is the unsigned 32 bit 
+        # result which is compared with 0 as a signed value 
+        if val == 0:
+            self.value = (self.value & 0x1FFFFFFF) | (EQ << 28)
+        elif val & 0x80000000:
+            self.value = (self.value & 0x1FFFFFFF) | (LT << 28)
+        else:
+            self.value = (self.value & 0x1FFFFFFF) | (GT << 28)
     
     def __str__(self):
         out = ""
         for i in range(8):
-            compare_result = self.cr[i] & ~SO 
-            so_bit = self.cr[i] & SO 
+            compare_result = self[i] & ~SO 
+            so_bit = self[i] & SO 
             
             if compare_result == LT:
                 out += "CR{0}: LT, ".format(i)
@@ -131,97 +208,415 @@ class XerRegister(object):
         return val 
         
     
+def _opcode_tables():
+    # Lookup tables of the primary opcodes and the extended opcodes of 
+    # opcodes 19 and 31 that can be decoded, for classifying word arrays 
+    primary = numpy.zeros(64, dtype=bool)
+    extended = {}
+    
+    for opcode, entry in enumerate(decode_table):
+        if entry.__class__ is list:
+            extended[opcode] = numpy.array([x is not None for x in entry], dtype=bool)
+        else:
+            primary[opcode] = entry is not None 
+    
+    return primary, extended 
+
+
+if numpy is not None:
+    _primary_valid, _extended_valid = _opcode_tables()
+
+
+def decodable_words(words):
+    # Boolean array marking the words of a numpy uint32 array with a known 
+    # opcode, operand checks done by the instructions themselves still apply 
+    primary = words >> 26
+    extended = (words >> 1) & 0x3FF
+    valid = _primary_valid[primary]
+    
+    for opcode, table in _extended_valid.items():
+        selected = primary == opcode 
+        valid[selected] = table[extended[selected]]
+    
+    return valid 
+
+
+def _pack_words(values):
+    return struct.pack(">{0}I".format(len(values)), *[value & 0xFFFFFFFF for value in values])
+
+
+def allocate_memory(size):
+    # Anonymous private mappings are zero filled and demand paged: untouched 
+    # pages read as zeros and only take up memory once written to. Private 
+    # mappings also stay copy-on-write across fork. 
+    if size == 0:
+        return bytearray()
+    if hasattr(mmap, "MAP_PRIVATE"):
+        return mmap.mmap(-1, size, flags=mmap.MAP_PRIVATE)
+    else:
+        return mmap.mmap(-1, size)
+
+
+class Snapshot(object):
+    # Copy-on-write snapshot of a machine, see Machine.snapshot. The original 
+    # contents of a page are saved the first time it is written to. 
+    def __init__(self, context):
+        self.context = context 
+        # Page contents at the time of the snapshot, keyed by 
+        # (section start, page number) 
+        self.pages = {}
+    
+    def touch(self, section, first, last):
+        pages = self.pages 
+        data = section[3]
+        
+        for page in range(first, last+1):
+            key = (section[0], page)
+            if key not in pages:
+                pages[key] = bytes(data[page << PAGE_SHIFT:(page+1) << PAGE_SHIFT])
+
+
+class DumpTracker(object):
+    # Collects the pages written since the last incremental memory dump 
+    def __init__(self):
+        self.pages = set()
+    
+    def touch(self, section, first, last):
+        if first == last:
+            self.pages.add((section[0], first))
+        else:
+            self.pages.update((section[0], page) for page in range(first, last+1))
+
+
+class _DumpWriter(object):
+    # Writes a dump file, optionally compressing it as it is streamed out 
+    def __init__(self, path, compression=None):
+        if compression is None:
+            self.compressor = None 
+        elif compression == "zlib":
+            self.compressor = zlib.compressobj()
+            path += ".zlib"
+        elif compression == "zstd":
+            if zstandard is None:
+                raise RuntimeError("zstd compression requires the zstandard module")
+            self.compressor = zstandard.ZstdCompressor().compressobj()
+            path += ".zst"
+        else:
+            raise RuntimeError("Unknown compression: {0}".format(compression))
+        
+        self.path = path 
+        self.f = open(path, "wb")
+    
+    def write(self, data):
+        if self.compressor is not None:
+            data = self.compressor.compress(data)
+        self.f.write(data)
+    
+    def close(self):
+        if self.compressor is not None:
+            self.f.write(self.compressor.flush())
+        self.f.close()
+
+
 class Machine(object):
-    def __init__(self, memory_sections):
-        print(memory_sections)
+    def __init__(self, memory_sections, lazy=True):
         self.context = PPCContext()
         
         self.memory_sections = []
+        # Maps address >> SEGMENT_SHIFT to the sections overlapping that segment 
+        self._segments = {}
+        
         for cached_start, uncached_start, size in memory_sections:
-            self.memory_sections.append((cached_start, uncached_start, size, BytesIO(b"\x00"*size)))
+            if lazy:
+                data = allocate_memory(size)
+            else:
+                data = bytearray(size)
+            
+            section = (cached_start, uncached_start, size, data)
+            self.memory_sections.append(section)
+            self._map_section(cached_start, section)
+            self._map_section(uncached_start, section)
+        
+        # Decoded instructions keyed by the address they were fetched from 
+        self._decoded = {}
+        # Numbers (address >> PAGE_SHIFT) of the pages instructions were 
+        # decoded from, writes to other pages can't invalidate anything. 
+        # Pages stay in here when their instructions are dropped. 
+        self._code_pages = set()
+        # Translated basic blocks keyed by their start address 
+        self._blocks = {}
+        # Bumped whenever translated blocks are dropped, a running block 
+        # checks it after anything that could have modified code 
+        self._generation = 0
+        # HLE hooks keyed by address as (function, name), they take the place 
+        # of the instruction at that address when it is decoded 
+        self.hooks = {}
+        
+        self.engine = "interpreter"
+        self.step = self.execute_next 
+        self.tracer = None 
+        
+        # Objects notified through touch(section, first page, last page) 
+        # before pages of a section are written 
+        self._page_trackers = []
+        
+        # Set up by the first incremental memory dump 
+        self._dump_tracker = None 
+        self._dump_count = 0
+    
+    def _map_section(self, start, section):
+        end = start + section[2]
+        mapping = (start, end, section[3], section)
+        
+        for segment in range(start >> SEGMENT_SHIFT, ((end - 1) >> SEGMENT_SHIFT) + 1):
+            self._segments[segment] = self._segments.get(segment, ()) + (mapping, )
     
     def load_binary(self, address, f):
         self.write_data(address, f.read())
     
-    def load_dol(self, f):
-        dol = DolFile(f)
+    def load_dol(self, f, use_mmap=False, predecode=False):
+        dol = DolFile(f, use_mmap)
         for offset, address, size in dol.sections:
-            dol._rawdata.seek(offset)
-            self.write_data(address, dol._rawdata.read(size))
-    
-    def dump_memory(self, dirpath):
+            with dol.view(offset, size) as data:
+                self.write_data(address, data)
+        
+        if predecode:
+            for offset, address, size in dol.text_sections:
+                self.predecode(address, size)
+    
+    def dump_memory(self, dirpath, incremental=False, compression=None, chunk_size=0x100000):
+        # Dumps each memory section to memdump_<start>.bin. With incremental 
+        # the first dump is a full one, following dumps only write the pages 
+        # changed since the dump before to memdump_<n>.bin, with their section 
+        # starts and page numbers in memdump_<n>.idx. compression can be "zlib" 
+        # or "zstd", which adds .zlib or .zst to the data files. 
+        # Returns the paths of the written files. 
+        if incremental and self._dump_tracker is not None:
+            return self._dump_pages(dirpath, compression)
+        
+        paths = []
         for cached_start, _, size, data in self.memory_sections:
             name = "memdump_{0:x}.bin".format(cached_start)
-            with open(os.path.join(dirpath, name), "wb") as f:
-                data.seek(0)
-                f.write(data.read())
+            writer = _DumpWriter(os.path.join(dirpath, name), compression)
+            try:
+                with memoryview(data) as view:
+                    for offset in range(0, size, chunk_size):
+                        writer.write(view[offset:offset+chunk_size])
+            finally:
+                writer.close()
+            paths.append(writer.path)
+        
+        if incremental:
+            self._dump_tracker = DumpTracker()
+            self._dump_count = 0
+            self._page_trackers.append(self._dump_tracker)
+        
+        return paths 
     
-    def write_data(self, address, data):
-        for cached_start, uncached_start, size, mem in self.memory_sections:
-            cached_end = cached_start + size 
-            uncached_end = uncached_start + size 
-            
-            if cached_start <= address < cached_end:
-                if address+len(data) >= cached_end:
-                    raise RuntimeError("Data to be written exceeds end of memory section") 
-                    
-                relative = address - cached_start 
-                mem.seek(relative)
-                mem.write(data)
-                return 
-                
-            elif uncached_start <= address < uncached_end:
-                if address+len(data) >= uncached_end:
-                    raise RuntimeError("Data to be written exceeds end of memory section") 
-                    
-                relative = address - uncached_start 
-                mem.seek(relative)
-                mem.write(data)
-                return 
+    def _dump_pages(self, dirpath, compression):
+        pages = sorted(self._dump_tracker.pages)
+        self._dump_tracker.pages = set()
+        self._dump_count += 1
+        
+        sections = {section[0]: section for section in self.memory_sections}
+        name = os.path.join(dirpath, "memdump_{0:04}".format(self._dump_count))
+        
+        with open(name + ".idx", "wb") as f:
+            f.write(b"".join(DUMP_INDEX.pack(start, page) for start, page in pages))
+        
+        writer = _DumpWriter(name + ".bin", compression)
+        try:
+            for start, page in pages:
+                with memoryview(sections[start][3]) as view:
+                    writer.write(view[page << PAGE_SHIFT:(page+1) << PAGE_SHIFT])
+        finally:
+            writer.close()
+        
+        return [name + ".idx", writer.path]
+    
+    def _translate(self, address, length):
+        for start, end, mem, section in self._segments.get(address >> SEGMENT_SHIFT, ()):
+            if start <= address < end:
+                if address+length > end:
+                    raise RuntimeError("Access exceeds end of memory section: {0:x}".format(address))
                 
-        raise RuntimeError("Reading from unmapped memory: {0:x}".format(address))
+                return mem, address - start 
+        
+        raise RuntimeError("Accessing unmapped memory: {0:x}".format(address))
     
-    def read_data(self, address, len):
-        for cached_start, uncached_start, size, mem in self.memory_sections:
-            
-            cached_end = cached_start + size 
-            uncached_end = uncached_start + size 
-            
-            if cached_start <= address < cached_end:
-                if address+len >= cached_end:
-                    raise RuntimeError("Data to be read exceeds end of memory section") 
-                    
-                relative = address - cached_start 
-                mem.seek(relative)
-                return mem.read(len)
+    def _translate_write(self, address, length):
+        for start, end, mem, section in self._segments.get(address >> SEGMENT_SHIFT, ()):
+            if start <= address < end:
+                if address+length > end:
+                    raise RuntimeError("Data to be written exceeds end of memory section: {0:x}".format(address))
                 
-            elif uncached_start <= address < uncached_end:
-                if address+len >= uncached_end:
-                    raise RuntimeError("Data to be read exceeds end of memory section") 
-                    
-                relative = address - uncached_start 
-                mem.seek(relative)
-                return mem.read(len)
+                relative = address - start 
+                if self._code_pages and self._has_code(section, relative, length):
+                    self._invalidate_decoded(section[0], section[1], relative, length)
+                if self._page_trackers:
+                    for tracker in self._page_trackers:
+                        tracker.touch(section, relative >> PAGE_SHIFT, (relative+length-1) >> PAGE_SHIFT)
+                
+                return mem, relative 
         
         raise RuntimeError("Writing to unmapped memory: {0:x}".format(address))
     
+    def _has_code(self, section, relative, size):
+        # Whether a range of a section overlaps a page code was decoded from, 
+        # in either the cached or the uncached mirror 
+        code_pages = self._code_pages 
+        
+        for base in (section[0], section[1]):
+            first = (base + relative) >> PAGE_SHIFT 
+            last = (base + relative + size - 1) >> PAGE_SHIFT 
+            if first == last:
+                if first in code_pages:
+                    return True 
+            elif not code_pages.isdisjoint(range(first, last+1)):
+                return True 
+        
+        return False 
+    
+    def _invalidate_decoded(self, cached_start, uncached_start, relative, size):
+        # Drop decoded instructions overlapping a write, in both the cached 
+        # and uncached mirror of the section 
+        start = relative & ~3 
+        end = relative + size 
+        count = len(self._decoded)
+        
+        if (end - start) // 4 > count:
+            # Large writes (e.g. loading a binary) are cheaper to handle 
+            # by filtering the cache than by probing every word 
+            for base in (cached_start, uncached_start):
+                for address in [x for x in self._decoded if base+start <= x < base+end]:
+                    del self._decoded[address]
+        else:
+            for offset in range(start, end, 4):
+                self._decoded.pop(cached_start + offset, None)
+                self._decoded.pop(uncached_start + offset, None)
+        
+        if self._blocks and len(self._decoded) != count:
+            # Blocks are built from decoded instructions, any of them 
+            # could contain the modified code 
+            self._blocks.clear()
+            self._generation += 1
+    
+    def clear_decoded(self):
+        self._decoded.clear()
+        self._code_pages.clear()
+        self._blocks.clear()
+        self._generation += 1
+    
+    def view(self, address, length):
+        # Read-only, writes have to go through the machine so decoded code, 
+        # snapshots and incremental dumps see them 
+        mem, offset = self._translate(address, length)
+        return memoryview(mem)[offset:offset+length].toreadonly()
+    
+    def write_data(self, address, data):
+        mem, offset = self._translate_write(address, len(data))
+        mem[offset:offset+len(data)] = data 
+    
+    def read_data(self, address, length):
+        mem, offset = self._translate(address, length)
+        return bytes(mem[offset:offset+length])
+    
+    def read_words(self, address, count):
+        mem, offset = self._translate(address, count*4)
+        return list(struct.unpack_from(">{0}I".format(count), mem, offset))
+    
+    def write_words(self, address, values):
+        count = len(values)
+        mem, offset = self._translate_write(address, count*4)
+        struct.pack_into(">{0}I".format(count), mem, offset, *[value & 0xFFFFFFFF for value in values])
+    
+    def fill(self, address, value, size):
+        mem, offset = self._translate_write(address, size)
+        mem[offset:offset+size] = bytes((value & 0xFF, )) * size 
+    
+    def copy_within(self, dest, source, size):
+        # Overlapping ranges are fine, the source is copied out first 
+        src_mem, src_offset = self._translate(source, size)
+        data = src_mem[src_offset:src_offset+size]
+        mem, offset = self._translate_write(dest, size)
+        mem[offset:offset+size] = data 
+    
+    def read_string(self, address):
+        # Reads a zero terminated string, the terminator isn't included 
+        mem, offset = self._translate(address, 1)
+        end = mem.find(b"\x00", offset)
+        if end == -1:
+            raise RuntimeError("Unterminated string at {0:x}".format(address))
+        
+        return bytes(mem[offset:end])
+    
+    def find(self, pattern, address, length):
+        # Address of the first occurence of pattern in the range or None 
+        mem, offset = self._translate(address, length)
+        index = mem.find(pattern, offset, offset+length)
+        if index == -1:
+            return None 
+        
+        return address + index - offset 
+    
+    def view_array(self, address, count, dtype=">u4"):
+        # Read-only numpy array sharing memory with the guest range 
+        if numpy is None:
+            raise RuntimeError("view_array requires numpy")
+        
+        dtype = numpy.dtype(dtype)
+        mem, offset = self._translate(address, dtype.itemsize * count)
+        
+        array = numpy.frombuffer(mem, dtype, count, offset)
+        array.flags.writeable = False 
+        
+        return array 
+    
+    @contextmanager
+    def edit_array(self, address, count, dtype=">u4"):
+        # Writable numpy array sharing memory with the guest range, for use in 
+        # a with statement. Writes through the array bypass the machine, so 
+        # the range is treated as written both when the with block is entered 
+        # (snapshots save the old contents) and when it is left (code decoded 
+        # in between is dropped). Snapshots taken inside the with block don't 
+        # see the writes made through the array. 
+        if numpy is None:
+            raise RuntimeError("edit_array requires numpy")
+        
+        dtype = numpy.dtype(dtype)
+        size = dtype.itemsize * count 
+        mem, offset = self._translate_write(address, size)
+        
+        array = numpy.frombuffer(mem, dtype, count, offset)
+        try:
+            yield array 
+        finally:
+            array.flags.writeable = False 
+            self._translate_write(address, size)
+    
     def read_byte(self, address):
-        return unpack("B", self.read_data(address, 1))[0]
+        mem, offset = self._translate(address, 1)
+        return mem[offset]
     
     def read_halfword(self, address):
-        return unpack(">H", self.read_data(address, 2))[0]
+        mem, offset = self._translate(address, 2)
+        return HALFWORD.unpack_from(mem, offset)[0]
     
     def read_word(self, address):
-        return unpack(">I", self.read_data(address, 4))[0]
+        mem, offset = self._translate(address, 4)
+        return WORD.unpack_from(mem, offset)[0]
     
     def write_byte(self, address, value):
-        self.write_data(address, pack("B", value&0xFF))
+        mem, offset = self._translate_write(address, 1)
+        mem[offset] = value & 0xFF
     
     def write_halfword(self, address, value):
-        self.write_data(address, pack(">H", value&0xFFFF))
+        mem, offset = self._translate_write(address, 2)
+        HALFWORD.pack_into(mem, offset, value & 0xFFFF)
     
     def write_word(self, address, value):
-        self.write_data(address, pack(">I", value&0xFFFFFFFF))
+        mem, offset = self._translate_write(address, 4)
+        WORD.pack_into(mem, offset, value & 0xFFFFFFFF)
     
     def goto(self, address):
         self.context.pc = address 
@@ -231,18 +626,218 @@ class Machine(object):
         if self.context.ctr < 0:
             self.context.ctr = 0xFFFFFFFF
     
+    def _decode_uncached(self, address, word):
+        hook = self.hooks.get(address)
+        if hook is not None:
+            instruction = HookInstruction(*hook)
+        else:
+            instruction = parse_instruction(word, address)
+        
+        self._decoded[address] = instruction 
+        self._code_pages.add(address >> PAGE_SHIFT)
+        return instruction 
+    
+    def decode(self, address):
+        instruction = self._decoded.get(address)
+        
+        if instruction is None:
+            assert address % 4 == 0
+            instruction = self._decode_uncached(address, self.read_word(address))
+        
+        return instruction 
+    
+    def predecode(self, address, size):
+        # Decodes all instructions in a range ahead of execution, words that 
+        # aren't valid instructions are left for execution to report. 
+        # Returns the number of decoded instructions. 
+        decoded = self._decoded 
+        hooks = self.hooks 
+        count = size // 4
+        
+        if numpy is not None:
+            words = self.view_array(address, count)
+            indices = numpy.flatnonzero(decodable_words(words))
+            items = zip(indices.tolist(), words[indices].tolist())
+        else:
+            items = enumerate(self.read_words(address, count))
+        
+        # Instructions without pc relative operands don't depend on their 
+        # address, so one instance is shared by all copies of the same word 
+        shared = {}
+        invalid = set()
+        result = 0
+        
+        for i, word in items:
+            pc = address + i*4
+            if pc in decoded or pc in hooks or word in invalid:
+                continue 
+            
+            instruction = shared.get(word)
+            if instruction is None:
+                try:
+                    instruction = parse_instruction(word, pc)
+                except RuntimeError:
+                    invalid.add(word)
+                    continue 
+                
+                if instruction.__class__.set_address is Instruction.set_address:
+                    shared[word] = instruction 
+            
+            decoded[pc] = instruction 
+            result += 1
+        
+        if result:
+            self._code_pages.update(range(address >> PAGE_SHIFT, ((address + size - 1) >> PAGE_SHIFT) + 1))
+        
+        return result 
+    
+    def add_hook(self, address, function, name=None):
+        # Replaces the function at address with function(machine), see hle.py 
+        self.hooks[address] = (function, name)
+        self._decoded.pop(address, None)
+        self._blocks.clear()
+        self._generation += 1
+    
+    def remove_hook(self, address):
+        del self.hooks[address]
+        self._decoded.pop(address, None)
+        self._blocks.clear()
+        self._generation += 1
+    
+    def set_engine(self, engine):
+        if engine == "interpreter":
+            self.step = self.execute_next 
+        elif engine == "blocks":
+            # Blocks aren't traced, step through instructions while tracing 
+            if self.tracer is not None:
+                self.step = self.execute_next 
+            else:
+                self.step = self.execute_block 
+        else:
+            raise RuntimeError("Unknown engine: {0}".format(engine))
+        
+        self.engine = engine 
+    
     def execute_next(self):
-        assert self.context.pc % 4 == 0
-        val = self.read_word(self.context.pc)
-        instruction = parse_instruction(val)
-        print(instruction)
-        self.context.pc += 4
+        pc = self.context.pc 
+        instruction = self._decoded.get(pc)
+        
+        if instruction is None:
+            assert pc % 4 == 0
+            instruction = self._decode_uncached(pc, self.read_word(pc))
+        
+        self.context.pc = pc + 4
         instruction.execute(self)
     
+    def _execute_next_traced(self):
+        pc = self.context.pc 
+        assert pc % 4 == 0
+        # Fetch through the class so the fetch isn't reported as a memory access 
+        word = Machine.read_word(self, pc)
+        
+        instruction = self._decoded.get(pc)
+        if instruction is None:
+            instruction = self._decode_uncached(pc, word)
+        
+        self.tracer.pre_execute(self, pc, word, instruction)
+        self.context.pc = pc + 4
+        instruction.execute(self)
+        
+        if self.context.pc != pc + 4:
+            self.tracer.branch_taken(self, pc, self.context.pc)
+        
+        self.tracer.post_execute(self, pc, instruction)
+    
+    def _traced_read(self, name):
+        read = getattr(Machine, name)
+        tracer = self.tracer 
+        
+        def traced(address, *args):
+            value = read(self, address, *args)
+            reported = _pack_words(value) if name == "read_words" else value 
+            size = TRACED_SIZES[name] or len(reported)
+            tracer.memory_access(self, address, size, reported, False)
+            return value 
+        
+        return traced 
+    
+    def _traced_write(self, name):
+        write = getattr(Machine, name)
+        tracer = self.tracer 
+        
+        def traced(address, value):
+            write(self, address, value)
+            reported = _pack_words(value) if name == "write_words" else value 
+            size = TRACED_SIZES[name] or len(reported)
+            tracer.memory_access(self, address, size, reported, True)
+        
+        return traced 
+    
+    def _traced_fill(self):
+        tracer = self.tracer 
+        
+        def traced(address, value, size):
+            Machine.fill(self, address, value, size)
+            tracer.memory_access(self, address, size, bytes((value & 0xFF, )) * size, True)
+        
+        return traced 
+    
+    def _traced_copy_within(self):
+        tracer = self.tracer 
+        
+        def traced(dest, source, size):
+            Machine.copy_within(self, dest, source, size)
+            data = Machine.read_data(self, dest, size)
+            tracer.memory_access(self, source, size, data, False)
+            tracer.memory_access(self, dest, size, data, True)
+        
+        return traced 
+    
+    def set_tracer(self, tracer):
+        # Tracing replaces the execution and memory access methods on the 
+        # instance, without a tracer the untraced class methods are used 
+        # and tracing costs nothing. Memory accesses are only wrapped for 
+        # tracers with traces_memory set. 
+        for name in TRACED_SIZES:
+            self.__dict__.pop(name, None)
+        self.__dict__.pop("execute_next", None)
+        self.tracer = tracer 
+        
+        if tracer is not None:
+            self.execute_next = self._execute_next_traced 
+        
+        if tracer is not None and getattr(tracer, "traces_memory", True):
+            for name in TRACED_SIZES:
+                if name.startswith("read"):
+                    setattr(self, name, self._traced_read(name))
+                elif name.startswith("write"):
+                    setattr(self, name, self._traced_write(name))
+                else:
+                    # fill and copy_within take other arguments 
+                    setattr(self, name, getattr(self, "_traced_" + name)())
+        
+        self.set_engine(self.engine)
+    
+    def execute_block(self):
+        # Runs the block at pc and then the blocks it continues into, as 
+        # long as they are already translated 
+        blocks = self._blocks 
+        pc = self.context.pc 
+        block = blocks.get(pc)
+        
+        if block is None:
+            block = translate_block(self, pc)
+            blocks[pc] = block 
+        
+        while block is not None:
+            block(self)
+            block = blocks.get(self.context.pc)
+    
     def execute_function(self):
         self.context.lr = 0xBABABAB0
+        step = self.step 
         while True:
-            self.execute_next()
+            step()
             #print(hex(self.context.lr), hex(self.context.pc))
             if self.context.pc == 0xBABABAB0:
                 break 
@@ -253,22 +848,79 @@ class Machine(object):
         
         for arg in args:
             if isinstance(arg, int):
-                self.context.gpr[gpr_arg] = arg
-                gpr_arg += 1
-                if gpr_arg > 8:
+                if gpr_arg > 10:
                     raise RuntimeError("Too many integer arguments")
+                self.context.gpr[gpr_arg] = arg & 0xFFFFFFFF
+                gpr_arg += 1
+            elif isinstance(arg, float):
+                if fpr_arg > 8:
+                    raise RuntimeError("Too many floating point arguments")
+                self.context.fpr[fpr_arg] = arg 
+                fpr_arg += 1
+            else:
+                raise RuntimeError("Unsupported argument type: {0}".format(type(arg)))
         
         self.goto(address)
         self.execute_function()
     
+    def snapshot(self):
+        # Writes are tracked per page from now on, so restoring only copies 
+        # back the pages written since the snapshot or the last restore 
+        snapshot = Snapshot(self.context.copy())
+        self._page_trackers.append(snapshot)
+        
+        return snapshot 
+    
+    def restore(self, snapshot):
+        sections = {section[0]: section for section in self.memory_sections}
+        
+        for (cached_start, page), data in snapshot.pages.items():
+            section = sections[cached_start]
+            offset = page << PAGE_SHIFT 
+            
+            for tracker in self._page_trackers:
+                if tracker is not snapshot:
+                    tracker.touch(section, page, page)
+            if self._code_pages and self._has_code(section, offset, len(data)):
+                self._invalidate_decoded(section[0], section[1], offset, len(data))
+            
+            section[3][offset:offset+len(data)] = data 
+        
+        snapshot.pages.clear()
+        self.context = snapshot.context.copy()
+    
+    def discard_snapshot(self, snapshot):
+        self._page_trackers.remove(snapshot)
+    
+    def call_function_batch(self, address, arguments, memory_regions=(), setup=None):
+        # Calls the function once per argument tuple, each call starts from 
+        # the machine state at the time of the first call. setup(machine, args) 
+        # can prepare memory before each call. Yields a CallResult per call. 
+        snapshot = self.snapshot()
+        
+        try:
+            for args in arguments:
+                self.restore(snapshot)
+                if setup is not None:
+                    setup(self, args)
+                
+                self.call_function(address, *args)
+                
+                memory = [self.read_data(start, size) for start, size in memory_regions]
+                yield CallResult(self.context.gpr[3], self.context.fpr[1], memory)
+        finally:
+            self.restore(snapshot)
+            self.discard_snapshot(snapshot)
+    
     def run(self):
+        step = self.step 
         while True:
-            self.execute_next()
+            step()
         
         
 class GCMachine(Machine):
-    def __init__(self, memsize=0x01800000):
-        super().__init__([(0x80000000, 0xC0000000, memsize)])
+    def __init__(self, memsize=0x01800000, lazy=True):
+        super().__init__([(0x80000000, 0xC0000000, memsize)], lazy)
 
 
     
@@ -0,0 +1,42 @@
+import multiprocessing
+from itertools import islice
+
+
+# Machine and call parameters of the job, only set in the worker processes by
+# _init_worker. Workers are forked with the job as the initializer arguments,
+# so they inherit the already loaded machine and its memory copy-on-write
+# instead of receiving it through a pipe.
+_worker_job = None
+
+
+def _init_worker(machine, address, memory_regions, setup):
+    global _worker_job
+    _worker_job = (machine, address, memory_regions, setup)
+
+
+def _run_chunk(arguments):
+    machine, address, memory_regions, setup = _worker_job
+    return list(machine.call_function_batch(address, arguments, memory_regions, setup))
+
+
+def _chunks(arguments, size):
+    arguments = iter(arguments)
+    while True:
+        chunk = list(islice(arguments, size))
+        if not chunk:
+            break
+        yield chunk
+
+
+def call_function_parallel(machine, address, arguments, memory_regions=(), setup=None,
+                           processes=None, chunksize=64):
+    # Parallel version of Machine.call_function_batch, argument tuples are
+    # distributed in chunks over forked worker processes and the CallResults
+    # are yielded in the order of the arguments. Needs the fork start method.
+    context = multiprocessing.get_context("fork")
+    job = (machine, address, memory_regions, setup)
+
+    with context.Pool(processes, initializer=_init_worker, initargs=job) as pool:
+        for results in pool.imap(_run_chunk, _chunks(arguments, chunksize)):
+            for result in results:
+                yield result
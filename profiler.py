@@ -0,0 +1,118 @@
+from hle import HookInstruction
+from instructions.branching import BranchConditionalToLR
+from tracing import Tracer
+
+
+class Profiler(Tracer):
+    # Counts executed instructions per guest call stack. Calls are taken
+    # branches with LK set, returns are taken blr and HLE hooks, which return
+    # to LR in place of the function they replace. Stacks are tuples of
+    # function entry addresses, the outermost function first.
+    #
+    # Blocks aren't traced, attaching the profiler to a machine using the
+    # blocks engine makes it step through single instructions until it is
+    # detached. Memory accesses aren't traced, which keeps the overhead to
+    # the per instruction callbacks.
+    traces_memory = False
+
+    def __init__(self, symbols=None):
+        self.symbols = symbols
+        self.counts = {}
+        self.calls = {}
+        self.stack = ()
+        self._count = 0
+
+    def reset(self):
+        self.counts = {}
+        self.calls = {}
+        self.stack = ()
+        self._count = 0
+
+    def _switch(self, stack):
+        # Instructions are counted in a plain int while the stack doesn't
+        # change and only added to the stack's total when it does
+        if self._count:
+            self.counts[self.stack] = self.counts.get(self.stack, 0) + self._count
+            self._count = 0
+        self.stack = stack
+
+    def flush(self):
+        self._switch(self.stack)
+
+    def pre_execute(self, machine, address, word, instruction):
+        if not self.stack:
+            # Whatever runs first is the root, e.g. the function called
+            # with Machine.call_function
+            self.stack = (address, )
+        self._count += 1
+
+    def post_execute(self, machine, address, instruction):
+        target = machine.context.pc
+        if isinstance(instruction, HookInstruction):
+            self._switch(self.stack[:-1])
+            return
+        if target == address + 4 or not instruction.ends_block:
+            return
+
+        if getattr(instruction, "LK", 0):
+            self.calls[target] = self.calls.get(target, 0) + 1
+            self._switch(self.stack + (target, ))
+        elif isinstance(instruction, BranchConditionalToLR):
+            self._switch(self.stack[:-1])
+
+    def function_name(self, address):
+        if self.symbols is not None:
+            symbol = self.symbols.lookup(address)
+            if symbol is not None:
+                return self.symbols.symbolize(address)
+
+        return "fn_{0:08x}".format(address)
+
+    def flat(self):
+        # Returns (function address, self count, cumulative count, calls)
+        # sorted by self count. Recursive functions are counted only once
+        # per stack for the cumulative count.
+        self.flush()
+        exclusive = {}
+        inclusive = {}
+
+        for stack, count in self.counts.items():
+            function = stack[-1]
+            exclusive[function] = exclusive.get(function, 0) + count
+            for function in set(stack):
+                inclusive[function] = inclusive.get(function, 0) + count
+
+        result = [(function, exclusive.get(function, 0), count, self.calls.get(function, 0))
+                  for function, count in inclusive.items()]
+        result.sort(key=lambda entry: (entry[1], entry[2]), reverse=True)
+
+        return result
+
+    def total(self):
+        self.flush()
+        return sum(self.counts.values())
+
+    def write_report(self, f, limit=30):
+        total = self.total() or 1
+        flat = self.flat()
+
+        f.write("{0:>12} {1:>7} {2:>12} {3:>7} {4:>8}  {5}\n".format(
+            "self", "%", "cumulative", "%", "calls", "function"))
+
+        for function, exclusive, inclusive, calls in flat[:limit]:
+            f.write("{0:>12} {1:>6.2f}% {2:>12} {3:>6.2f}% {4:>8}  {5}\n".format(
+                exclusive, exclusive * 100.0 / total,
+                inclusive, inclusive * 100.0 / total,
+                calls, self.function_name(function)))
+
+    def write_collapsed(self, f):
+        # One "outer;inner;innermost count" line per stack, the format read
+        # by flamegraph.pl and compatible tools
+        self.flush()
+        names = {}
+
+        for stack, count in sorted(self.counts.items()):
+            for function in stack:
+                if function not in names:
+                    names[function] = self.function_name(function)
+            f.write("{0} {1}\n".format(";".join(names[function] for function in stack), count))
@@ -0,0 +1,127 @@
+import sys
+from array import array
+from bisect import bisect_left, bisect_right
+
+from cache import load_cached
+
+
+def _is_hex(value):
+    try:
+        int(value, 16)
+    except ValueError:
+        return False
+    return True
+
+
+def parse_map_line(line):
+    # Parses a symbol line of a CodeWarrior map file, returns
+    # (address, size, name, object file) or None for any other line.
+    # Both the "offset size address alignment name object" layout and the
+    # newer layout with an additional file offset column are understood.
+    fields = line.split()
+    if len(fields) < 5:
+        return None
+
+    try:
+        size = int(fields[1], 16)
+        address = int(fields[2], 16)
+    except ValueError:
+        return None
+
+    rest = fields[3:]
+    if len(rest) >= 3 and len(rest[0]) == 8 and _is_hex(rest[0]):
+        # Skip file offset
+        rest = rest[1:]
+
+    if not rest[0].isdigit() or len(rest) < 2:
+        return None
+
+    name = rest[1]
+    obj = " ".join(rest[2:])
+
+    return address, size, name, obj
+
+
+class SymbolMap(object):
+    def __init__(self, symbols=()):
+        # Symbols are sorted by address, for symbols starting at the same
+        # address the smallest comes last so it wins containing lookups
+        symbols = sorted(symbols, key=lambda symbol: (symbol[0], -symbol[1]))
+
+        self.addresses = array("I", (symbol[0] for symbol in symbols))
+        self.sizes = array("I", (symbol[1] for symbol in symbols))
+        self.names = [sys.intern(symbol[2]) for symbol in symbols]
+        self.objects = [sys.intern(symbol[3]) for symbol in symbols]
+
+    @classmethod
+    def parse(cls, f):
+        symbols = []
+
+        for line in f:
+            symbol = parse_map_line(line)
+            # Section entries (.text, .data..) span whole object files
+            # and would shadow the symbols inside them
+            if symbol is None or symbol[2].startswith("."):
+                continue
+            symbols.append(symbol)
+
+        return cls(symbols)
+
+    @classmethod
+    def load(cls, path, use_cache=True):
+        # Parsed maps are cached next to the map file as .cache
+        return load_cached(cls, path, ".cache",
+                           lambda data: cls.parse(data.decode("utf-8", errors="replace").splitlines()),
+                           use_cache)
+
+    def __setstate__(self, state):
+        # Names loaded from the cache aren't interned anymore
+        self.__dict__.update(state)
+        self.names = [sys.intern(name) for name in self.names]
+        self.objects = [sys.intern(obj) for obj in self.objects]
+
+    def __len__(self):
+        return len(self.addresses)
+
+    def __getitem__(self, address):
+        # Name of the symbol starting exactly at address
+        i = bisect_left(self.addresses, address)
+        if i < len(self.addresses) and self.addresses[i] == address:
+            return self.names[i]
+
+        raise KeyError("No symbol at {0:x}".format(address))
+
+    def __contains__(self, address):
+        i = bisect_left(self.addresses, address)
+        return i < len(self.addresses) and self.addresses[i] == address
+
+    def lookup(self, address):
+        # Returns (start, size, name) of the symbol containing address or None
+        i = bisect_right(self.addresses, address) - 1
+        if i < 0:
+            return None
+
+        start = self.addresses[i]
+        size = self.sizes[i]
+        if address < start + size or address == start:
+            return start, size, self.names[i]
+
+        return None
+
+    def find(self, name):
+        # Address of the first symbol with that name, None if there is none
+        try:
+            return self.addresses[self.names.index(name)]
+        except ValueError:
+            return None
+
+    def symbolize(self, address):
+        symbol = self.lookup(address)
+        if symbol is None:
+            return "0x{0:08x}".format(address)
+
+        start, size, name = symbol
+        if address == start:
+            return name
+        else:
+            return "{0}+0x{1:x}".format(name, address - start)
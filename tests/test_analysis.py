@@ -0,0 +1,56 @@
+from io import BytesIO
+
+from analysis import ProgramIndex
+from assembler import BLR, addi, beq, bl, build_dol, li, nop
+from dolreader import DolFile
+
+
+TEXT = 0x80003100
+BCTRL = 0x4E800421
+
+CODE = [
+    bl(0x20),           # 80003100, calls the function at 80003120
+    beq(0xC),           # 80003104
+    BCTRL,              # 80003108
+    nop(),              # 8000310C
+    BLR,                # 80003110
+    nop(),
+    nop(),
+    nop(),
+    li(3, 1),           # 80003120
+    addi(3, 3, 1),
+    BLR,
+]
+
+
+def build_index():
+    return ProgramIndex.build(DolFile(BytesIO(build_dol([(TEXT, CODE)]))))
+
+
+def test_build():
+    index = build_index()
+
+    assert list(index.functions) == [TEXT, TEXT + 0x20]
+    assert list(index.calls_from(TEXT)) == [(TEXT, TEXT + 0x20)]
+    assert index.callers(TEXT + 0x20) == [TEXT]
+
+    # bctrl has no static target but the word after it starts a block
+    assert list(index.blocks) == [TEXT, TEXT + 4, TEXT + 8, TEXT + 0xC, TEXT + 0x10,
+                                  TEXT + 0x14, TEXT + 0x20]
+    assert index.block_at(TEXT + 0x18) == TEXT + 0x14
+    assert index.function_at(TEXT + 0x24) == TEXT + 0x20
+
+
+def test_load(tmp_path):
+    path = tmp_path / "game.dol"
+    path.write_bytes(build_dol([(TEXT, CODE)]))
+
+    built = ProgramIndex.load(str(path))
+    assert (tmp_path / "game.dol.index").exists()
+
+    cached = ProgramIndex.load(str(path))
+    expected = build_index()
+    for index in (built, cached):
+        assert index.functions == expected.functions
+        assert index.blocks == expected.blocks
+        assert index.calls_from(TEXT) == expected.calls_from(TEXT)
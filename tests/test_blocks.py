@@ -0,0 +1,64 @@
+import pytest
+
+from assembler import BLR, CODE_ADDRESS, addi, bdnz, cmpwi, li, load_code, lwz, mtctr, rlwinm, stw
+
+
+@pytest.mark.parametrize("engine", ["interpreter", "blocks"])
+def test_store_into_running_block(engine):
+    # stw overwrites the li r3, 1 that follows it with li r3, 42
+    words = [
+        stw(5, 8, 4),
+        li(0, 0),
+        li(3, 1),
+        BLR
+    ]
+    machine = load_code(words, engine=engine)
+    machine.context.gpr[4] = CODE_ADDRESS
+    machine.context.gpr[5] = li(3, 42)
+    machine.context.lr = CODE_ADDRESS + 0x100
+
+    while machine.context.pc != CODE_ADDRESS + 0x100:
+        machine.step()
+
+    assert machine.context.gpr[3] == 42
+
+
+@pytest.mark.parametrize("engine", ["interpreter", "blocks"])
+def test_unmapped_load_state(engine):
+    words = [
+        li(3, 7),
+        lwz(6, 0, 4),
+        BLR
+    ]
+    machine = load_code(words, engine=engine)
+    machine.context.gpr[4] = 0x10
+    machine.context.gpr[6] = 5
+
+    with pytest.raises(RuntimeError):
+        while True:
+            machine.step()
+
+    assert machine.context.gpr[3] == 7
+    assert machine.context.gpr[6] == 5
+    assert machine.context.pc == CODE_ADDRESS + 8
+
+
+def test_loop_block_matches_interpreter():
+    words = [
+        mtctr(3),
+        li(4, 0),
+        addi(4, 4, 3),
+        rlwinm(5, 4, 0, 31, 31, rc=1),
+        cmpwi(4, 10, crf=1),
+        bdnz(-12),
+        BLR
+    ]
+    results = []
+    for engine in ("interpreter", "blocks"):
+        machine = load_code(words, engine=engine)
+        machine.call_function(CODE_ADDRESS, 5)
+        results.append((list(machine.context.gpr), machine.context.cr.value, machine.context.ctr))
+
+    assert results[0] == results[1]
+    assert results[1][0][4] == 15
+    assert results[1][1] >> 24 == 0x44
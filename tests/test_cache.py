@@ -0,0 +1,29 @@
+import sys
+
+from symbolmap import SymbolMap
+
+
+MAP = """.text section layout
+  Starting        Virtual
+  address  Size   address
+  -----------------------
+  00000000 000020 80003100  4 memcpy \tRuntime.PPCEABI.H.a __mem.o
+  00000020 000010 80003120  4 strlen \tMSL_C.PPCEABI.bare.H.a string.o
+"""
+
+
+def test_symbol_map_cache(tmp_path):
+    path = tmp_path / "game.map"
+    path.write_text(MAP)
+
+    parsed = SymbolMap.load(str(path))
+    assert (tmp_path / "game.map.cache").exists()
+
+    cached = SymbolMap.load(str(path))
+    assert cached.names == parsed.names == ["memcpy", "strlen"]
+    assert list(cached.addresses) == [0x80003100, 0x80003120]
+    assert cached.names[0] is sys.intern("memcpy")
+
+    # A changed map file doesn't use the old cache
+    path.write_text(MAP.replace("strlen", "strcpy"))
+    assert SymbolMap.load(str(path)).names == ["memcpy", "strcpy"]
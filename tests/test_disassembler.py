@@ -0,0 +1,20 @@
+from io import BytesIO
+
+from assembler import BLR, addi, b, beq, bl, build_dol, li, lwz, nop
+from disassembler import disassemble, disassemble_parallel
+from dolreader import DolFile
+
+
+def test_parallel_matches_serial():
+    # Chunks of 4 words don't divide either section, branches repeat in
+    # different chunks and 0xFFFFFFFF doesn't decode
+    code = [li(3, 1), bl(0x10), beq(-4), 0xFFFFFFFF, addi(3, 3, 1), b(8),
+            lwz(4, 8, 1), bl(0x10), beq(-4), nop(), BLR]
+    dol = DolFile(BytesIO(build_dol([(0x80003100, code), (0x80004000, code[:5])])))
+
+    serial = list(disassemble(dol))
+    assert len(serial) == 16
+    assert [address for address, word, text in serial] == (
+        [0x80003100 + i*4 for i in range(11)] + [0x80004000 + i*4 for i in range(5)])
+
+    assert list(disassemble_parallel(dol, processes=2, chunk_words=4)) == serial
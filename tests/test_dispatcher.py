@@ -0,0 +1,154 @@
+from assembler import CODE_ADDRESS, DATA_ADDRESS, d_form, m_form, run_code, x_form
+from instructions.dispatcher import parse_instruction
+from instructions.loadstore import *
+from instructions.logical import *
+from instructions.comparison import CompareLogical
+from machine import EQ, GT, LT
+
+
+def decodes_to(word, cls):
+    assert parse_instruction(word, CODE_ADDRESS).__class__ is cls
+
+
+def test_rlwinm():
+    word = m_form(21, 4, 3, 8, 24, 31)
+    decodes_to(word, RotateLeftWordImmediateThenANDWithMask)
+    assert run_code([word], r4=0x12345678).context.gpr[3] == 0x12
+
+
+def test_rlwinm_wrapping_mask():
+    word = m_form(21, 4, 3, 0, 28, 3)
+    assert run_code([word], r4=0xFFFFFFFF).context.gpr[3] == 0xF000000F
+
+
+def test_rlwinm_record():
+    machine = run_code([m_form(21, 4, 3, 0, 0, 0, rc=1)], r4=0x80000000)
+    assert machine.context.gpr[3] == 0x80000000
+    assert machine.context.cr[0] == LT
+
+
+def test_rlwimi():
+    word = m_form(20, 4, 3, 16, 8, 15)
+    decodes_to(word, RotateLeftWordImmediateThenMaskInsert)
+    assert run_code([word], r3=0x11111111, r4=0x000000AB).context.gpr[3] == 0x11AB1111
+
+
+def test_rlwnm():
+    word = m_form(23, 4, 3, 5, 0, 31)
+    decodes_to(word, RotateLeftWordThenANDWithMask)
+    assert run_code([word], r4=0x80000001, r5=4).context.gpr[3] == 0x00000018
+    # Only the low 5 bits of RB are the rotate amount
+    assert run_code([word], r4=0x80000001, r5=36).context.gpr[3] == 0x00000018
+
+
+def test_lmw():
+    word = d_form(46, 29, 4, 0x10)
+    decodes_to(word, LoadMultipleWord)
+    machine = run_code([d_form(47, 29, 4, 0x10), word], r4=DATA_ADDRESS, r29=1, r30=2, r31=3)
+    machine.context.gpr[29:32] = [0, 0, 0]
+    machine.context.pc = CODE_ADDRESS + 4
+    machine.execute_next()
+    assert machine.context.gpr[29:32] == [1, 2, 3]
+
+
+def test_stmw():
+    word = d_form(47, 30, 4, -8)
+    decodes_to(word, StoreMultipleWord)
+    machine = run_code([word], r4=DATA_ADDRESS + 8, r30=0xDEADBEEF, r31=5)
+    assert machine.read_words(DATA_ADDRESS, 2) == [0xDEADBEEF, 5]
+
+
+def test_slw():
+    word = x_form(4, 3, 5, 24)
+    decodes_to(word, ShiftLeftWord)
+    assert run_code([word], r4=0x80000001, r5=4).context.gpr[3] == 0x10
+    assert run_code([word], r4=1, r5=32).context.gpr[3] == 0
+
+
+def test_srw():
+    word = x_form(4, 3, 5, 536)
+    decodes_to(word, ShiftRightWord)
+    assert run_code([word], r4=0x80000000, r5=4).context.gpr[3] == 0x08000000
+    assert run_code([word], r4=0x80000000, r5=32).context.gpr[3] == 0
+
+
+def test_sraw():
+    word = x_form(4, 3, 5, 792)
+    decodes_to(word, ShiftRightWordAlgebraic)
+    machine = run_code([word], r4=0xFFFFFFF1, r5=4)
+    assert machine.context.gpr[3] == 0xFFFFFFFF
+    assert machine.context.xer.CA == 1
+
+    machine = run_code([word], r4=0x80000000, r5=40)
+    assert machine.context.gpr[3] == 0xFFFFFFFF
+    assert machine.context.xer.CA == 1
+
+    machine = run_code([word], r4=0x70, r5=4)
+    assert machine.context.gpr[3] == 0x7
+    assert machine.context.xer.CA == 0
+
+
+def test_srawi():
+    word = x_form(4, 3, 4, 824)
+    decodes_to(word, ShiftRightWordAlgebraicImmediate)
+    machine = run_code([word], r4=0xFFFFFFF0)
+    assert machine.context.gpr[3] == 0xFFFFFFFF
+    # Only bits shifted out of a negative value set CA
+    assert machine.context.xer.CA == 0
+
+    machine = run_code([word], r4=0xFFFFFFF8)
+    assert machine.context.xer.CA == 1
+
+
+def test_cmplw():
+    word = x_form(1 << 2, 3, 4, 32)
+    decodes_to(word, CompareLogical)
+    # Unsigned compare, 0xFFFFFFFF is bigger than 1
+    assert run_code([word], r3=0xFFFFFFFF, r4=1).context.cr[1] == GT
+    assert run_code([word], r3=1, r4=0xFFFFFFFF).context.cr[1] == LT
+    assert run_code([word], r3=7, r4=7).context.cr[1] == EQ
+
+
+def _indexed_load(xo, cls, value, expected, size, update):
+    word = x_form(3, 4, 5, xo)
+    decodes_to(word, cls)
+
+    machine = run_code([], r4=DATA_ADDRESS, r5=8)
+    machine.write_data(DATA_ADDRESS + 8, value.to_bytes(size, "big"))
+    machine.write_word(CODE_ADDRESS, word)
+    machine.context.pc = CODE_ADDRESS
+    machine.execute_next()
+
+    assert machine.context.gpr[3] == expected
+    assert machine.context.gpr[4] == (DATA_ADDRESS + 8 if update else DATA_ADDRESS)
+
+
+def test_indexed_loads():
+    _indexed_load(23, LoadWordIndexed, 0x12345678, 0x12345678, 4, False)
+    _indexed_load(55, LoadWordUpdateIndexed, 0x12345678, 0x12345678, 4, True)
+    _indexed_load(87, LoadByteZeroIndexed, 0x9A, 0x9A, 1, False)
+    _indexed_load(119, LoadByteZeroUpdateIndexed, 0x9A, 0x9A, 1, True)
+    _indexed_load(279, LoadHalfwordZeroIndexed, 0x8001, 0x8001, 2, False)
+    _indexed_load(311, LoadHalfwordZeroUpdateIndexed, 0x8001, 0x8001, 2, True)
+    _indexed_load(343, LoadHalfwordAlgebraicIndexed, 0x8001, 0xFFFF8001, 2, False)
+    _indexed_load(375, LoadHalfwordAlgebraicUpdateIndexed, 0x8001, 0xFFFF8001, 2, True)
+
+
+def _indexed_store(xo, cls, size, update):
+    word = x_form(3, 4, 5, xo)
+    decodes_to(word, cls)
+
+    machine = run_code([word], r3=0x12345678, r4=DATA_ADDRESS, r5=8)
+    expected = (0x12345678 & ((1 << (size*8)) - 1)).to_bytes(size, "big")
+
+    assert machine.read_data(DATA_ADDRESS + 8, size) == expected
+    assert machine.context.gpr[4] == (DATA_ADDRESS + 8 if update else DATA_ADDRESS)
+
+
+def test_indexed_stores():
+    _indexed_store(151, StoreWordIndexed, 4, False)
+    _indexed_store(183, StoreWordUpdateIndexed, 4, True)
+    _indexed_store(215, StoreByteIndexed, 1, False)
+    _indexed_store(247, StoreByteUpdateIndexed, 1, True)
+    _indexed_store(407, StoreHalfwordIndexed, 2, False)
+    _indexed_store(439, StoreHalfwordUpdateIndexed, 2, True)
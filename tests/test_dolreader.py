@@ -0,0 +1,186 @@
+from io import BytesIO
+
+import pytest
+
+import dolreader
+from assembler import BLR, addi, b, beq, bl, build_dol, d_form, lis, lwz, nop
+from dolreader import DolFile, UnmappedAddress
+from machine import GCMachine
+
+
+TEXT = 0x80003100
+FUNCTION = 0x80003200
+DATA = 0x80100000
+TARGET = 0x80108000
+
+CODE = [
+    bl(0x100),          # 80003100, branches to FUNCTION
+    beq(0xFC),          # 80003104, branches to FUNCTION
+    b(0x200),           # 80003108
+    lis(3, 0x8011),     # 8000310C
+    addi(3, 3, -0x8000),
+    lis(4, 0x8010),     # 80003114
+    nop(),
+    d_form(24, 4, 4, 0x8000),   # ori r4, r4, 0x8000
+    lis(5, 0x8011),     # 80003120
+    lwz(6, -0x8000, 5),
+    lis(0, 0x8011),     # 80003128, RA = 0 in addi is 0, not r0
+    addi(3, 0, -0x8000),
+    BLR,
+]
+
+FUNCTION_CODE = [
+    nop(),              # 80003200
+    b(-4),              # 80003204, branches to FUNCTION
+]
+
+
+@pytest.fixture(params=["numpy", "lists"])
+def dol(request, monkeypatch):
+    if request.param == "numpy":
+        pytest.importorskip("numpy")
+    else:
+        monkeypatch.setattr(dolreader, "numpy", None)
+
+    return DolFile(BytesIO(build_dol([(TEXT, CODE), (FUNCTION, FUNCTION_CODE)],
+                                     [(DATA, b"\x00abcXabdX")])))
+
+
+def test_find_branch_xrefs(dol):
+    assert dol.find_branch_xrefs(FUNCTION) == [TEXT, TEXT + 4, FUNCTION + 4]
+    assert dol.find_branch_xrefs(FUNCTION, conditional=False) == [TEXT, FUNCTION + 4]
+    assert dol.find_branch_xrefs(TEXT + 0x208) == [TEXT + 8]
+
+
+def test_find_address_references(dol):
+    assert dol.find_address_references(TARGET) == [
+        (TEXT + 0xC, TEXT + 0x10), (TEXT + 0x20, TEXT + 0x24)]
+    assert dol.find_address_references(TARGET, window=2) == [
+        (TEXT + 0xC, TEXT + 0x10), (TEXT + 0x14, TEXT + 0x1C), (TEXT + 0x20, TEXT + 0x24)]
+
+
+def test_find_words(dol):
+    # Any lis followed by any word
+    assert dol.find_words([(lis(0, 0), 0xFC1F0000), (0, 0)]) == [
+        TEXT + 0xC, TEXT + 0x14, TEXT + 0x20, TEXT + 0x28]
+    assert dol.find_words([(nop(), 0xFFFFFFFF), (b(-4), 0xFFFFFFFF)]) == [FUNCTION]
+
+
+def test_find_bytes(dol):
+    assert dol.find_bytes(b"abc") == [DATA + 1]
+    assert dol.find_bytes(b"abcX", [0xFF, 0xFF, 0x00, 0xFF]) == [DATA + 1, DATA + 5]
+
+
+# Data sections placed back to back, with a table of (short, short, int)
+# entries in the first one
+TABLE = b"".join(bytes([0, i, 0, 0]) + (0x80000000 + i).to_bytes(4, "big") for i in range(4))
+DATA_SECTIONS = [(DATA, TABLE), (DATA + len(TABLE), b"\x01\x02\x03\x04")]
+
+
+def build_data_dol():
+    return build_dol([(TEXT, CODE)], DATA_SECTIONS)
+
+
+def test_read_array():
+    dol = DolFile(BytesIO(build_data_dol()))
+
+    assert dol.read_array(DATA + 8, ">HHI", 3) == [(i, 0, 0x80000000 + i) for i in range(1, 4)]
+    assert dol.read_array(DATA + len(TABLE), ">I", 1) == [(0x01020304, )]
+
+    # Adjacent sections aren't contiguous in the file, reads can't cross them
+    with pytest.raises(RuntimeError):
+        dol.read_array(DATA + 8, ">HHI", 4)
+    with pytest.raises(UnmappedAddress):
+        dol.read_array(DATA + len(TABLE) + 4, ">I", 1)
+    with pytest.raises(UnmappedAddress):
+        dol.read_array(DATA - 4, ">I", 2)
+
+
+def test_read_array_numpy():
+    numpy = pytest.importorskip("numpy")
+    dol = DolFile(BytesIO(build_data_dol()))
+
+    dtype = numpy.dtype([("id", ">u2"), ("padding", ">u2"), ("pointer", ">u4")])
+    array = dol.read_array_numpy(DATA + 8, dtype, 3)
+    assert array["id"].tolist() == [1, 2, 3]
+    assert array["pointer"].tolist() == [0x80000001, 0x80000002, 0x80000003]
+    assert [tuple(entry) for entry in array.tolist()] == dol.read_array(DATA + 8, ">HHI", 3)
+
+    with pytest.raises(RuntimeError):
+        dol.read_array_numpy(DATA + 8, dtype, 4)
+    with pytest.raises(UnmappedAddress):
+        dol.read_array_numpy(DATA - 8, dtype, 1)
+
+
+def test_mmap_matches_copy(tmp_path):
+    path = tmp_path / "game.dol"
+    path.write_bytes(build_data_dol())
+
+    with open(str(path), "rb") as f:
+        copied = DolFile(f)
+    with open(str(path), "rb") as f:
+        mapped = DolFile(f, use_mmap=True)
+
+    assert mapped.sections == copied.sections
+    assert mapped.text_sections == copied.text_sections
+    assert mapped.entrypoint == copied.entrypoint
+    for offset, address, size in copied.sections:
+        with mapped.view(offset, size) as a, copied.view(offset, size) as b:
+            assert bytes(a) == bytes(b)
+
+    assert mapped.read_array(DATA, ">HHI", 4) == copied.read_array(DATA, ">HHI", 4)
+    for dol in (mapped, copied):
+        dol.seek(DATA + len(TABLE))
+        assert dol.read(4) == b"\x01\x02\x03\x04"
+
+    # Writes only change the mapped copy, and it can't grow
+    mapped.seek(DATA)
+    mapped.write(b"\xFF")
+    assert mapped.read_array(DATA, ">B", 1) == [(0xFF, )]
+    assert path.read_bytes() == build_data_dol()
+    with pytest.raises(RuntimeError):
+        mapped.allocate_data_section(0x20)
+
+
+def test_load_dol_mmap(tmp_path):
+    path = tmp_path / "game.dol"
+    path.write_bytes(build_data_dol())
+
+    machines = []
+    for use_mmap in (False, True):
+        machine = GCMachine()
+        with open(str(path), "rb") as f:
+            machine.load_dol(f, use_mmap=use_mmap)
+        machines.append(machine)
+
+    for machine in machines:
+        assert machine.read_words(TEXT, len(CODE)) == CODE
+        assert machine.read_data(DATA, len(TABLE) + 4) == TABLE + b"\x01\x02\x03\x04"
+
+
+def test_resolve_address():
+    # The data sections lie above the text section with a gap in between
+    dol = DolFile(BytesIO(build_data_dol()))
+    text_offset = dol.text_sections[0][0]
+    end = DATA + len(TABLE) + 4
+
+    for address, offset in [(TEXT + 8, text_offset + 8), (DATA + 4, 0x100 + len(CODE)*4 + 4),
+                            (DATA + len(TABLE), 0x100 + len(CODE)*4 + len(TABLE)),
+                            (TEXT, text_offset), (TEXT + len(CODE)*4 - 1, text_offset + len(CODE)*4 - 1)]:
+        dol.seek(address)
+        assert dol._rawdata.tell() == offset
+
+    # The section of the last lookup isn't used past its end
+    dol.seek(DATA + len(TABLE) - 4)
+    dol.seek(DATA + len(TABLE))
+    assert dol.read(4) == b"\x01\x02\x03\x04"
+    for address in (end, TEXT - 4, TEXT + len(CODE)*4, 0x80000000):
+        with pytest.raises(UnmappedAddress):
+            dol.seek(address)
+
+    # New sections are added to the index
+    offset, address, size = dol.allocate_data_section(0x20)
+    assert address >= TEXT + len(CODE)*4
+    dol.seek(address + 0x1C)
+    dol.write(b"abcd")
+    assert dol.read_array(address + 0x1C, ">4s", 1) == [(b"abcd", )]
@@ -0,0 +1,63 @@
+import os
+import zlib
+
+import pytest
+
+from machine import DUMP_INDEX, PAGE_SIZE, Machine
+
+
+SECTIONS = [(0x80000000, 0xC0000000, 0x10000), (0x90000000, 0xD0000000, 0x4000)]
+
+
+def read_dump(path):
+    with open(path, "rb") as f:
+        data = f.read()
+    if path.endswith(".zlib"):
+        data = zlib.decompress(data)
+
+    return data
+
+
+def rebuild(paths):
+    # Memory contents from a full dump followed by incremental dumps
+    full, incremental = paths[0], paths[1:]
+    memory = {start: bytearray(read_dump(path)) for (start, _, size), path in zip(SECTIONS, full)}
+
+    for index_path, data_path in incremental:
+        with open(index_path, "rb") as f:
+            index = list(DUMP_INDEX.iter_unpack(f.read()))
+        data = read_dump(data_path)
+        assert len(data) == len(index) * PAGE_SIZE
+
+        for i, (start, page) in enumerate(index):
+            memory[start][page*PAGE_SIZE:(page+1)*PAGE_SIZE] = data[i*PAGE_SIZE:(i+1)*PAGE_SIZE]
+
+    return memory
+
+
+@pytest.mark.parametrize("compression", [None, "zlib"])
+def test_incremental_dump_round_trip(tmp_path, compression):
+    machine = Machine(SECTIONS)
+    machine.write_data(0x80000010, b"before")
+    dumps = [machine.dump_memory(str(tmp_path), incremental=True, compression=compression, chunk_size=0x3000)]
+    assert len(dumps[0]) == 2
+
+    # Through the uncached mirror, across a page boundary and in the
+    # second section
+    machine.write_word(0xC0000010, 0x12345678)
+    machine.write_data(0x80001FFE, b"span")
+    machine.fill(0x90003000, 0xAB, 0x10)
+    index_path, data_path = machine.dump_memory(str(tmp_path), incremental=True, compression=compression)
+    assert os.path.getsize(index_path) == 4 * DUMP_INDEX.size
+    dumps.append((index_path, data_path))
+
+    machine.copy_within(0x80008000, 0x80000010, 8)
+    dumps.append(tuple(machine.dump_memory(str(tmp_path), incremental=True, compression=compression)))
+
+    # Nothing written since the last dump
+    dumps.append(tuple(machine.dump_memory(str(tmp_path), incremental=True, compression=compression)))
+    assert os.path.getsize(dumps[-1][0]) == 0
+
+    memory = rebuild(dumps)
+    for start, _, size in SECTIONS:
+        assert memory[start] == machine.read_data(start, size)
@@ -0,0 +1,33 @@
+from assembler import CODE_ADDRESS, DATA_ADDRESS, load_code
+from hle import SIGNATURES, apply_hle
+
+
+def load_signature(name):
+    # The signature values are the stock code with zero branch displacements
+    words = [value for value, mask in SIGNATURES[name]]
+    return load_code(words), len(words)
+
+
+def test_strlen_signature():
+    machine, count = load_signature("strlen")
+    # bne back to the lbzu
+    machine.write_word(CODE_ADDRESS + 5*4, 0x40820000 | (-12 & 0xFFFC))
+    machine.write_data(DATA_ADDRESS, b"hello\x00")
+
+    machine.call_function(CODE_ADDRESS, DATA_ADDRESS)
+    assert machine.context.gpr[3] == 5
+
+    found = apply_hle(machine, ranges=[(CODE_ADDRESS, count*4)])
+    assert found == {CODE_ADDRESS: "strlen"}
+
+    machine.write_data(DATA_ADDRESS, b"hello world\x00")
+    machine.call_function(CODE_ADDRESS, DATA_ADDRESS)
+    assert machine.context.gpr[3] == 11
+
+
+def test_unknown_signature_skipped():
+    machine, count = load_signature("strlen")
+    signatures = {"OSReport": SIGNATURES["strlen"]}
+
+    assert apply_hle(machine, signatures=signatures, ranges=[(CODE_ADDRESS, count*4)]) == {}
+    assert not machine.hooks
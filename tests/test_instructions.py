@@ -0,0 +1,111 @@
+from assembler import CODE_ADDRESS, DATA_ADDRESS, bdnz, bdz, beq, bne, cmpwi, d_form, mtctr, run_code, x_form
+from machine import EQ, GT, LT
+
+
+def test_nand():
+    assert run_code([x_form(4, 3, 5, 476)], r4=0xF0F0F0F0, r5=0xFF00FF00).context.gpr[3] == 0x0FFF0FFF
+
+
+def test_nor():
+    assert run_code([x_form(4, 3, 5, 124)], r4=0xF0F0F0F0, r5=0x0000FF00).context.gpr[3] == 0x0F0F000F
+
+
+def test_eqv():
+    assert run_code([x_form(4, 3, 5, 284)], r4=0xF0F0F0F0, r5=0xFF00FF00).context.gpr[3] == 0xF00FF00F
+
+
+def test_andc():
+    assert run_code([x_form(4, 3, 5, 60)], r4=0xF0F0F0F0, r5=0xFF00FF00).context.gpr[3] == 0x00F000F0
+
+
+def test_orc():
+    assert run_code([x_form(4, 3, 5, 412)], r4=0x000000F0, r5=0xFF00FF00).context.gpr[3] == 0x00FF00FF
+
+
+def test_extsb_extsh_cntlzw_read_rs():
+    # The source is RS, the destination RA
+    assert run_code([x_form(4, 3, 0, 954)], r4=0x80).context.gpr[3] == 0xFFFFFF80
+    assert run_code([x_form(4, 3, 0, 922)], r4=0x8000).context.gpr[3] == 0xFFFF8000
+    assert run_code([x_form(4, 3, 0, 26)], r4=0x00010000).context.gpr[3] == 15
+
+
+def test_srawi_mask():
+    # -3 >> 1 shifts out a one bit, -4 >> 1 doesn't
+    word = x_form(4, 3, 1, 824)
+    assert run_code([word], r4=-3).context.xer.CA == 1
+    assert run_code([word], r4=-4).context.xer.CA == 0
+
+
+def test_sraw_mask():
+    word = x_form(4, 3, 5, 792)
+    assert run_code([word], r4=-3, r5=1).context.xer.CA == 1
+    assert run_code([word], r4=-4, r5=1).context.xer.CA == 0
+
+
+def test_cmplwi_unsigned_immediate():
+    # Sign extending 0x8000 would make the immediate the bigger value
+    assert run_code([d_form(10, 0, 3, 0x8000)], r3=0x9000).context.cr[0] == GT
+    assert run_code([d_form(10, 0, 3, 0x8000)], r3=0x8000).context.cr[0] == EQ
+
+
+def test_andi_records():
+    machine = run_code([d_form(28, 4, 3, 0x00F0)], r4=0x0F0F)
+    assert machine.context.gpr[3] == 0
+    assert machine.context.cr[0] == EQ
+
+    machine = run_code([d_form(29, 4, 3, 0x8000)], r4=0x80000000)
+    assert machine.context.gpr[3] == 0x80000000
+    assert machine.context.cr[0] == LT
+
+
+def test_branch_link_return_address():
+    machine = run_code([(18 << 26) | 0x10 | 1])
+    assert machine.context.pc == CODE_ADDRESS + 0x10
+    assert machine.context.lr == CODE_ADDRESS + 4
+
+
+def test_branch_conditional_link_return_address():
+    # bcl 20, 0 (always)
+    machine = run_code([(16 << 26) | (20 << 21) | 0x10 | 1])
+    assert machine.context.pc == CODE_ADDRESS + 0x10
+    assert machine.context.lr == CODE_ADDRESS + 4
+
+
+
+def test_branch_on_condition_bit():
+    for r3, branch, taken in ((0, beq, True), (1, beq, False), (0, bne, False), (1, bne, True)):
+        machine = run_code([cmpwi(3, 0), branch(0x10)], r3=r3)
+        assert machine.context.pc == (CODE_ADDRESS + 4 + 0x10 if taken else CODE_ADDRESS + 8)
+
+
+def test_branch_on_counter():
+    for r3, branch, taken in ((2, bdnz, True), (1, bdnz, False), (2, bdz, False), (1, bdz, True)):
+        machine = run_code([mtctr(3), branch(0x10)], r3=r3)
+        assert machine.context.ctr == r3 - 1
+        assert machine.context.pc == (CODE_ADDRESS + 4 + 0x10 if taken else CODE_ADDRESS + 8)
+
+
+def test_branch_backwards():
+    machine = run_code([(18 << 26) | (-8 & 0x03FFFFFC)])
+    assert machine.context.pc == CODE_ADDRESS - 8
+
+
+def test_lhz_keeps_ra():
+    machine = run_code([d_form(40, 3, 4, 2)], r4=DATA_ADDRESS)
+    assert machine.context.gpr[4] == DATA_ADDRESS
+
+
+def test_lwzx_keeps_ra():
+    machine = run_code([x_form(3, 4, 5, 23)], r4=DATA_ADDRESS, r5=4)
+    assert machine.context.gpr[4] == DATA_ADDRESS
+
+
+def test_ra_zero_base():
+    # RA of 0 means a base of 0, not the value of r0
+    assert run_code([d_form(14, 3, 0, 5)], r0=0x100).context.gpr[3] == 5
+    assert run_code([d_form(15, 3, 0, 1)], r0=0x100).context.gpr[3] == 0x10000
+
+    # stwx r4, 0, r5; lwzx r3, 0, r5
+    machine = run_code([x_form(4, 0, 5, 151), x_form(3, 0, 5, 23)], r0=4, r4=0x1234, r5=DATA_ADDRESS)
+    assert machine.read_word(DATA_ADDRESS) == 0x1234
+    assert machine.context.gpr[3] == 0x1234
@@ -0,0 +1,96 @@
+import pytest
+
+import machine as machine_module
+from assembler import BLR, CODE_ADDRESS, DATA_ADDRESS, addi, beq, bl, li, load_code
+from instructions.dispatcher import parse_instruction
+from machine import GCMachine
+
+
+def test_view_is_read_only():
+    machine = GCMachine()
+    machine.write_data(DATA_ADDRESS, b"abcd")
+
+    view = machine.view(DATA_ADDRESS, 4)
+    assert bytes(view) == b"abcd"
+    with pytest.raises(TypeError):
+        view[0] = 0
+
+
+def test_restore_invalidates_only_code_pages():
+    machine = load_code([li(3, 1), BLR])
+    machine.call_function(CODE_ADDRESS)
+
+    snapshot = machine.snapshot()
+    machine.write_word(DATA_ADDRESS, 5)
+    machine.restore(snapshot)
+    assert CODE_ADDRESS in machine._decoded
+
+    machine.write_word(CODE_ADDRESS, li(3, 2))
+    machine.call_function(CODE_ADDRESS)
+    assert machine.context.gpr[3] == 2
+
+    machine.restore(snapshot)
+    machine.call_function(CODE_ADDRESS)
+    assert machine.context.gpr[3] == 1
+
+
+def test_view_array_is_read_only():
+    machine = GCMachine()
+    machine.write_words(DATA_ADDRESS, [1, 2])
+
+    array = machine.view_array(DATA_ADDRESS, 2)
+    assert array.tolist() == [1, 2]
+    with pytest.raises(ValueError):
+        array[0] = 0
+
+
+def test_edit_array_snapshot_restore():
+    machine = load_code([li(3, 1), BLR])
+    machine.call_function(CODE_ADDRESS)
+    snapshot = machine.snapshot()
+
+    with machine.edit_array(DATA_ADDRESS, 2) as array:
+        array[:] = [7, 8]
+    assert machine.read_words(DATA_ADDRESS, 2) == [7, 8]
+
+    # Code decoded while the array is open is dropped when it is closed
+    with machine.edit_array(CODE_ADDRESS, 1) as array:
+        machine.call_function(CODE_ADDRESS)
+        array[0] = li(3, 2)
+    machine.call_function(CODE_ADDRESS)
+    assert machine.context.gpr[3] == 2
+
+    machine.restore(snapshot)
+    assert machine.read_words(DATA_ADDRESS, 2) == [0, 0]
+    machine.call_function(CODE_ADDRESS)
+    assert machine.context.gpr[3] == 1
+
+
+@pytest.mark.parametrize("use_numpy", [True, False])
+def test_predecode(monkeypatch, use_numpy):
+    if use_numpy:
+        pytest.importorskip("numpy")
+    else:
+        monkeypatch.setattr(machine_module, "numpy", None)
+
+    # Repeated words, pc relative branches and a word that doesn't decode
+    words = [li(3, 1), bl(0x10), li(3, 1), bl(0x10), 0xFFFFFFFF, beq(-8), addi(3, 3, 1), BLR]
+    machine = load_code(words)
+    assert machine.predecode(CODE_ADDRESS, len(words) * 4) == 7
+
+    for i, word in enumerate(words):
+        pc = CODE_ADDRESS + i*4
+        if word == 0xFFFFFFFF:
+            assert pc not in machine._decoded
+            continue
+
+        expected = parse_instruction(word, pc)
+        assert machine._decoded[pc].__class__ is expected.__class__
+        assert str(machine._decoded[pc]) == str(expected)
+
+    machine.write_word(CODE_ADDRESS + 0x18, addi(3, 3, 5))
+    assert CODE_ADDRESS + 0x18 not in machine._decoded
+    assert CODE_ADDRESS + 0x14 in machine._decoded
+
+    machine.call_function(CODE_ADDRESS + 0x18)
+    assert machine.context.gpr[3] == 5
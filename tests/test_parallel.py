@@ -0,0 +1,14 @@
+from assembler import BLR, CODE_ADDRESS, addi, load_code
+from parallel import call_function_parallel
+
+
+def test_interleaved_calls():
+    machine = load_code([addi(3, 3, 1), BLR, addi(3, 3, 2), BLR])
+
+    first = call_function_parallel(machine, CODE_ADDRESS, [(i, ) for i in range(8)], processes=2, chunksize=2)
+    assert next(first).r3 == 1
+
+    # A second run can start while the first one is only partly consumed
+    second = call_function_parallel(machine, CODE_ADDRESS + 8, [(i, ) for i in range(8)], processes=2, chunksize=2)
+    assert [result.r3 for result in second] == list(range(2, 10))
+    assert [result.r3 for result in first] == list(range(2, 9))
@@ -0,0 +1,38 @@
+from assembler import BLR, CODE_ADDRESS, bl, load_code, mflr, mtlr
+from profiler import Profiler
+
+
+HOOK = CODE_ADDRESS + 0x100
+
+
+def test_hook_returns_pop_stack():
+    # Calls the function at hook twice, which is replaced by a hook
+    machine = load_code([mflr(31), bl(0xFC), bl(0xF8), mtlr(31), BLR])
+    machine.add_hook(HOOK, lambda machine: 0, "hook")
+
+    profiler = Profiler()
+    machine.set_tracer(profiler)
+    machine.call_function(CODE_ADDRESS)
+    profiler.flush()
+
+    assert profiler.calls == {HOOK: 2}
+    assert profiler.counts == {(CODE_ADDRESS, ): 5, (CODE_ADDRESS, HOOK): 2}
+
+
+def test_profiler_steps_blocks_engine():
+    machine = load_code([mflr(31), bl(0xFC), bl(0xF8), mtlr(31), BLR], engine="blocks")
+    machine.write_words(HOOK, [BLR])
+
+    profiler = Profiler()
+    machine.set_tracer(profiler)
+    # Instructions are stepped through and memory accessors aren't wrapped
+    assert machine.step == machine.execute_next
+    assert "read_word" not in machine.__dict__
+
+    machine.call_function(CODE_ADDRESS)
+    profiler.flush()
+    assert profiler.calls == {HOOK: 2}
+    assert profiler.counts == {(CODE_ADDRESS, ): 5, (CODE_ADDRESS, HOOK): 2}
+
+    machine.set_tracer(None)
+    assert machine.step == machine.execute_block
@@ -0,0 +1,66 @@
+from io import BytesIO
+
+from assembler import CODE_ADDRESS, DATA_ADDRESS, load_code, stw
+from machine import GCMachine
+from tracing import BinaryTraceWriter, Tracer, read_trace
+
+
+def test_binary_trace_round_trip():
+    f = BytesIO()
+    writer = BinaryTraceWriter(f)
+    machine = load_code([stw(3, 0, 4)])
+    machine.set_tracer(writer)
+
+    machine.context.gpr[3] = 0x12345678
+    machine.context.gpr[4] = DATA_ADDRESS
+    machine.execute_next()
+    writer.flush()
+
+    f.seek(0)
+    steps = list(read_trace(f))
+    assert len(steps) == 1
+    assert steps[0].address == CODE_ADDRESS
+    assert steps[0].memory == [(DATA_ADDRESS, b"\x12\x34\x56\x78")]
+
+
+def test_binary_trace_large_write():
+    # Writes are stored as a single record no matter their size
+    f = BytesIO()
+    writer = BinaryTraceWriter(f)
+    machine = GCMachine()
+    data = bytes(range(256)) * 0x100
+
+    writer.pre_execute(machine, CODE_ADDRESS, 0, None)
+    writer.memory_access(machine, DATA_ADDRESS, len(data), data, True)
+    writer.post_execute(machine, CODE_ADDRESS, None)
+    writer.flush()
+
+    f.seek(0)
+    step, = read_trace(f)
+    assert step.memory == [(DATA_ADDRESS, data)]
+
+
+class AccessTracer(Tracer):
+    def __init__(self):
+        self.accesses = []
+
+    def memory_access(self, machine, address, size, value, write):
+        self.accesses.append((address, size, bytes(value), write))
+
+
+def test_bulk_accesses_traced():
+    machine = GCMachine()
+    machine.write_data(DATA_ADDRESS, b"abc\x00")
+    tracer = AccessTracer()
+    machine.set_tracer(tracer)
+
+    machine.fill(DATA_ADDRESS + 0x10, 0x1FF, 3)
+    machine.copy_within(DATA_ADDRESS + 0x20, DATA_ADDRESS, 4)
+    assert machine.read_string(DATA_ADDRESS) == b"abc"
+
+    assert tracer.accesses == [
+        (DATA_ADDRESS + 0x10, 3, b"\xFF\xFF\xFF", True),
+        (DATA_ADDRESS, 4, b"abc\x00", False),
+        (DATA_ADDRESS + 0x20, 4, b"abc\x00", True),
+        (DATA_ADDRESS, 3, b"abc", False)
+    ]
@@ -0,0 +1,217 @@
+from collections import namedtuple
+from struct import Struct 
+
+from disassembler import disassemble_word
+
+
+class Tracer(object):
+    # Base class for tracers attached with Machine.set_tracer, all callbacks
+    # default to doing nothing so subclasses only override what they need.
+    # Tracers that don't need memory_access can set traces_memory to False,
+    # the memory accessors then aren't wrapped.
+    traces_memory = True
+
+    def pre_execute(self, machine, address, word, instruction):
+        pass
+
+    def post_execute(self, machine, address, instruction):
+        pass
+
+    def branch_taken(self, machine, address, target):
+        pass
+
+    def memory_access(self, machine, address, size, value, write):
+        pass
+
+
+class TextTraceWriter(Tracer):
+    # Streams disassembly of every executed instruction to a text file,
+    # lines are collected and written out in large chunks
+    def __init__(self, f, memory=False, chunk_lines=0x4000):
+        self.f = f
+        self.memory = memory
+        self.traces_memory = memory
+        self.chunk_lines = chunk_lines
+        self.lines = []
+
+    def pre_execute(self, machine, address, word, instruction):
+        self.lines.append("{0:08x}: {1:08x}  {2}\n".format(address, word, instruction))
+        if len(self.lines) >= self.chunk_lines:
+            self.flush()
+
+    def branch_taken(self, machine, address, target):
+        self.lines.append("          -> {0:08x}\n".format(target))
+
+    def memory_access(self, machine, address, size, value, write):
+        if not self.memory:
+            return
+
+        if isinstance(value, int):
+            value = "{0:x}".format(value)
+        else:
+            value = value.hex()
+
+        if write:
+            self.lines.append("          write {0:08x} [{1}] = {2}\n".format(address, size, value))
+        else:
+            self.lines.append("          read {0:08x} [{1}] = {2}\n".format(address, size, value))
+
+    def flush(self):
+        self.f.write("".join(self.lines))
+        self.lines = []
+
+    def close(self):
+        self.flush()
+        self.f.close()
+
+
+# Binary trace format
+#
+# Header: magic "PPCT", version (u16), flags (u16)
+# Each step: pc (u32), instruction word (u32), register count (u8),
+# memory write count (u32), followed by register changes as index (u8) and
+# value (u32), then memory writes as address (u32), size (u32) and the
+# written bytes. All values are big endian. Register indices 0-31 are the
+# GPRs, the rest are listed in TRACE_REGISTERS.
+
+TRACE_MAGIC = b"PPCT"
+TRACE_VERSION = 2
+
+TRACE_FLAG_REGISTERS = 1
+TRACE_FLAG_MEMORY = 2
+
+TRACE_REGISTERS = ("lr", "ctr", "cr", "xer")
+
+_header = Struct(">4sHH")
+_step = Struct(">IIBI")
+_register = Struct(">BI")
+_memory_write = Struct(">II")
+
+TraceStep = namedtuple("TraceStep", ("address", "word", "registers", "memory"))
+
+
+def _special_registers(context):
+    return (context.lr, context.ctr, context.cr.to_value(), context.xer.to_value())
+
+
+class BinaryTraceWriter(Tracer):
+    def __init__(self, f, registers=True, memory=True, chunk_size=0x100000):
+        self.f = f
+        self.registers = registers
+        self.memory = memory
+        self.traces_memory = memory
+        self.chunk_size = chunk_size
+        self.buffer = bytearray()
+
+        self._address = None
+        self._word = None
+        self._gpr = None
+        self._special = None
+        self._writes = []
+
+        flags = 0
+        if registers:
+            flags |= TRACE_FLAG_REGISTERS
+        if memory:
+            flags |= TRACE_FLAG_MEMORY
+
+        f.write(_header.pack(TRACE_MAGIC, TRACE_VERSION, flags))
+
+    def pre_execute(self, machine, address, word, instruction):
+        self._address = address
+        self._word = word
+
+        if self.registers:
+            self._gpr = list(machine.context.gpr)
+            self._special = _special_registers(machine.context)
+
+    def memory_access(self, machine, address, size, value, write):
+        if write and self.memory:
+            if isinstance(value, int):
+                value = (value & ((1 << (size*8)) - 1)).to_bytes(size, "big")
+            self._writes.append((address, bytes(value)))
+
+    def post_execute(self, machine, address, instruction):
+        changed = []
+
+        if self.registers:
+            gpr = machine.context.gpr
+            for i, value in enumerate(self._gpr):
+                if gpr[i] != value:
+                    changed.append((i, gpr[i]))
+
+            special = _special_registers(machine.context)
+            for i, value in enumerate(self._special):
+                if special[i] != value:
+                    changed.append((32 + i, special[i]))
+
+        writes = self._writes
+
+        buffer = self.buffer
+        buffer += _step.pack(self._address, self._word, len(changed), len(writes))
+        for index, value in changed:
+            buffer += _register.pack(index, value & 0xFFFFFFFF)
+        for address, data in writes:
+            buffer += _memory_write.pack(address, len(data))
+            buffer += data
+
+        self._writes = []
+        if len(buffer) >= self.chunk_size:
+            self.flush()
+
+    def flush(self):
+        self.f.write(self.buffer)
+        self.buffer = bytearray()
+
+    def close(self):
+        self.flush()
+        self.f.close()
+
+
+def _read_exact(f, size):
+    data = f.read(size)
+    if len(data) != size:
+        raise RuntimeError("Trace ends in the middle of a step")
+
+    return data
+
+
+def read_trace(f):
+    magic, version, flags = _header.unpack(_read_exact(f, _header.size))
+    if magic != TRACE_MAGIC:
+        raise RuntimeError("Not a binary trace: {0}".format(magic))
+    if version != TRACE_VERSION:
+        raise RuntimeError("Unsupported trace version {0}".format(version))
+
+    while True:
+        data = f.read(_step.size)
+        if not data:
+            break
+        if len(data) != _step.size:
+            raise RuntimeError("Trace ends in the middle of a step")
+
+        address, word, register_count, write_count = _step.unpack(data)
+
+        registers = []
+        if register_count:
+            data = _read_exact(f, _register.size * register_count)
+            registers = list(_register.iter_unpack(data))
+
+        memory = []
+        for i in range(write_count):
+            write_address, size = _memory_write.unpack(_read_exact(f, _memory_write.size))
+            memory.append((write_address, _read_exact(f, size)))
+
+        yield TraceStep(address, word, registers, memory)
+
+
+def register_name(index):
+    if index < 32:
+        return "r{0}".format(index)
+    else:
+        return TRACE_REGISTERS[index - 32]
+
+
+def disassemble_trace(f):
+    for step in read_trace(f):
+        yield step, disassemble_word(step.word, step.address)